@@ -1,12 +1,56 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-from crowdfunding_platform import CrowdfundingPlatform
+from src.crowdfunding_platform import CrowdfundingPlatform
+from mods import metrics
+from mods.ledger_cache import account_cache
+from mods.campaign_listing import InvalidQuery
+from mods.lazy import lazy_import
 
-app = FastAPI()
+# the XRPL stacks load when the background workers start or a route needs them
+async_xrpl = lazy_import('mods.async_xrpl')
+client_pool = lazy_import('mods.client_pool')
+sequences = lazy_import('mods.sequences')
+tx_prepare = lazy_import('mods.tx_prepare')
+
+@asynccontextmanager
+async def lifespan(app):
+    await platform.investment_worker.start()
+    if os.environ.get("AGRIVEST_INGEST") == "1":
+        await platform.ledger_ingestor.start()
+    if platform.escrow_scheduler.operator_seed:
+        await platform.escrow_scheduler.start()
+    yield
+    await platform.escrow_scheduler.stop()
+    await platform.ledger_ingestor.stop()
+    await platform.investment_worker.stop()
+    await client_pool.close_async_clients()
+
+app = FastAPI(lifespan=lifespan)
 platform = CrowdfundingPlatform()
 
+metrics.REGISTRY.collector(
+    'campaign_page_lookups', 'Cached campaign list pages by outcome', ('outcome',),
+    lambda: {('hit',): platform.campaign_listing.hits, ('miss',): platform.campaign_listing.misses})
+metrics.REGISTRY.collector(
+    'trustline_preflight', 'Investment TrustSet steps by outcome', ('outcome',),
+    lambda: {('skipped',): platform.investment_worker.stats['trustlines_skipped'],
+             ('submitted',): platform.investment_worker.stats['trustlines_submitted']})
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.HTTP_SECONDS.observe(time.perf_counter() - started, request.method,
+                                 route.path if route else "unmatched", response.status_code)
+    return response
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -20,6 +64,7 @@ class CampaignCreateReq(BaseModel):
     project_title: str
     description: str
     funding_goal: int
+    farmer_address: str
 
 class InvestReq(BaseModel):
     campaign_id: int
@@ -33,33 +78,148 @@ class MintNFTReq(BaseModel):
 class BalanceReq(BaseModel):
     wallet_seed: str
 
+class BalancesBatchReq(BaseModel):
+    addresses: List[str] = []
+    campaign_id: Optional[int] = None
+
+class PayoutReq(BaseModel):
+    amount: float
+    farmer_seed: str
+    asset: str = "XRP"
+    key: Optional[str] = None
+
+MAX_BALANCE_BATCH = 5000
+
 @app.post("/campaigns")
 def create_campaign(req: CampaignCreateReq):
     campaign_id = platform.create_campaign(
-        req.farmer_name, req.project_title, req.description, req.funding_goal
+        req.farmer_name, req.project_title, req.description, req.funding_goal, req.farmer_address
     )
     return {"campaign_id": campaign_id}
 
 @app.get("/campaigns")
-def list_campaigns():
-    data = platform.load_data()
-    return {"campaigns": data.get("campaigns", [])}
+def list_campaigns(response: Response, status: Optional[str] = None, farmer: Optional[str] = None,
+                   min_goal: Optional[int] = None, max_goal: Optional[int] = None,
+                   sort: str = "created_at", order: str = "desc", limit: int = 50,
+                   cursor: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
+    try:
+        etag, page = platform.list_campaigns_page(status, farmer, min_goal, max_goal, sort, order, limit, cursor)
+    except InvalidQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return page
+
+@app.post("/campaigns:approve-pending")
+def approve_pending_campaigns():
+    # credential reads per farmer, then one storage transaction for every decision
+    return platform.approver.approve_pending()
+
+@app.get("/campaigns/{campaign_id}/investments")
+def campaign_investments(campaign_id: int):
+    return {"investments": platform.get_campaign_investments(campaign_id)}
+
+@app.get("/campaigns/{campaign_id}/stats")
+def campaign_stats(campaign_id: int):
+    stats = platform.get_campaign_stats(campaign_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return stats
+
+@app.post("/funding:verify")
+def verify_funding(fix: bool = False):
+    drift = platform.verify_funding(fix=fix)
+    return {"drifted": len(drift), "fixed": fix, "campaigns": drift}
 
-@app.post("/invest")
-def invest(req: InvestReq):
-    platform.invest_in_campaign(req.campaign_id, req.investor_seed, req.amount)
-    return {"success": True}
+@app.post("/campaigns/{campaign_id}/payouts", status_code=202)
+def create_payout(campaign_id: int, req: PayoutReq, background: BackgroundTasks):
+    if req.asset not in ("XRP", "token"):
+        raise HTTPException(status_code=400, detail="asset must be 'XRP' or 'token'")
+    try:
+        payout = platform.payouts.plan(campaign_id, req.amount, req.asset, req.key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if payout is None:
+        raise HTTPException(status_code=404, detail="Campaign not found or has no investments")
+    if payout["status"] != "completed":
+        background.add_task(platform.payouts.run, payout["id"], req.farmer_seed)
+    return {"payout_id": payout["id"], "status": payout["status"], "recipients": payout["recipients"]}
+
+@app.get("/payouts/{payout_id}")
+def payout_status(payout_id: int):
+    payout = platform.get_payout(payout_id)
+    if payout is None:
+        raise HTTPException(status_code=404, detail="Payout not found")
+    return payout
+
+@app.get("/portfolio/{address}")
+def portfolio(address: str):
+    return platform.get_portfolio(address)
+
+@app.post("/invest", status_code=202)
+async def invest(req: InvestReq):
+    # the job row is an fsync'd SQLite write: keep it off the event loop
+    job = await asyncio.to_thread(platform.queue_investment, req.campaign_id, req.investor_seed, req.amount)
+    if job is None:
+        raise HTTPException(status_code=400, detail="Campaign not found or not approved")
+    return {"job_id": job["job_id"], "status": job["status"]}
+
+@app.get("/investments/{job_id}")
+def investment_status(job_id: int):
+    job = platform.get_investment_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Investment job not found")
+    return job
 
 @app.post("/mint_nft")
-def mint_nft(req: MintNFTReq):
-    from nft_utils import mint_nft
-    nft_id, tx_result = mint_nft(req.seed, req.uri)
+async def mint_nft(req: MintNFTReq):
+    nft_id, tx_result = await async_xrpl.mint_nft(req.seed, req.uri)
     return {"nft_id": nft_id, "tx_result": tx_result}
 
 @app.post("/balance")
-def check_balance(req: BalanceReq):
-    from wallet import get_account, get_account_info
-    wallet = get_account(req.wallet_seed)
-    info = get_account_info(wallet.address)
+async def check_balance(req: BalanceReq):
+    wallet = async_xrpl.wallet_from_seed(req.wallet_seed)
+    info = await async_xrpl.get_account_info(wallet.address)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Account not found or not funded")
     xrp_balance = int(info["Balance"]) / 1_000_000
     return {"address": wallet.address, "xrp_balance": xrp_balance}
+
+@app.post("/balances:batch")
+async def check_balances_batch(req: BalancesBatchReq):
+    addresses = list(req.addresses)
+    if req.campaign_id is not None:
+        addresses += platform.campaign_investor_addresses(req.campaign_id)
+    if len(set(addresses)) > MAX_BALANCE_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BALANCE_BATCH} addresses per batch")
+    balances = await platform.get_balances_async(addresses)
+    return {"count": len(balances), "balances": balances}
+
+@app.get("/credentials/{subject}/check")
+def check_credential(subject: str, issuer: str, credential_type: str):
+    # one account_objects read when the subject was not read within the approver's max_age,
+    # memory otherwise (the ledger stream does not follow arbitrary subjects)
+    valid = platform.credential_index.check(subject, issuer, credential_type,
+                                            max_age=platform.approver.max_age)
+    return {"subject": subject, "issuer": issuer, "credential_type": credential_type, "valid": valid}
+
+@app.get("/ingest/stats")
+def ingest_stats():
+    return dict(platform.ledger_ingestor.stats, checkpoint=platform.ledger_ingestor.checkpoint(),
+                subscribed=len(platform.ledger_ingestor.subscribed))
+
+@app.get("/escrows/schedule")
+def escrow_schedule():
+    return {"next_due": platform.escrow_scheduler.next_due(), "stats": platform.escrow_scheduler.stats}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {**account_cache.stats(), "campaign_pages": platform.campaign_listing.stats(),
+            "tx_prepare": tx_prepare.preparer_stats(), "sequences": sequences.sequencer_stats(),
+            "trustline_preflight": dict(platform.investment_worker.stats),
+            "credentials": platform.credential_index.stats()}
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
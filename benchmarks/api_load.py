@@ -0,0 +1,126 @@
+"""Load test for the async /invest endpoint against a local mock ledger.
+
+Each concurrency level fires that many /invest requests at once through a
+single in-process API worker (one event loop), every one for its own
+campaign and investor so nothing contends on an account sequence. /invest
+only queues a job, so the run reports how fast requests are accepted and,
+separately, how long the background worker takes to confirm them all.
+
+    python -m benchmarks.api_load --levels 1,10,50,200 --close-interval 3.5
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import httpx
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import spawn
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _seed_campaigns(platform, count):
+    campaign_ids = []
+    for n in range(count):
+        farmer = Wallet.create()
+        campaign = platform.storage.insert('campaigns', {
+            'farmer_name': f'Farmer {n}', 'project_title': 'Load Test', 'description': '',
+            'funding_goal': 1000, 'farmer_address': farmer.address,
+            'farmer_wallet_seed': farmer.seed, 'token_currency': 'LOD',
+            'status': 'approved', 'created_at': '2025-01-01T00:00:00',
+        })
+        campaign_ids.append(campaign['id'])
+    return campaign_ids
+
+
+async def _level(app, platform, concurrency):
+    campaign_ids = _seed_campaigns(platform, concurrency)
+    investor_seeds = [Wallet.create().seed for _ in campaign_ids]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://api', timeout=120) as http:
+        async def one(campaign_id, investor_seed):
+            started = time.perf_counter()
+            response = await http.post('/invest', json={
+                'campaign_id': campaign_id, 'investor_seed': investor_seed, 'amount': 5})
+            response.raise_for_status()
+            return time.perf_counter() - started, response.json()['job_id']
+
+        started = time.perf_counter()
+        accepted = await asyncio.gather(*(one(c, s) for c, s in zip(campaign_ids, investor_seeds)))
+        accepted_after = time.perf_counter() - started
+
+        pending = {job_id for _, job_id in accepted}
+        statuses = {}
+        while pending:
+            await asyncio.sleep(0.25)
+            for job_id in list(pending):
+                job = (await http.get(f'/investments/{job_id}')).json()
+                if job['status'] in ('completed', 'failed'):
+                    statuses[job_id] = job['status']
+                    pending.discard(job_id)
+        elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in accepted]
+    return {
+        'concurrency': concurrency,
+        'accepted_seconds': round(accepted_after, 3),
+        'accept_p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'accept_p99_ms': round(_percentile(latencies, 99) * 1000, 1),
+        'completed': sum(1 for s in statuses.values() if s == 'completed'),
+        'failed': sum(1 for s in statuses.values() if s == 'failed'),
+        'seconds_to_confirm_all': round(elapsed, 2),
+        'investments_per_second': round(concurrency / elapsed, 2),
+    }
+
+
+def run(levels=(1, 10, 50, 200), close_interval=3.5, latency=0.0):
+    # The mock ledger runs in its own process, like a real rippled would.
+    rippled, url = spawn(close_interval=close_interval, latency=latency)
+    os.environ['XRPL_RPC_URL'] = url
+    os.environ['AGRIVEST_STORAGE'] = 'sqlite:' + os.path.join(
+        tempfile.mkdtemp(prefix='agrivest-load-'), 'storage.db')
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            import api_server
+
+            async def all_levels():
+                # ASGITransport skips the lifespan, so run the worker by hand
+                worker = api_server.platform.investment_worker
+                await worker.start()
+                results = [await _level(api_server.app, api_server.platform, n) for n in levels]
+                await worker.stop()
+                from mods.client_pool import close_async_clients
+                await close_async_clients()
+                return results
+
+            results = asyncio.run(all_levels())
+    finally:
+        rippled.terminate()
+    return {'close_interval': close_interval, 'levels': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', default='1,10,50,200')
+    parser.add_argument('--close-interval', type=float, default=3.5,
+                        help='seconds between ledger closes (mainnet is ~3.5)')
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    levels = [int(n) for n in args.levels.split(',')]
+    print(json.dumps(run(levels, args.close_interval, args.latency), indent=2))
+
+
+if __name__ == '__main__':
+    main()
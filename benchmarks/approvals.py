@@ -0,0 +1,95 @@
+"""Batch approval of a pending-campaign backlog against the mock rippled.
+
+Seeds ``--campaigns`` pending campaigns spread over ``--farmers`` farmers,
+gives ``--credentialed`` of the farmers an accepted crop credential from
+one oracle (issued in bulk, then accepted in the mock), and times
+``CampaignApprover.approve_pending``: one credential read per farmer plus
+one storage transaction for every decision. A second run over what is
+left shows the cost with every farmer already in the credential index.
+
+    python -m benchmarks.approvals --campaigns 10000 --farmers 500
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, credential_utils, ticket_batch
+from mods.approvals import CampaignApprover
+from mods.credential_index import CredentialIndex
+from mods.indexes import IndexedStorage
+from mods.storage import SQLiteStorage, empty_data
+
+CREDENTIAL = 'CropHealthy'
+TITLES = ('Rice Paddy', 'Maize Field', 'Cassava', 'Coffee Estate', 'Cocoa Grove', 'Rice Terrace')
+
+
+def _seed(path, farmers, campaigns):
+    data = empty_data()
+    data['campaigns'] = [{'id': n, 'farmer_name': f'Farmer {n % len(farmers)}',
+                          'project_title': f'{TITLES[n % len(TITLES)]} {n}', 'description': '',
+                          'funding_goal': 1000, 'farmer_address': farmers[n % len(farmers)],
+                          'token_currency': None, 'status': 'pending',
+                          'created_at': f'2025-01-01T00:{n // 60 % 60:02d}:{n % 60:02d}'}
+                         for n in range(1, campaigns + 1)]
+    data['next_campaign_id'] = campaigns + 1
+    storage = SQLiteStorage(path)
+    storage.save_data(data)
+    return IndexedStorage(storage)
+
+
+def run(campaigns=10000, farmers=500, credentialed=400, close_interval=0.25):
+    ticket_batch.POLL_INTERVAL = close_interval / 4
+    with FakeRippled(close_interval=close_interval) as rippled:
+        os.environ['XRPL_RPC_URL'] = rippled.url
+        oracle = Wallet.from_entropy(f'{0:032x}')
+        addresses = [Wallet.from_entropy(f'{n:032x}').address for n in range(1, farmers + 1)]
+        credential_utils.issue_credentials(oracle.seed, [
+            {'farmer_address': a, 'credential_type': CREDENTIAL} for a in addresses[:credentialed]])
+        for entry in rippled.ledger.objects.values():
+            if entry['LedgerEntryType'] == 'Credential':
+                entry['Flags'] |= 0x00010000  # accepted by the farmer
+
+        storage = _seed(os.path.join(tempfile.mkdtemp(prefix='agrivest-approvals-'), 'storage.db'),
+                        addresses, campaigns)
+        storage.count('campaigns', status='pending')  # build the indexes outside the timing
+        approver = CampaignApprover(storage, CredentialIndex(), issuers=[oracle.address],
+                                    credential_type=CREDENTIAL)
+        requests = sum(rippled.ledger.request_counts.values())
+        first = approver.approve_pending()
+        first['rpc_requests'] = sum(rippled.ledger.request_counts.values()) - requests
+        second = approver.approve_pending()
+        started = time.perf_counter()
+        codes = {(c['farmer_address'], c['token_currency']) for c in storage.find('campaigns', status='approved')}
+        check_seconds = time.perf_counter() - started
+    client_pool.close_clients()
+    return {
+        'campaigns': campaigns,
+        'farmers': farmers,
+        'credentialed_farmers': credentialed,
+        'close_interval': close_interval,
+        'first_run': first,
+        'second_run': second,
+        'unique_currency_per_farmer': len(codes) == first['approved'],
+        'uniqueness_check_seconds': round(check_seconds, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--campaigns', type=int, default=10000)
+    parser.add_argument('--farmers', type=int, default=500)
+    parser.add_argument('--credentialed', type=int, default=400)
+    parser.add_argument('--close-interval', type=float, default=0.25)
+    args = parser.parse_args()
+    print(json.dumps(run(args.campaigns, args.farmers, args.credentialed, args.close_interval), indent=2))
+
+
+if __name__ == '__main__':
+    main()
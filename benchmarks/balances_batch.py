@@ -0,0 +1,93 @@
+"""Throughput of POST /balances:batch against one /balance-style lookup per wallet.
+
+Both sides run against a mock rippled in its own process with the read
+cache disabled, so every account costs one account_info and one
+account_lines round trip.
+
+    python -m benchmarks.balances_batch --addresses 2000 --latency 0.02
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import httpx
+from xrpl.core.keypairs import derive_classic_address
+
+from benchmarks.fake_rippled import spawn
+
+
+def _addresses(count):
+    # any well-formed address works: the mock ledger funds accounts on first sight
+    return [derive_classic_address('ED' + f'{n:064X}') for n in range(count)]
+
+
+async def _one_by_one(async_xrpl, addresses):
+    for address in addresses:
+        await async_xrpl.get_account_info(address)
+        await async_xrpl.get_iou_balances(address)
+
+
+async def _batch(app, addresses):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://api', timeout=600) as http:
+        response = await http.post('/balances:batch', json={'addresses': addresses})
+        response.raise_for_status()
+        return response.json()['count']
+
+
+def run(count=2000, latency=0.02, sequential_sample=200):
+    rippled, url = spawn(close_interval=3.5, latency=latency)
+    os.environ['XRPL_RPC_URL'] = url
+    os.environ['AGRIVEST_CACHE_TTL'] = '0'
+    os.environ['AGRIVEST_STORAGE'] = 'sqlite:' + os.path.join(
+        tempfile.mkdtemp(prefix='agrivest-balances-'), 'storage.db')
+    addresses = _addresses(count)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            import api_server
+            from mods import async_xrpl
+            from mods.client_pool import close_async_clients
+
+            async def measure():
+                sample = addresses[:sequential_sample]
+                started = time.perf_counter()
+                await _one_by_one(async_xrpl, sample)
+                sequential = time.perf_counter() - started
+
+                started = time.perf_counter()
+                returned = await _batch(api_server.app, addresses + addresses[:count // 10])
+                batched = time.perf_counter() - started
+                await close_async_clients()
+                return sequential, batched, returned
+
+            sequential, batched, returned = asyncio.run(measure())
+    finally:
+        rippled.terminate()
+    return {
+        'addresses': count,
+        'latency': latency,
+        'one_by_one_accounts_per_second': round(sequential_sample / sequential, 1),
+        'batch_accounts_per_second': round(count / batched, 1),
+        'batch_seconds': round(batched, 2),
+        'batch_returned': returned,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--addresses', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='seconds the mock ledger waits before answering each request')
+    args = parser.parse_args()
+    print(json.dumps(run(args.addresses, args.latency), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Rows per second of the batch commands (cli/batch.py) against the mock rippled.
+
+Runs create-campaign, approve-campaign, invest and mint over ``--rows``
+rows at each ``--concurrency`` level, with a fresh SQLite store and mock
+ledger per level. Storage-only commands are bound by SQLite; the ledger
+commands by the close interval, which concurrency overlaps across wallets.
+
+    python -m benchmarks.batch_cli --rows 40 --concurrency 1,8,32
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from cli import batch
+from mods import client_pool
+
+
+def _wallet(n):
+    return Wallet.from_entropy(f'{n:032x}')
+
+
+async def _commands(platform, rows, concurrency):
+    results = {}
+    farmer = _wallet(0)
+
+    async def run(command, command_rows):
+        out = io.StringIO()
+        summary = await batch.run_batch(platform, command, command_rows, concurrency, None, out)
+        results[command] = {k: summary[k] for k in ('ok', 'error', 'seconds', 'rows_per_second')}
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    try:
+        created = await run('create-campaign', [
+            {'farmer_name': f'Farmer {n}', 'project_title': f'Crop {n}', 'funding_goal': 100000,
+             'farmer_address': farmer.address} for n in range(rows)])
+        ids = [r['result']['campaign_id'] for r in created if r['status'] == 'ok']
+        await run('approve-campaign', [{'campaign_id': i} for i in ids])
+        await run('invest', [{'campaign_id': i, 'investor_seed': _wallet(1 + n).seed, 'amount': 10}
+                             for n, i in enumerate(ids)])
+        await run('mint', [{'seed': _wallet(1 + rows + n).seed, 'uri': f'ipfs://crop/{n}'}
+                           for n in range(rows)])
+    finally:
+        await client_pool.close_async_clients()
+    return results
+
+
+def run(rows=40, levels=(1, 8, 32), close_interval=0.25):
+    from src.crowdfunding_platform import CrowdfundingPlatform
+    results = {}
+    for concurrency in levels:
+        directory = tempfile.mkdtemp(prefix='agrivest-batch-')
+        with FakeRippled(close_interval=close_interval) as rippled:
+            os.environ['XRPL_RPC_URL'] = rippled.url
+            with contextlib.redirect_stdout(io.StringIO()):
+                platform = CrowdfundingPlatform(f"sqlite:{os.path.join(directory, 'storage.db')}")
+                results[concurrency] = asyncio.run(_commands(platform, rows, concurrency))
+            client_pool.close_clients()
+    return {'rows': rows, 'close_interval': close_interval, 'concurrency': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=40)
+    parser.add_argument('--concurrency', default='1,8,32', help="comma-separated levels")
+    parser.add_argument('--close-interval', type=float, default=0.25)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(',')]
+    print(json.dumps(run(args.rows, levels, args.close_interval), indent=2))
+
+
+if __name__ == '__main__':
+    main()
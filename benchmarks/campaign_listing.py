@@ -0,0 +1,83 @@
+"""Latency of GET /campaigns pages over a large campaign table.
+
+Seeds N campaigns with save_data, then times first-page, deep-cursor,
+filtered and cached page requests against the platform's CampaignListing.
+
+    python -m benchmarks.campaign_listing --campaigns 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from mods.campaign_listing import CampaignListing
+from mods.indexes import IndexedStorage
+from mods.storage import empty_data, open_storage
+
+
+def _seed(storage, count):
+    rng = random.Random(1)
+    data = empty_data()
+    data['campaigns'] = [{
+        'id': n, 'farmer_name': f'farmer-{n}', 'project_title': f'project {n}',
+        'description': 'x' * 80, 'funding_goal': rng.randrange(100, 100_000),
+        'farmer_address': f'rFarmer{n % 2000}', 'farmer_wallet_seed': 'sSecret',
+        'token_currency': None, 'status': rng.choice(['pending', 'approved', 'approved', 'funded']),
+        'created_at': f'2026-01-01T{n // 3600 % 24:02d}:{n // 60 % 60:02d}:{n % 60:02d}.{n:06d}',
+    } for n in range(1, count + 1)]
+    storage.save_data(data)
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {'p50_ms': round(statistics.median(samples), 3), 'max_ms': round(max(samples), 3)}
+
+
+def run(campaigns=100_000, repeat=50):
+    directory = tempfile.mkdtemp(prefix='agrivest-listing-')
+    storage = IndexedStorage(open_storage(f"sqlite:{os.path.join(directory, 'storage.db')}"))
+    _seed(storage, campaigns)
+    started = time.perf_counter()
+    storage.refresh()
+    load = time.perf_counter() - started
+
+    listing = CampaignListing(storage, max_entries=0)   # measure uncached pages
+    _, page = listing.page(limit=50)
+    for _ in range(campaigns // 100):   # deep into the listing
+        _, page = listing.page(limit=50, cursor=page['next_cursor'])
+    deep_cursor = page['next_cursor']
+
+    cached = CampaignListing(storage)
+    cached.page(status='approved', limit=50)
+    return {
+        'campaigns': campaigns,
+        'index_load_seconds': round(load, 3),
+        'first_page': _time(lambda: listing.page(limit=50), repeat),
+        'deep_cursor_page': _time(lambda: listing.page(limit=50, cursor=deep_cursor), repeat),
+        'status_and_goal_filter': _time(lambda: listing.page(status='approved', min_goal=50_000,
+                                                             max_goal=60_000, sort='funding_goal',
+                                                             limit=50), repeat),
+        'farmer_filter': _time(lambda: listing.page(farmer='rFarmer7', limit=50), repeat),
+        'cached_page': _time(lambda: cached.page(status='approved', limit=50), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--campaigns', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.campaigns, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Requests per second with a fresh JsonRpcClient per call vs the shared pool.
+
+Both variants run the same account_info lookups and autofilled payments
+against a local FakeRippled, so the difference is connection setup and
+the server_info round trip a fresh client repeats on every autofill.
+
+    python -m benchmarks.client_pool --requests 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from xrpl.clients import JsonRpcClient
+from xrpl.models.requests import AccountInfo
+from xrpl.models.transactions import Payment
+from xrpl.transaction import autofill
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods.client_pool import PooledJsonRpcClient
+
+SEED = 'sEdTW3oR3cPqvixUj4vVcxWoagUdpC6'
+DESTINATION = 'rUHk9P7dGtL8G8KQ35B7AQswRyLiUnmxfu'
+
+
+def _measure(rippled, make_client, requests):
+    address = Wallet.from_seed(SEED).address
+    payment = Payment(account=address, amount='1000000', destination=DESTINATION)
+    connections = rippled.connections
+    rpcs = sum(rippled.ledger.request_counts.values())
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        make_client().request(AccountInfo(account=address, ledger_index='validated'))
+    lookup_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(requests // 5):
+        autofill(payment, make_client())
+    autofill_seconds = time.perf_counter() - started
+
+    return {
+        'account_info_per_second': round(requests / lookup_seconds, 1),
+        'autofill_per_second': round((requests // 5) / autofill_seconds, 1),
+        'tcp_connections': rippled.connections - connections,
+        'rpcs': sum(rippled.ledger.request_counts.values()) - rpcs,
+    }
+
+
+def run(requests=500, latency=0.0):
+    with FakeRippled(latency=latency) as rippled:
+        before = _measure(rippled, lambda: JsonRpcClient(rippled.url), requests)
+        pooled = PooledJsonRpcClient(rippled.url)
+        after = _measure(rippled, lambda: pooled, requests)
+        pooled.close()
+    return {'requests': requests, 'before': before, 'after': after,
+            'speedup': round(after['account_info_per_second'] / before['account_info_per_second'], 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='injected server latency per request, in seconds')
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.latency), indent=2))
+
+
+if __name__ == '__main__':
+    main()
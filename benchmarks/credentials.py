@@ -0,0 +1,84 @@
+"""Bulk credential issuance and credential checks against the mock rippled.
+
+Issues ``--farmers`` credentials from one oracle with
+``credential_utils.issue_credentials`` (tickets) and ``--sequential`` of
+them one at a time for comparison, then answers "does this farmer hold
+the credential" for every farmer through ``lookup_credentials`` (one RPC
+each) and through the in-process CredentialIndex.
+
+    python -m benchmarks.credentials --farmers 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, credential_utils, sequences, ticket_batch
+from mods.credential_index import CredentialIndex, credential_type_hex
+
+CREDENTIAL = 'CropHealthy2025'
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def run(farmers=500, sequential=10, close_interval=0.25):
+    sequences.POLL_INTERVAL = ticket_batch.POLL_INTERVAL = close_interval / 4
+    with FakeRippled(close_interval=close_interval) as rippled:
+        os.environ['XRPL_RPC_URL'] = rippled.url
+        oracle = Wallet.from_entropy(f'{0:032x}')
+        addresses = [Wallet.from_entropy(f'{n:032x}').address for n in range(1, farmers + sequential + 1)]
+        batch = [{'farmer_address': a, 'credential_type': CREDENTIAL} for a in addresses[:farmers]]
+
+        summary, bulk_seconds = _timed(lambda: credential_utils.issue_credentials(oracle.seed, batch))
+        _, sequential_seconds = _timed(lambda: [
+            credential_utils.issue_crop_credential(oracle.seed, a, CREDENTIAL) for a in addresses[farmers:]])
+
+        # accepting is the farmers' business; mark them accepted directly in the mock
+        for entry in rippled.ledger.objects.values():
+            if entry['LedgerEntryType'] == 'Credential':
+                entry['Flags'] |= 0x00010000
+
+        kind = credential_type_hex(CREDENTIAL)
+        rpc_found, rpc_seconds = _timed(lambda: sum(
+            any(c['Issuer'] == oracle.address and c['CredentialType'] == kind
+                for c in credential_utils.lookup_credentials(a)) for a in addresses[:farmers]))
+        index = CredentialIndex()
+        _, load_seconds = _timed(lambda: index.ensure(addresses[:farmers]))
+        index_found, index_seconds = _timed(lambda: sum(
+            index.holds(a, oracle.address, CREDENTIAL) for a in addresses[:farmers]))
+    client_pool.close_clients()
+    return {
+        'farmers': farmers,
+        'close_interval': close_interval,
+        'bulk_issue': {'issued': summary['issued'], 'seconds': round(bulk_seconds, 2),
+                       'per_second': round(summary['issued'] / bulk_seconds, 1)},
+        'sequential_issue': {'issued': sequential, 'seconds': round(sequential_seconds, 2),
+                             'per_second': round(sequential / sequential_seconds, 1) if sequential else 0.0},
+        'rpc_checks': {'found': rpc_found, 'seconds': round(rpc_seconds, 3),
+                       'per_second': round(farmers / rpc_seconds, 1)},
+        'index_load': {'seconds': round(load_seconds, 3)},
+        'index_checks': {'found': index_found, 'seconds': round(index_seconds, 4),
+                         'per_second': round(farmers / index_seconds, 1)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--farmers', type=int, default=500)
+    parser.add_argument('--sequential', type=int, default=10)
+    parser.add_argument('--close-interval', type=float, default=0.25)
+    args = parser.parse_args()
+    print(json.dumps(run(args.farmers, args.sequential, args.close_interval), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Cost of decoding an escrow portfolio: per-escrow formatting vs. columns.
+
+The legacy path turned every escrow into a display dict straight away,
+with one drops_to_xrp and one ripple_time_to_datetime call per field.
+scan_escrows keeps drops and Unix times as ints and formats rows lazily
+through a date cache. Timed on N synthetic ledger entries (decode only)
+and end to end against an in-process mock rippled.
+
+    python -m benchmarks.escrow_scan --escrows 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from xrpl.core.keypairs import derive_classic_address
+from xrpl.utils import drops_to_xrp, ripple_time_to_datetime
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, escrow_utils
+
+MATURITY_DATES = 90  # loans mature on a few distinct days
+
+
+def _entries(count, accounts):
+    rng = random.Random(1)
+    base = 800_000_000
+    return [{
+        'LedgerEntryType': 'Escrow', 'index': f'{n:064X}', 'PreviousTxnID': f'{n:064X}',
+        'Account': rng.choice(accounts), 'Destination': rng.choice(accounts),
+        'Amount': str(rng.randrange(1_000_000, 500_000_000)),
+        'FinishAfter': base + rng.randrange(MATURITY_DATES) * 86400,
+        'CancelAfter': base + (rng.randrange(MATURITY_DATES) + 30) * 86400,
+    } for n in range(count)]
+
+
+def _legacy(entries):
+    """The pre-scan get_escrows loop body."""
+    rows = []
+    for escrow in entries:
+        if isinstance(escrow['Amount'], str):
+            row = {'escrow_id': escrow['index'], 'sender': escrow['Account'],
+                   'receiver': escrow['Destination'], 'amount': str(drops_to_xrp(escrow['Amount'])),
+                   'prev_txn_id': escrow['PreviousTxnID']}
+            if 'FinishAfter' in escrow:
+                row['redeem_date'] = str(ripple_time_to_datetime(escrow['FinishAfter']))
+            if 'CancelAfter' in escrow:
+                row['expiry_date'] = str(ripple_time_to_datetime(escrow['CancelAfter']))
+            rows.append(row)
+    return rows
+
+
+def _columns(entries):
+    columns = {name: [] for name in escrow_utils.ESCROW_COLUMNS}
+    escrow_utils._append_escrows(columns, entries, set())
+    return columns
+
+
+def _seconds(fn):
+    started = time.perf_counter()
+    result = fn()
+    return round(time.perf_counter() - started, 3), result
+
+
+def run(escrows=100_000, accounts=50):
+    addresses = [derive_classic_address('ED' + f'{n:064X}') for n in range(accounts)]
+    entries = _entries(escrows, addresses)
+
+    legacy, legacy_rows = _seconds(lambda: _legacy(entries))
+    escrow_utils._format_time.cache_clear()
+    decode, columns = _seconds(lambda: _columns(entries))
+    rows, formatted = _seconds(lambda: list(escrow_utils.escrow_rows(columns)))
+    assert formatted == legacy_rows
+    total_drops = sum(columns['amount'])   # what callers aggregating a portfolio do
+
+    with FakeRippled(close_interval=0) as rippled:
+        os.environ['XRPL_RPC_URL'] = rippled.url
+        for n, entry in enumerate(entries):
+            rippled.ledger.add_escrow(entry['Account'], entry['Destination'], entry['Amount'], n,
+                                      entry['FinishAfter'], entry['CancelAfter'])
+        scan, scanned = _seconds(lambda: escrow_utils.scan_escrows(addresses))
+        per_account, _ = _seconds(lambda: [escrow_utils.get_escrows(a) for a in addresses[:5]])
+    client_pool.close_clients()
+
+    return {
+        'escrows': escrows,
+        'legacy_decode_seconds': legacy,
+        'column_decode_seconds': decode,
+        'row_format_seconds': rows,
+        'date_cache': escrow_utils._format_time.cache_info()._asdict(),
+        'portfolio_xrp': str(drops_to_xrp(str(total_drops))),
+        'scan_seconds': scan,
+        'scanned_escrows': len(scanned['escrow_id']),
+        'get_escrows_5_accounts_seconds': per_account,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escrows', type=int, default=100_000)
+    parser.add_argument('--accounts', type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.escrows, args.accounts), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Local WebSocket server that replays a recorded ledger stream.
+
+The recording is a list of ledgers, each
+``{'ledger_index': N, 'transactions': [{'tx_json', 'meta', 'hash'}, ...]}``
+(``load_recording`` builds it from a JSONL capture of ``subscribe``
+messages). Ledgers are published one at a time with ``advance()`` the way
+rippled does - a ``ledgerClosed`` message, then that ledger's
+transactions to every client subscribed to an account they touch - and
+``account_tx`` answers from the ledgers published so far, so a client can
+back-fill what it missed. ``drop_clients()`` simulates a disconnect.
+
+    async with FakeLedgerStream(ledgers) as stream:
+        ingestor = LedgerIngestor(storage, url=stream.url)
+        await stream.advance()
+"""
+import asyncio
+import json
+from collections import Counter
+
+from websockets.asyncio.server import serve
+
+from mods.ledger_cache import affected_accounts
+
+
+def load_recording(path):
+    """Group a JSONL capture of stream messages into ledgers."""
+    ledgers = {}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            message = json.loads(line)
+            if message.get('type') == 'ledgerClosed':
+                ledgers.setdefault(message['ledger_index'], [])
+            elif message.get('type') == 'transaction' and message.get('validated'):
+                tx = message.get('tx_json') or message.get('transaction')
+                ledgers.setdefault(message['ledger_index'], []).append(
+                    {'tx_json': tx, 'meta': message['meta'], 'hash': message.get('hash') or tx['hash']})
+    return [{'ledger_index': index, 'transactions': ledgers[index]} for index in sorted(ledgers)]
+
+
+class FakeLedgerStream:
+    """Replay ``ledgers`` to WebSocket subscribers on ``127.0.0.1``."""
+
+    def __init__(self, ledgers, host='127.0.0.1', port=0):
+        self.ledgers = list(ledgers)
+        self.host = host
+        self.port = port
+        self.published = 0          # ledgers sent so far
+        self.request_counts = Counter()
+        self._clients = {}          # connection -> {'ledger': bool, 'accounts': set}
+        self._server = None
+
+    @property
+    def url(self):
+        return f'ws://{self.host}:{self.port}'
+
+    @property
+    def validated_index(self):
+        return self.ledgers[self.published - 1]['ledger_index'] if self.published else 0
+
+    async def start(self):
+        self._server = await serve(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def wait_for_clients(self, count=1, accounts=0, timeout=5.0):
+        """Wait until ``count`` clients hold at least ``accounts`` account subscriptions each."""
+        async def ready():
+            while sum(len(c['accounts']) >= accounts and c['ledger'] for c in self._clients.values()) < count:
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(ready(), timeout)
+
+    async def drop_clients(self):
+        for connection in list(self._clients):
+            await connection.close()
+
+    async def advance(self, count=1):
+        """Publish the next ``count`` ledgers; returns the new validated index."""
+        for _ in range(count):
+            ledger = self.ledgers[self.published]
+            self.published += 1
+            for connection, subscription in list(self._clients.items()):
+                if subscription['ledger']:
+                    await self._send(connection, {
+                        'type': 'ledgerClosed', 'ledger_index': ledger['ledger_index'],
+                        'ledger_hash': f"{ledger['ledger_index']:064X}", 'txn_count': len(ledger['transactions']),
+                    })
+                for entry in ledger['transactions']:
+                    if affected_accounts(entry['tx_json']) & subscription['accounts']:
+                        await self._send(connection, dict(
+                            entry, type='transaction', validated=True, ledger_index=ledger['ledger_index'],
+                            engine_result=entry['meta'].get('TransactionResult')))
+        return self.validated_index
+
+    async def _send(self, connection, message):
+        try:
+            await connection.send(json.dumps(message))
+        except Exception:
+            self._clients.pop(connection, None)
+
+    async def _serve(self, connection):
+        self._clients[connection] = {'ledger': False, 'accounts': set()}
+        try:
+            async for raw in connection:
+                request = json.loads(raw)
+                command = request.get('command')
+                self.request_counts[command] += 1
+                handler = getattr(self, f'_cmd_{command}', None)
+                if handler is None:
+                    reply = {'status': 'error', 'error': 'unknownCmd'}
+                else:
+                    reply = {'status': 'success', 'result': handler(connection, request)}
+                await connection.send(json.dumps(dict(reply, id=request.get('id'), type='response')))
+        except Exception:
+            pass
+        finally:
+            self._clients.pop(connection, None)
+
+    def _cmd_subscribe(self, connection, request):
+        subscription = self._clients[connection]
+        subscription['accounts'] |= set(request.get('accounts') or ())
+        if 'ledger' in (request.get('streams') or ()):
+            subscription['ledger'] = True
+            return {'ledger_index': self.validated_index}
+        return {}
+
+    def _cmd_unsubscribe(self, connection, request):
+        self._clients[connection]['accounts'] -= set(request.get('accounts') or ())
+        return {}
+
+    def _cmd_ping(self, connection, request):
+        return {}
+
+    def _cmd_account_tx(self, connection, request):
+        account = request['account']
+        low = request.get('ledger_index_min', -1)
+        high = request.get('ledger_index_max', -1)
+        entries = [
+            dict(entry, ledger_index=ledger['ledger_index'], validated=True)
+            for ledger in self.ledgers[:self.published]
+            if (low == -1 or ledger['ledger_index'] >= low) and (high == -1 or ledger['ledger_index'] <= high)
+            for entry in ledger['transactions'] if account in affected_accounts(entry['tx_json'])
+        ]
+        if not request.get('forward'):
+            entries.reverse()
+        limit = int(request.get('limit') or 200)
+        start = int(request.get('marker') or 0)
+        result = {'account': account, 'transactions': entries[start:start + limit],
+                  'ledger_index_min': low, 'ledger_index_max': self.validated_index, 'validated': True}
+        if start + limit < len(entries):
+            result['marker'] = str(start + limit)
+        return result
@@ -0,0 +1,714 @@
+"""Deterministic in-process stand-in for a rippled JSON-RPC server.
+
+Only the methods the platform uses are implemented, and the transaction
+engine is a simplified model: signatures are not checked, paths are not
+rippled and reserves are ignored. What it does model faithfully is what
+matters for benchmarks: sequence and ticket accounting, fees, trust lines,
+escrows, NFTs, credentials, a ledger index that advances on a fixed close
+interval, and a configurable per-request latency. Like rippled, a
+transaction whose Sequence is ahead of its account's is held (terPRE_SEQ)
+and applied once the gap fills, until its LastLedgerSequence passes.
+
+    with FakeRippled(close_interval=0.5, latency=0.01) as rippled:
+        client = JsonRpcClient(rippled.url)
+
+With ``websocket=True`` the same methods are also served over WebSocket at
+``rippled.ws_url`` (``{"command": ..., "id": ...}`` requests), and clients
+subscribed to the ``ledger`` stream get a ``ledgerClosed`` message for
+every ledger that closes.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import serve as serve_websocket
+from xrpl.core.addresscodec import decode_classic_address
+from xrpl.core.binarycodec import decode
+
+RIPPLE_EPOCH = 946684800
+GENESIS_LEDGER = 1000
+DEFAULT_BALANCE = 1_000_000_000  # 1000 XRP in drops
+
+# account_objects ``type`` filter -> LedgerEntryType
+OBJECT_TYPES = {
+    'escrow': 'Escrow',
+    'ticket': 'Ticket',
+    'credential': 'Credential',
+    'offer': 'Offer',
+    'nft_offer': 'NFTokenOffer',
+    'check': 'Check',
+    'state': 'RippleState',
+}
+
+
+def tx_hash(tx_blob):
+    """Signed transaction id: SHA-512Half of the ``TXN\\0`` prefix and the blob."""
+    return hashlib.sha512(b'TXN\x00' + bytes.fromhex(tx_blob)).digest()[:32].hex().upper()
+
+
+def _object_index(*parts):
+    return hashlib.sha512('|'.join(map(str, parts)).encode()).digest()[:32].hex().upper()
+
+
+class FakeLedger:
+    """In-memory ledger state plus the JSON-RPC method handlers."""
+
+    def __init__(self, close_interval=1.0, latency=0.0, auto_fund=True,
+                 starting_balance=DEFAULT_BALANCE, clock=time.time):
+        self.close_interval = close_interval
+        self.latency = latency
+        self.auto_fund = auto_fund
+        self.starting_balance = starting_balance
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.request_counts = Counter()
+        self.accounts = {}
+        self.lines = {}            # (holder, issuer, currency) -> {'limit', 'balance'}
+        self.objects = {}          # index -> ledger entry
+        self.owner_dirs = {}       # address -> [index, ...]
+        self.nfts = {}             # address -> [nft, ...]
+        self.transactions = {}     # hash -> {'tx', 'meta', 'ledger_index'}
+        self.account_txs = {}      # address -> [hash, ...]
+        self.ledger_txs = {}       # ledger_index -> [hash, ...]
+        self.held = {}             # (address, Sequence) -> (tx, hash) waiting for a gap to fill
+        self._nft_serials = Counter()
+        self._started = clock()
+        self._closed = GENESIS_LEDGER
+
+    # -- ledger clock ------------------------------------------------------
+
+    @property
+    def validated_index(self):
+        if self.close_interval and self.close_interval > 0:
+            return GENESIS_LEDGER + int((self.clock() - self._started) / self.close_interval)
+        return self._closed
+
+    @property
+    def open_index(self):
+        return self.validated_index + 1
+
+    def ripple_time(self):
+        return int(self.clock()) - RIPPLE_EPOCH
+
+    def close_ledger(self):
+        """Manually close the open ledger (only meaningful with close_interval=0)."""
+        with self.lock:
+            self._closed += 1
+            return self._closed
+
+    # -- state helpers -----------------------------------------------------
+
+    def fund(self, address, drops=None):
+        with self.lock:
+            account = self.accounts.get(address)
+            if account is None:
+                account = self.accounts[address] = {
+                    'Account': address,
+                    'Balance': 0,
+                    'Flags': 0,
+                    'LedgerEntryType': 'AccountRoot',
+                    'OwnerCount': 0,
+                    'Sequence': self.validated_index,
+                }
+            account['Balance'] += self.starting_balance if drops is None else int(drops)
+            return account
+
+    def add_escrow(self, owner, destination, drops, sequence, finish_after=None, cancel_after=None):
+        """Place an XRP escrow straight into the ledger (fixtures); times are ripple time."""
+        with self.lock:
+            entry = {'LedgerEntryType': 'Escrow', 'Account': owner, 'Destination': destination,
+                     'Amount': str(drops), 'Flags': 0, 'PreviousTxnID': _object_index('tx', owner, sequence),
+                     'index': _object_index('escrow', owner, sequence)}
+            if finish_after is not None:
+                entry['FinishAfter'] = finish_after
+            if cancel_after is not None:
+                entry['CancelAfter'] = cancel_after
+            self._add_object(entry, owner, destination)
+            return entry
+
+    def _account(self, address):
+        account = self.accounts.get(address)
+        if account is None and self.auto_fund:
+            account = self.fund(address)
+        return account
+
+    def _add_object(self, entry, *owners):
+        self.objects[entry['index']] = entry
+        for owner in dict.fromkeys(owners):
+            self.owner_dirs.setdefault(owner, []).append(entry['index'])
+            if owner in self.accounts and owner == entry.get('Account', owner):
+                self.accounts[owner]['OwnerCount'] += 1
+
+    def _remove_object(self, index):
+        entry = self.objects.pop(index)
+        for owner, indexes in self.owner_dirs.items():
+            if index in indexes:
+                indexes.remove(index)
+                if owner == entry.get('Account') and owner in self.accounts:
+                    self.accounts[owner]['OwnerCount'] -= 1
+        return entry
+
+    # -- dispatch ----------------------------------------------------------
+
+    def handle(self, method, params):
+        """Return the ``result`` dict for one JSON-RPC call."""
+        if self.latency:
+            time.sleep(self.latency)
+        handler = getattr(self, f'rpc_{method}', None)
+        with self.lock:
+            self.request_counts[method] += 1
+            if handler is None:
+                return _error('unknownCmd', f'Unknown method {method}')
+            result = handler(params)
+        result.setdefault('status', 'success')
+        return result
+
+    # -- server / ledger methods --------------------------------------------
+
+    def rpc_server_info(self, params):
+        validated = self.validated_index
+        return {'info': {
+            'build_version': '2.3.0',
+            'network_id': 1,
+            'complete_ledgers': f'{GENESIS_LEDGER}-{validated}',
+            'server_state': 'full',
+            'validated_ledger': {'seq': validated, 'base_fee_xrp': 0.00001,
+                                 'reserve_base_xrp': 1, 'reserve_inc_xrp': 0.2},
+        }}
+
+    def rpc_server_state(self, params):
+        return {'state': {'validated_ledger': {
+            'seq': self.validated_index, 'base_fee': 10,
+            'reserve_base': 1_000_000, 'reserve_inc': 200_000,
+        }}}
+
+    def rpc_fee(self, params):
+        return {
+            'current_ledger_size': str(len(self.ledger_txs.get(self.open_index, []))),
+            'current_queue_size': '0',
+            'drops': {'base_fee': '10', 'median_fee': '5000',
+                      'minimum_fee': '10', 'open_ledger_fee': '10'},
+            'expected_ledger_size': '1000',
+            'ledger_current_index': self.open_index,
+            'levels': {'median_level': '128000', 'minimum_level': '256',
+                       'open_ledger_level': '256', 'reference_level': '256'},
+            'max_queue_size': '20000',
+        }
+
+    def rpc_ledger(self, params):
+        index = params.get('ledger_index', 'validated')
+        if index in ('current', 'open'):
+            return {'ledger': {'closed': False, 'ledger_index': str(self.open_index)},
+                    'ledger_current_index': self.open_index, 'validated': False}
+        if index in ('validated', 'closed'):
+            index = self.validated_index
+        index = int(index)
+        if index > self.validated_index:
+            return _error('lgrNotFound', 'ledgerNotFound')
+        ledger = {'closed': True, 'ledger_index': str(index),
+                  'ledger_hash': _object_index('ledger', index),
+                  'close_time': self.ripple_time()}
+        if params.get('transactions'):
+            hashes = self.ledger_txs.get(index, [])
+            if params.get('expand'):
+                ledger['transactions'] = [self._tx_result(h) for h in hashes]
+            else:
+                ledger['transactions'] = list(hashes)
+        return {'ledger': ledger, 'ledger_hash': ledger['ledger_hash'],
+                'ledger_index': index, 'validated': True}
+
+    # -- account methods ---------------------------------------------------
+
+    def rpc_account_info(self, params):
+        account = self._account(params['account'])
+        if account is None:
+            return _error('actNotFound', 'Account not found.', account=params['account'])
+        data = dict(account, Balance=str(account['Balance']))
+        return {'account_data': data, 'ledger_current_index': self.open_index,
+                'validated': params.get('ledger_index') == 'validated'}
+
+    def rpc_account_lines(self, params):
+        address = params['account']
+        if self._account(address) is None:
+            return _error('actNotFound', 'Account not found.')
+        lines = []
+        for (holder, issuer, currency), line in self.lines.items():
+            if holder == address:
+                lines.append({'account': issuer, 'balance': line['balance'], 'currency': currency,
+                              'limit': line['limit'], 'limit_peer': '0',
+                              'quality_in': 0, 'quality_out': 0})
+            elif issuer == address:
+                lines.append({'account': holder, 'balance': _neg(line['balance']),
+                              'currency': currency, 'limit': '0', 'limit_peer': line['limit'],
+                              'quality_in': 0, 'quality_out': 0})
+        if params.get('peer'):
+            lines = [line for line in lines if line['account'] == params['peer']]
+        return self._page(params, 'lines', lines, address)
+
+    def rpc_account_objects(self, params):
+        address = params['account']
+        if self._account(address) is None:
+            return _error('actNotFound', 'Account not found.')
+        entries = [self.objects[i] for i in self.owner_dirs.get(address, [])]
+        wanted = params.get('type')
+        if wanted:
+            entry_type = OBJECT_TYPES.get(wanted, wanted)
+            entries = [e for e in entries if e['LedgerEntryType'] == entry_type]
+        return self._page(params, 'account_objects', [dict(e) for e in entries], address)
+
+    def rpc_account_nfts(self, params):
+        address = params['account']
+        if self._account(address) is None:
+            return _error('actNotFound', 'Account not found.')
+        return self._page(params, 'account_nfts', list(self.nfts.get(address, [])), address)
+
+    def rpc_account_tx(self, params):
+        address = params['account']
+        hashes = self.account_txs.get(address, [])
+        if params.get('forward') is not True:
+            hashes = hashes[::-1]
+        txs = []
+        for h in hashes:
+            record = self.transactions[h]
+            if record['ledger_index'] <= self.validated_index:
+                txs.append({'tx': dict(record['tx'], hash=h, ledger_index=record['ledger_index']),
+                            'meta': record['meta'], 'validated': True})
+        return self._page(params, 'transactions', txs, address)
+
+    def rpc_gateway_balances(self, params):
+        obligations = Counter()
+        for (holder, issuer, currency), line in self.lines.items():
+            if issuer == params['account']:
+                obligations[currency] += float(line['balance'])
+        return {'account': params['account'],
+                'obligations': {c: _fmt(v) for c, v in obligations.items()}}
+
+    def _page(self, params, key, items, address):
+        limit = int(params.get('limit') or 200)
+        start = int(params.get('marker') or 0)
+        result = {'account': address, key: items[start:start + limit],
+                  'ledger_index': self.validated_index, 'validated': True}
+        if start + limit < len(items):
+            result['marker'] = str(start + limit)
+        return result
+
+    # -- transactions ------------------------------------------------------
+
+    def rpc_tx(self, params):
+        h = params.get('transaction', '').upper()
+        if h not in self.transactions:
+            return _error('txnNotFound', 'Transaction not found.')
+        return self._tx_result(h)
+
+    def _tx_result(self, h):
+        record = self.transactions[h]
+        validated = record['ledger_index'] <= self.validated_index
+        tx = dict(record['tx'], hash=h)
+        return dict(tx, tx_json=tx, meta=record['meta'], hash=h,
+                    ledger_index=record['ledger_index'], validated=validated)
+
+    def rpc_submit(self, params):
+        blob = params['tx_blob']
+        tx = decode(blob)
+        h = tx_hash(blob)
+        if h in self.transactions:
+            return _submit_result('tefALREADY', tx, h, blob, accepted=False)
+        code = self._apply(tx, h)
+        if code == 'terPRE_SEQ':
+            self.held[(tx['Account'], tx['Sequence'])] = (tx, h)
+        elif code[:3] in ('tes', 'tec') and 'TicketSequence' not in tx:
+            self._apply_held(tx['Account'])
+        return _submit_result(code, tx, h, blob, accepted=code[:3] in ('tes', 'tec'))
+
+    def _apply_held(self, address):
+        while True:
+            held = self.held.pop((address, self.accounts[address]['Sequence']), None)
+            if held is None or self._apply(*held)[:3] not in ('tes', 'tec'):
+                return
+
+    def _apply(self, tx, h):
+        address = tx['Account']
+        account = self._account(address)
+        if account is None:
+            return 'terNO_ACCOUNT'
+        ticket = tx.get('TicketSequence')
+        if ticket is not None:
+            ticket_index = _object_index('ticket', address, ticket)
+            if ticket_index not in self.objects:
+                return 'tefNO_TICKET'
+        elif tx['Sequence'] < account['Sequence']:
+            return 'tefPAST_SEQ'
+        elif tx['Sequence'] > account['Sequence']:
+            return 'terPRE_SEQ'
+        if 'LastLedgerSequence' in tx and tx['LastLedgerSequence'] < self.open_index:
+            return 'tefMAX_LEDGER'
+
+        fee = int(tx.get('Fee', '10'))
+        if account['Balance'] < fee:
+            return 'terINSUF_FEE_B'
+        account['Balance'] -= fee
+        if ticket is not None:
+            self._remove_object(_object_index('ticket', address, ticket))
+        else:
+            account['Sequence'] += 1
+
+        meta = {'TransactionIndex': len(self.ledger_txs.get(self.open_index, [])),
+                'AffectedNodes': []}
+        apply = getattr(self, f"_apply_{tx['TransactionType']}", None)
+        code = apply(tx, h, meta) if apply else 'tesSUCCESS'
+        meta['TransactionResult'] = code
+
+        ledger_index = self.open_index
+        self.transactions[h] = {'tx': tx, 'meta': meta, 'ledger_index': ledger_index}
+        self.ledger_txs.setdefault(ledger_index, []).append(h)
+        for party in {address, tx.get('Destination'), tx.get('Subject'), tx.get('Owner')} - {None}:
+            self.account_txs.setdefault(party, []).append(h)
+        if not self.close_interval or self.close_interval <= 0:
+            self._closed += 1
+        return code
+
+    def _apply_Payment(self, tx, h, meta):
+        amount = tx['Amount']
+        sender, dest = tx['Account'], tx['Destination']
+        if isinstance(amount, str):
+            if self.accounts[sender]['Balance'] < int(amount):
+                return 'tecUNFUNDED_PAYMENT'
+            self.accounts[sender]['Balance'] -= int(amount)
+            (self._account(dest) or self.fund(dest, 0))['Balance'] += int(amount)
+            meta['delivered_amount'] = amount
+            return 'tesSUCCESS'
+        issuer, currency, value = amount['issuer'], amount['currency'], float(amount['value'])
+        if sender != issuer:
+            line = self.lines.get((sender, issuer, currency))
+            if line is None or float(line['balance']) < value:
+                return 'tecPATH_PARTIAL'
+            line['balance'] = _fmt(float(line['balance']) - value)
+        if dest != issuer:
+            line = self.lines.get((dest, issuer, currency))
+            if line is None:
+                return 'tecPATH_DRY'
+            if float(line['balance']) + value > float(line['limit']):
+                return 'tecPATH_PARTIAL'
+            line['balance'] = _fmt(float(line['balance']) + value)
+        meta['delivered_amount'] = amount
+        return 'tesSUCCESS'
+
+    def _apply_TrustSet(self, tx, h, meta):
+        limit = tx['LimitAmount']
+        key = (tx['Account'], limit['issuer'], limit['currency'])
+        if key not in self.lines:
+            self.lines[key] = {'limit': limit['value'], 'balance': '0'}
+            self.accounts[tx['Account']]['OwnerCount'] += 1
+        else:
+            self.lines[key]['limit'] = limit['value']
+        return 'tesSUCCESS'
+
+    def _apply_TicketCreate(self, tx, h, meta):
+        address = tx['Account']
+        account = self.accounts[address]
+        first = account['Sequence']
+        for ticket in range(first, first + int(tx['TicketCount'])):
+            self._add_object({'LedgerEntryType': 'Ticket', 'Account': address,
+                              'TicketSequence': ticket, 'Flags': 0,
+                              'index': _object_index('ticket', address, ticket)}, address)
+        account['Sequence'] += int(tx['TicketCount'])
+        return 'tesSUCCESS'
+
+    def _apply_NFTokenMint(self, tx, h, meta):
+        issuer = tx.get('Issuer', tx['Account'])
+        serial = self._nft_serials[issuer]
+        self._nft_serials[issuer] += 1
+        flags, fee, taxon = int(tx.get('Flags', 0)) & 0xFFFF, int(tx.get('TransferFee', 0)), int(tx['NFTokenTaxon'])
+        nft_id = (f'{flags:04X}{fee:04X}{decode_classic_address(issuer).hex().upper()}'
+                  f'{taxon:08X}{serial:08X}')
+        nft = {'Flags': flags, 'Issuer': issuer, 'NFTokenID': nft_id,
+               'NFTokenTaxon': taxon, 'TransferFee': fee, 'nft_serial': serial}
+        if 'URI' in tx:
+            nft['URI'] = tx['URI']
+        self.nfts.setdefault(tx['Account'], []).append(nft)
+        meta['nftoken_id'] = nft_id
+        return 'tesSUCCESS'
+
+    def _apply_NFTokenBurn(self, tx, h, meta):
+        owner = tx.get('Owner', tx['Account'])
+        held = self.nfts.get(owner, [])
+        for nft in held:
+            if nft['NFTokenID'] == tx['NFTokenID']:
+                held.remove(nft)
+                return 'tesSUCCESS'
+        return 'tecNO_ENTRY'
+
+    def _apply_EscrowCreate(self, tx, h, meta):
+        amount = int(tx['Amount'])
+        account = self.accounts[tx['Account']]
+        if account['Balance'] < amount:
+            return 'tecUNFUNDED'
+        account['Balance'] -= amount
+        sequence = tx.get('TicketSequence') or tx['Sequence']
+        entry = {'LedgerEntryType': 'Escrow', 'Account': tx['Account'],
+                 'Destination': tx['Destination'], 'Amount': tx['Amount'], 'Flags': 0,
+                 'PreviousTxnID': h, 'index': _object_index('escrow', tx['Account'], sequence)}
+        for field in ('FinishAfter', 'CancelAfter', 'Condition'):
+            if field in tx:
+                entry[field] = tx[field]
+        self._add_object(entry, tx['Account'], tx['Destination'])
+        return 'tesSUCCESS'
+
+    def _escrow(self, tx):
+        return self.objects.get(_object_index('escrow', tx['Owner'], tx['OfferSequence']))
+
+    def _apply_EscrowFinish(self, tx, h, meta):
+        escrow = self._escrow(tx)
+        if escrow is None:
+            return 'tecNO_TARGET'
+        if 'FinishAfter' in escrow and self.ripple_time() <= escrow['FinishAfter']:
+            return 'tecNO_PERMISSION'
+        if 'CancelAfter' in escrow and self.ripple_time() > escrow['CancelAfter']:
+            return 'tecNO_PERMISSION'
+        if 'Condition' in escrow and tx.get('Condition') != escrow['Condition']:
+            return 'tecCRYPTOCONDITION_ERROR'
+        self._remove_object(escrow['index'])
+        destination = escrow['Destination']
+        (self._account(destination) or self.fund(destination, 0))['Balance'] += int(escrow['Amount'])
+        return 'tesSUCCESS'
+
+    def _apply_EscrowCancel(self, tx, h, meta):
+        escrow = self._escrow(tx)
+        if escrow is None:
+            return 'tecNO_TARGET'
+        if 'CancelAfter' not in escrow or self.ripple_time() <= escrow['CancelAfter']:
+            return 'tecNO_PERMISSION'
+        self._remove_object(escrow['index'])
+        self.accounts[escrow['Account']]['Balance'] += int(escrow['Amount'])
+        return 'tesSUCCESS'
+
+    def _apply_CredentialCreate(self, tx, h, meta):
+        index = _object_index('credential', tx['Subject'], tx['Account'], tx['CredentialType'])
+        if index in self.objects:
+            return 'tecDUPLICATE'
+        entry = {'LedgerEntryType': 'Credential', 'Issuer': tx['Account'],
+                 'Subject': tx['Subject'], 'CredentialType': tx['CredentialType'],
+                 'Flags': 0, 'PreviousTxnID': h, 'index': index}
+        for field in ('URI', 'Expiration'):
+            if field in tx:
+                entry[field] = tx[field]
+        self._add_object(entry, tx['Account'], tx['Subject'])
+        return 'tesSUCCESS'
+
+    def _credential(self, subject, issuer, credential_type):
+        return self.objects.get(_object_index('credential', subject, issuer, credential_type))
+
+    def _apply_CredentialAccept(self, tx, h, meta):
+        credential = self._credential(tx['Account'], tx['Issuer'], tx['CredentialType'])
+        if credential is None:
+            return 'tecNO_ENTRY'
+        if credential['Flags'] & 0x00010000:
+            return 'tecDUPLICATE'
+        credential['Flags'] |= 0x00010000  # lsfAccepted
+        credential['PreviousTxnID'] = h
+        return 'tesSUCCESS'
+
+    def _apply_CredentialDelete(self, tx, h, meta):
+        credential = self._credential(tx.get('Subject', tx['Account']), tx.get('Issuer', tx['Account']),
+                                      tx['CredentialType'])
+        if credential is None:
+            return 'tecNO_ENTRY'
+        self._remove_object(credential['index'])
+        return 'tesSUCCESS'
+
+    def _apply_AccountSet(self, tx, h, meta):
+        if tx.get('SetFlag') == 8:
+            self.accounts[tx['Account']]['Flags'] |= 0x00800000  # lsfDefaultRipple
+        if tx.get('ClearFlag') == 8:
+            self.accounts[tx['Account']]['Flags'] &= ~0x00800000
+        return 'tesSUCCESS'
+
+
+def _error(code, message, **extra):
+    return dict(extra, error=code, error_message=message, status='error')
+
+
+def _submit_result(code, tx, h, blob, accepted):
+    return {
+        'engine_result': code,
+        'engine_result_code': 0 if code == 'tesSUCCESS' else -1,
+        'engine_result_message': code,
+        'accepted': accepted,
+        'applied': accepted,
+        'tx_blob': blob,
+        'tx_json': dict(tx, hash=h),
+    }
+
+
+def _fmt(value):
+    return f'{value:.15g}'
+
+
+def _neg(value):
+    return _fmt(-float(value)) if float(value) else '0'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        payload = json.loads(body)
+        params = (payload.get('params') or [{}])[0]
+        result = self.server.ledger.handle(payload['method'], params)
+        data = json.dumps({'result': result}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeRippled:
+    """Run a FakeLedger behind a local HTTP JSON-RPC endpoint on a background thread."""
+
+    def __init__(self, host='127.0.0.1', port=0, ledger=None, websocket=False, **ledger_options):
+        self.ledger = ledger or FakeLedger(**ledger_options)
+        self._server = _Server((host, port), _Handler)
+        self._server.ledger = self.ledger
+        self._server.connections = 0
+        self._thread = None
+        self._ws_server = serve_websocket(self._serve_websocket, host, 0) if websocket else None
+        self._subscribers = {}  # connection -> ledger index its subscribe reply reported
+        self._running = threading.Event()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    @property
+    def ws_url(self):
+        host, port = self._ws_server.socket.getsockname()[:2]
+        return f'ws://{host}:{port}/'
+
+    @property
+    def connections(self):
+        """TCP connections accepted so far."""
+        return self._server.connections
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        if self._ws_server is not None:
+            self._running.set()
+            threading.Thread(target=self._ws_server.serve_forever, daemon=True).start()
+            threading.Thread(target=self._publish_ledgers, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._ws_server is not None:
+            self._running.clear()
+            self._ws_server.shutdown()
+
+    # -- websocket -----------------------------------------------------------
+
+    def _serve_websocket(self, connection):
+        try:
+            for raw in connection:
+                params = json.loads(raw)
+                command, request_id = params.pop('command', None), params.pop('id', None)
+                if command in ('subscribe', 'unsubscribe'):
+                    result = {'ledger_index': self.ledger.validated_index, 'status': 'success'}
+                    if command == 'unsubscribe':
+                        self._subscribers.pop(connection, None)
+                    elif 'ledger' in (params.get('streams') or ()):
+                        self._subscribers[connection] = result['ledger_index']
+                else:
+                    result = self.ledger.handle(command, params)
+                reply = {'id': request_id, 'type': 'response', 'status': result.get('status')}
+                if reply['status'] == 'error':
+                    reply.update(result, request=dict(params, command=command))
+                else:
+                    reply['result'] = result
+                connection.send(json.dumps(reply))
+        except ConnectionClosed:
+            pass
+        finally:
+            self._subscribers.pop(connection, None)
+
+    def _publish_ledgers(self):
+        """Send ``ledgerClosed`` to ``ledger`` stream subscribers as ledgers close."""
+        published = self.ledger.validated_index
+        interval = min(self.ledger.close_interval or 0.05, 0.05)
+        while self._running.wait(interval) and self._running.is_set():
+            validated = self.ledger.validated_index
+            for index in range(published + 1, validated + 1):
+                message = json.dumps({
+                    'type': 'ledgerClosed', 'ledger_index': index,
+                    'ledger_hash': _object_index('ledger', index), 'ledger_time': self.ledger.ripple_time(),
+                    'txn_count': len(self.ledger.ledger_txs.get(index, ())), 'fee_base': 10,
+                    'reserve_base': 1_000_000, 'reserve_inc': 200_000,
+                    'validated_ledgers': f'{GENESIS_LEDGER}-{index}',
+                })
+                for connection, since in list(self._subscribers.items()):
+                    if index <= since:
+                        continue
+                    try:
+                        connection.send(message)
+                    except ConnectionClosed:
+                        self._subscribers.pop(connection, None)
+            published = max(published, validated)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+
+def serve_in_process(ready, port=0, **ledger_options):
+    """Process target: run a FakeRippled and report its url through ``ready``."""
+    rippled = FakeRippled(port=port, **ledger_options)
+    ready.put(rippled.url)
+    rippled._server.serve_forever()
+
+
+def spawn(**ledger_options):
+    """Run a FakeRippled in a child process so it does not share our GIL.
+
+    Returns ``(process, url)``; terminate the process when done.
+    """
+    import multiprocessing
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve_in_process, args=(ready,),
+                                      kwargs=ledger_options, daemon=True)
+    process.start()
+    return process, ready.get(timeout=30)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Run a fake rippled JSON-RPC server.')
+    parser.add_argument('--port', type=int, default=5005)
+    parser.add_argument('--close-interval', type=float, default=1.0)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    rippled = FakeRippled(port=args.port, close_interval=args.close_interval, latency=args.latency)
+    print(f'fake rippled listening on {rippled.url}')
+    rippled._server.serve_forever()
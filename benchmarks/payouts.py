@@ -0,0 +1,84 @@
+"""Time a pro-rata XRP payout to N investors against the mock rippled.
+
+Plans the payout over N stored investments, then runs it in ticketed
+waves from one farmer wallet and checks that every investor received
+exactly their share.
+
+    python -m benchmarks.payouts --investors 3000 --close-interval 1.0
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from xrpl.core.keypairs import derive_classic_address
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool
+from mods.indexes import IndexedStorage
+from mods.payouts import PayoutEngine
+from mods.storage import empty_data, open_storage
+
+
+def _seed(storage, farmer, investors):
+    data = empty_data()
+    data['campaigns'] = [{'id': 1, 'farmer_address': farmer, 'status': 'funded', 'token_currency': 'CRP',
+                          'funding_goal': investors * 100}]
+    data['investments'] = [{'id': n, 'campaign_id': 1, 'amount': 10 + n % 90,
+                            'investor_address': derive_classic_address('ED' + f'{n:064X}')}
+                           for n in range(1, investors + 1)]
+    data['next_campaign_id'], data['next_investment_id'] = 2, investors + 1
+    storage.save_data(data)
+
+
+def run(investors=3000, close_interval=1.0, latency=0.0, window=32):
+    directory = tempfile.mkdtemp(prefix='agrivest-payouts-')
+    storage = IndexedStorage(open_storage(f"sqlite:{os.path.join(directory, 'storage.db')}"))
+    with FakeRippled(close_interval=close_interval, latency=latency) as rippled:
+        farmer = Wallet.create()
+        rippled.ledger.fund(farmer.address, 10 ** 15)
+        _seed(storage, farmer.address, investors)
+        engine = PayoutEngine(storage, url=rippled.url, window=window, poll_interval=close_interval / 4)
+
+        started = time.perf_counter()
+        payout = engine.plan(1, investors * 5)
+        planned = time.perf_counter() - started
+        first_ledger = rippled.ledger.validated_index
+        started = time.perf_counter()
+        payout = engine.run(payout['id'], farmer.seed)
+        elapsed = time.perf_counter() - started
+
+        transfers = storage.find('payout_transfers', payout_id=payout['id'])
+        received = sum(rippled.ledger.accounts[t['investor_address']]['Balance']
+                       - rippled.ledger.starting_balance for t in transfers)
+        result = {
+            'investors': investors,
+            'status': payout['status'],
+            'counts': payout['counts'],
+            'paid_once': received == sum(t['units'] for t in transfers if t['status'] == 'validated'),
+            'plan_seconds': round(planned, 3),
+            'run_seconds': round(elapsed, 2),
+            'payments_per_second': round(investors / elapsed, 1),
+            'ledgers': rippled.ledger.validated_index - first_ledger,
+            'requests': dict(rippled.ledger.request_counts),
+        }
+    client_pool.close_clients()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--investors', type=int, default=3000)
+    parser.add_argument('--close-interval', type=float, default=1.0)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--window', type=int, default=32)
+    args = parser.parse_args()
+    print(json.dumps(run(args.investors, args.close_interval, args.latency, args.window), indent=2))
+
+
+if __name__ == '__main__':
+    main()
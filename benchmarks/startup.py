@@ -0,0 +1,76 @@
+"""Cold-start time of one-shot CLI commands and the API module, in fresh interpreters.
+
+Each command runs ``--runs`` times in a new Python process against a
+temporary SQLite store with ``--campaigns`` campaigns; the median and
+best wall times are reported. ``import xrpl`` is included as the cost the
+lazy imports avoid for commands that do not touch the ledger.
+
+    python -m benchmarks.startup --runs 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+from mods.storage import SQLiteStorage, empty_data
+
+COMMANDS = {
+    'python': ['-c', 'pass'],
+    'import xrpl': ['-c', 'import xrpl'],
+    'cli: start and exit': ['src/main.py'],
+    'cli: list campaigns': ['src/main.py'],
+    'api: import': ['-c', 'import api_server'],
+}
+STDIN = {'cli: list campaigns': '2\n'}
+
+
+def _seed(path, campaigns):
+    data = empty_data()
+    data['campaigns'] = [{'id': n, 'farmer_name': f'Farmer {n}', 'project_title': 'Startup',
+                          'description': '', 'funding_goal': 1000, 'farmer_address': f'r{n}',
+                          'token_currency': 'STA', 'status': 'approved',
+                          'created_at': f'2025-01-01T00:{n // 60 % 60:02d}:{n % 60:02d}'}
+                         for n in range(1, campaigns + 1)]
+    data['next_campaign_id'] = campaigns + 1
+    storage = SQLiteStorage(path)
+    storage.save_data(data)
+    storage.close()
+
+
+def _time(args, stdin, env):
+    started = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=ROOT, env=env, input=stdin, text=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - started
+
+
+def run(runs=7, campaigns=200):
+    directory = tempfile.mkdtemp(prefix='agrivest-startup-')
+    path = os.path.join(directory, 'storage.db')
+    _seed(path, campaigns)
+    env = dict(os.environ, AGRIVEST_STORAGE=f'sqlite:{path}')
+    results = {}
+    for name, args in COMMANDS.items():
+        _time(args, STDIN.get(name, ''), env)  # warm the OS file cache
+        times = [_time(args, STDIN.get(name, ''), env) for _ in range(runs)]
+        results[name] = {'median_ms': round(statistics.median(times) * 1000, 1),
+                         'best_ms': round(min(times) * 1000, 1)}
+    return {'runs': runs, 'campaigns': campaigns, 'commands': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--campaigns', type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.runs, args.campaigns), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Stress test for concurrent storage writers.
+
+Runs N worker processes that each create campaigns and record investments
+against the same storage, then checks that no id was handed out twice and
+no record was lost.
+
+    python -m benchmarks.storage_stress --backend sqlite --writers 8 --per-writer 200
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from mods.storage import open_storage
+
+
+def _writer(url, worker, count):
+    storage = open_storage(url)
+    ids = []
+    for n in range(count):
+        campaign = storage.insert('campaigns', {'farmer_name': f'worker-{worker}', 'seq': n,
+                                                'status': 'pending'})
+        storage.update('campaigns', campaign['id'], {'status': 'approved'})
+        storage.insert('investments', {'campaign_id': campaign['id'], 'amount': 1})
+        ids.append(campaign['id'])
+    storage.close()
+    return ids
+
+
+def run(backend='sqlite', writers=8, per_writer=200, directory=None):
+    """Run the stress test and return a result dict (raises on lost writes)."""
+    directory = directory or tempfile.mkdtemp(prefix='agrivest-stress-')
+    filename = 'storage.json' if backend == 'json' else 'storage.db'
+    url = f"{backend}:{os.path.join(directory, filename)}"
+    open_storage(url).close()
+
+    started = time.perf_counter()
+    with multiprocessing.Pool(writers) as pool:
+        handed_out = pool.starmap(_writer, [(url, w, per_writer) for w in range(writers)])
+    elapsed = time.perf_counter() - started
+
+    storage = open_storage(url)
+    campaigns = storage.all('campaigns')
+    investments = storage.all('investments')
+    expected = writers * per_writer
+    all_ids = [i for ids in handed_out for i in ids]
+    problems = []
+    if len(set(all_ids)) != len(all_ids):
+        problems.append('duplicate campaign ids handed out')
+    if len(campaigns) != expected or len(investments) != expected:
+        problems.append(f'expected {expected} campaigns/investments, '
+                        f'found {len(campaigns)}/{len(investments)}')
+    if any(c['status'] != 'approved' for c in campaigns):
+        problems.append('lost status update')
+    if sorted(c['id'] for c in campaigns) != list(range(1, expected + 1)):
+        problems.append('campaign ids are not contiguous')
+    if problems:
+        raise AssertionError('; '.join(problems))
+    writes = expected * 3
+    return {
+        'backend': backend,
+        'writers': writers,
+        'records': expected,
+        'seconds': round(elapsed, 3),
+        'writes_per_second': round(writes / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=['sqlite', 'json'], default='sqlite')
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--per-writer', type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.backend, args.writers, args.per_writer)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""Offline benchmark suite: platform flows and API endpoints against the mock rippled.
+
+Every scenario runs against its own in-process FakeRippled (JSON-RPC and
+WebSocket) with a fixed ledger close interval and injected latency, fixed
+wallets and a fresh SQLite store, so two runs of one commit do the same
+work. The result is one JSON document - per scenario: operations,
+successes, throughput, latency percentiles and the RPC calls it made -
+that ``--compare`` checks against the document from an earlier commit.
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --compare before.json --threshold 0.15
+
+Polling loops (mods/sequences, mods/ticket_batch) are scaled to a quarter
+of the close interval, as they are to a 3.5 s ledger in production.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform as python_platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import httpx
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.models.requests import AccountInfo
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, sequences, ticket_batch
+
+SCENARIOS = ('invest', 'batch_mint', 'microloan', 'api', 'websocket')
+
+
+def _wallet(n):
+    """The n-th fixed benchmark wallet."""
+    return Wallet.from_entropy(f'{n:032x}')
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))] if values else 0.0
+
+
+def _stats(latencies, seconds, ok, ops=None, requests=None):
+    ops = len(latencies) if ops is None else ops
+    result = {
+        'ops': ops,
+        'ok': ok,
+        'seconds': round(seconds, 3),
+        'ops_per_second': round(ops / seconds, 2) if seconds else 0.0,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 2),
+    }
+    if requests is not None:
+        result['rpc'] = dict(sorted(requests.items()))
+    return result
+
+
+def _timed(fn, args_list):
+    latencies, results = [], []
+    started = time.perf_counter()
+    for args in args_list:
+        op_started = time.perf_counter()
+        results.append(fn(*args))
+        latencies.append(time.perf_counter() - op_started)
+    return latencies, time.perf_counter() - started, results
+
+
+@contextlib.contextmanager
+def _ledger(options, websocket=False):
+    """A fresh mock rippled that every helper talks to."""
+    with FakeRippled(websocket=websocket, **options) as rippled:
+        os.environ['XRPL_RPC_URL'] = rippled.url
+        try:
+            yield rippled
+        finally:
+            client_pool.close_clients()
+
+
+def _platform(directory, name):
+    from src.crowdfunding_platform import CrowdfundingPlatform
+    return CrowdfundingPlatform(f"sqlite:{os.path.join(directory, name + '.db')}")
+
+
+def _seed_campaign(storage, farmer, n=0):
+    return storage.insert('campaigns', {
+        'farmer_name': f'Farmer {n}', 'project_title': 'Benchmark', 'description': '',
+        'funding_goal': 100_000, 'farmer_address': farmer.address,
+        'farmer_wallet_seed': farmer.seed, 'token_currency': 'BEN',
+        'status': 'approved', 'created_at': f'2025-01-01T00:00:{n % 60:02d}',
+    })
+
+
+def bench_invest(options, directory, count):
+    with _ledger(options) as rippled:
+        platform = _platform(directory, 'invest')
+        campaign = _seed_campaign(platform.storage, _wallet(1))
+        investors = [(campaign['id'], _wallet(100 + n).seed, 5) for n in range(count)]
+        latencies, seconds, results = _timed(platform.invest_in_campaign, investors)
+        platform.storage.close()
+        return _stats(latencies, seconds, sum(r is not None for r in results),
+                      requests=rippled.ledger.request_counts)
+
+
+def bench_batch_mint(options, directory, count):
+    from mods.nft_batch import batch_mint
+    with _ledger(options) as rippled:
+        latencies, seconds, results = _timed(batch_mint, [(_wallet(2).seed, 'ipfs://benchmark', 8, 0, 0, count)])
+        minted = int(results[0].splitlines()[-1].split()[0]) if 'NFTs generated' in results[0] else 0
+        return _stats([seconds / count] * count, seconds, minted, requests=rippled.ledger.request_counts)
+
+
+def bench_microloan(options, directory, count):
+    with _ledger(options) as rippled:
+        platform = _platform(directory, 'microloan')
+        loans = [(_wallet(3).address, _wallet(200 + n).seed, 10, 30) for n in range(count)]
+        latencies, seconds, results = _timed(platform.create_microloan, loans)
+        platform.storage.close()
+        return _stats(latencies, seconds, sum(r is not None for r in results),
+                      requests=rippled.ledger.request_counts)
+
+
+def bench_api(options, directory, count):
+    """Sequential requests per endpoint through the ASGI app; one result per endpoint."""
+    os.environ['AGRIVEST_STORAGE'] = f"sqlite:{os.path.join(directory, 'api.db')}"
+    import api_server
+    storage = api_server.platform.storage
+    investor = _wallet(300)
+    for n in range(200):
+        campaign = _seed_campaign(storage, _wallet(400 + n), n)
+        storage.insert('investments', {'campaign_id': campaign['id'], 'investor_address': investor.address,
+                                       'amount': 5, 'token_amount': 5, 'token_currency': 'BEN'})
+    endpoints = [
+        ('GET /campaigns', 'GET', '/campaigns?limit=20', None),
+        ('GET /campaigns/{id}/stats', 'GET', '/campaigns/1/stats', None),
+        ('GET /portfolio/{address}', 'GET', f'/portfolio/{investor.address}', None),
+        ('POST /balance', 'POST', '/balance', {'wallet_seed': investor.seed}),
+        ('POST /balances:batch', 'POST', '/balances:batch', {'addresses': [], 'campaign_id': 1}),
+        ('GET /metrics', 'GET', '/metrics', None),
+    ]
+
+    async def run_all():
+        results = {}
+        transport = httpx.ASGITransport(app=api_server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://api') as http:
+            for name, method, path, body in endpoints:
+                latencies, ok = [], 0
+                started = time.perf_counter()
+                for _ in range(count):
+                    op_started = time.perf_counter()
+                    response = await http.request(method, path, json=body)
+                    latencies.append(time.perf_counter() - op_started)
+                    ok += response.is_success
+                results[f'api {name}'] = _stats(latencies, time.perf_counter() - started, ok)
+        await client_pool.close_async_clients()
+        return results
+
+    with _ledger(options):
+        return asyncio.run(run_all())
+
+
+def bench_websocket(options, directory, count):
+    """account_info over one WebSocket connection, up to 32 requests in flight."""
+    addresses = [_wallet(500 + n).address for n in range(50)]
+
+    async def run_all(url):
+        limit = asyncio.Semaphore(32)
+        latencies = []
+        async with AsyncWebsocketClient(url) as client:
+            async def one(n):
+                async with limit:
+                    started = time.perf_counter()
+                    response = await client.request(AccountInfo(account=addresses[n % 50]))
+                    latencies.append(time.perf_counter() - started)
+                    return response.is_successful()
+
+            started = time.perf_counter()
+            ok = sum(await asyncio.gather(*(one(n) for n in range(count))))
+            return latencies, time.perf_counter() - started, ok
+
+    with _ledger(options, websocket=True) as rippled:
+        latencies, seconds, ok = asyncio.run(run_all(rippled.ws_url))
+        return _stats(latencies, seconds, ok, requests=rippled.ledger.request_counts)
+
+
+def run(scenarios=SCENARIOS, close_interval=0.25, latency=0.0, invest=10, mints=100, microloans=20,
+        api_requests=200, ws_requests=1000):
+    options = {'close_interval': close_interval, 'latency': latency}
+    sizes = {'invest': invest, 'batch_mint': mints, 'microloan': microloans, 'api': api_requests,
+             'websocket': ws_requests}
+    benches = {'invest': bench_invest, 'batch_mint': bench_batch_mint, 'microloan': bench_microloan,
+               'api': bench_api, 'websocket': bench_websocket}
+    saved = sequences.POLL_INTERVAL, ticket_batch.POLL_INTERVAL
+    sequences.POLL_INTERVAL = ticket_batch.POLL_INTERVAL = close_interval / 4
+    directory = tempfile.mkdtemp(prefix='agrivest-suite-')
+    results = {}
+    try:
+        for name in scenarios:
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = benches[name](options, directory, sizes[name])
+            results.update(result if name == 'api' else {name: result})
+    finally:
+        sequences.POLL_INTERVAL, ticket_batch.POLL_INTERVAL = saved
+    return {
+        'commit': _commit(),
+        'python': python_platform.python_version(),
+        'close_interval': close_interval,
+        'latency': latency,
+        'sizes': {name: sizes[name] for name in scenarios},
+        'scenarios': results,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(baseline, current, threshold=0.1):
+    """``(rows, regressed)``: throughput of every scenario in both runs, and the ones that fell by > threshold."""
+    rows, regressed = [], []
+    for name, now in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if not before or not before['ops_per_second']:
+            continue
+        change = now['ops_per_second'] / before['ops_per_second'] - 1
+        rows.append((name, before['ops_per_second'], now['ops_per_second'], change))
+        if change < -threshold or now['ok'] < before['ok']:
+            regressed.append(name)
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--close-interval', type=float, default=0.25)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every RPC')
+    parser.add_argument('--invest', type=int, default=10)
+    parser.add_argument('--mints', type=int, default=100)
+    parser.add_argument('--microloans', type=int, default=20)
+    parser.add_argument('--api-requests', type=int, default=200)
+    parser.add_argument('--ws-requests', type=int, default=1000)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='results JSON of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='fail on a throughput drop larger than this fraction')
+    args = parser.parse_args()
+    results = run(args.scenarios.split(','), args.close_interval, args.latency, args.invest, args.mints,
+                  args.microloans, args.api_requests, args.ws_requests)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, regressed = compare(baseline, results, args.threshold)
+        print(f"\n{'scenario':<32} {baseline.get('commit') or 'before':>10} {results['commit'] or 'now':>10}   change")
+        for name, before, now, change in rows:
+            flag = '  REGRESSED' if name in regressed else ''
+            print(f'{name:<32} {before:>10} {now:>10} {change:>+8.1%}{flag}')
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
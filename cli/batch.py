@@ -0,0 +1,286 @@
+"""Non-interactive bulk commands: ``python src/main.py <command> rows.csv``.
+
+Each command reads rows from a CSV file (header line) or JSONL file (one
+object per line; ``-`` reads JSONL from stdin), runs up to
+``--concurrency`` rows at once and prints one JSON result per row as it
+finishes: ``{"row": n, "status": "ok" | "error", "result" | "error": ...}``.
+Platform messages go to stderr, so stdout stays machine-readable.
+
+With ``--checkpoint FILE`` every finished row (and, for ledger commands,
+every signed transaction or queued job) is appended to FILE. Running the
+same command again with the same checkpoint skips the rows that finished
+and settles the ones that were in flight: an investment job is resumed
+instead of queued again, a campaign is found by a key derived from its row
+rather than created twice, and a signed mint or credential is looked up and
+re-sent as the same blob rather than signed twice. Rows that failed are
+tried again, except that a row whose job or transaction already reached
+the ledger reports its recorded outcome instead of paying or minting a
+second time.
+
+Commands and their fields (optional ones in brackets):
+
+    create-campaign   farmer_name, project_title, funding_goal, farmer_address, [description]
+    approve-campaign  campaign_id
+    invest            campaign_id, investor_seed, amount
+    issue-credential  issuer_seed, farmer_address, credential_type, [uri], [expiration]
+    mint              seed, uri, [taxon], [flags]
+"""
+import asyncio
+import contextlib
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+
+from mods.lazy import lazy_import
+
+async_xrpl = lazy_import('mods.async_xrpl')
+
+# command -> ({field: type}, {optional field: type})
+FIELDS = {
+    'create-campaign': ({'farmer_name': str, 'project_title': str, 'funding_goal': int,
+                         'farmer_address': str}, {'description': str}),
+    'approve-campaign': ({'campaign_id': int}, {}),
+    'invest': ({'campaign_id': int, 'investor_seed': str, 'amount': int}, {}),
+    'issue-credential': ({'issuer_seed': str, 'farmer_address': str, 'credential_type': str},
+                         {'uri': str, 'expiration': str}),
+    'mint': ({'seed': str, 'uri': str}, {'taxon': int, 'flags': int}),
+}
+
+
+class RowError(Exception):
+    """A row that cannot be run (bad input or a rejected operation)."""
+
+
+def read_rows(path, fmt=None):
+    """The rows of a CSV or JSONL file as dicts (``-`` is JSONL on stdin)."""
+    if fmt is None:
+        fmt = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+    with contextlib.nullcontext(sys.stdin) if path == '-' else open(path, newline='') as f:
+        if fmt == 'csv':
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def parse_row(command, row):
+    required, optional = FIELDS[command]
+    missing = [name for name in required if row.get(name) in (None, '')]
+    if missing:
+        raise RowError(f"missing {', '.join(missing)}")
+    try:
+        fields = {name: kind(row[name]) for name, kind in required.items()}
+        fields.update({name: kind(row[name]) for name, kind in optional.items()
+                       if row.get(name) not in (None, '')})
+    except ValueError as e:
+        raise RowError(str(e))
+    return fields
+
+
+def digest(row):
+    return hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+class Checkpoint:
+    """Append-only JSONL of finished rows and of in-flight state (``status: "started"``)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done, self.state = {}, {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry['status'] == 'started':
+                        self.state.setdefault(entry['row'], {}).update(entry)
+                    elif entry['status'] == 'ok':
+                        self.done[entry['row']] = entry['digest']
+        self._file = open(path, 'a') if path else None
+
+    def check(self, number, row_digest):
+        """Whether row ``number`` finished before; raises if the input changed since."""
+        for known in (self.done.get(number), self.state.get(number, {}).get('digest')):
+            if known is not None and known != row_digest:
+                raise ValueError(f"Row {number} differs from the checkpointed run; use a new checkpoint")
+        return number in self.done
+
+    def write(self, entry):
+        if self._file is not None:
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+# -- row handlers: (platform, fields, state, note) -> result dict -------------------
+
+async def _create_campaign(platform, fields, state, note):
+    # keyed by the row, so a crash between the insert and the checkpoint line
+    # finds the campaign on the next run instead of creating it again
+    campaign_id = await asyncio.to_thread(
+        platform.create_campaign, fields['farmer_name'], fields['project_title'], fields.get('description', ''),
+        fields['funding_goal'], fields['farmer_address'], key=f"batch:{digest(fields)}")
+    return {'campaign_id': campaign_id}
+
+
+async def _approve_campaign(platform, fields, state, note):
+    campaign, error = await asyncio.to_thread(platform.approver.approve, fields['campaign_id'])
+    if campaign is None or campaign['status'] != 'approved':  # approved before counts as done
+        raise RowError(error or "Campaign not approved")
+    return {'campaign_id': campaign['id'], 'token_currency': campaign['token_currency']}
+
+
+async def _invest(platform, fields, state, note):
+    worker = platform.investment_worker
+    job_id = state.get('job_id')
+    if job_id is None:
+        job = worker.enqueue(fields['campaign_id'], fields['investor_seed'], fields['amount'], schedule=False)
+        if job is None:
+            raise RowError("Campaign not found or not approved")
+        job_id = job['id']
+        note(job_id=job_id)
+    else:
+        worker.provide_seed(job_id, fields['investor_seed'])  # seeds are never stored with the job
+    job = worker.status(job_id)
+    if job['status'] not in ('completed', 'failed'):
+        job = await worker.run_job(job_id)
+        if job is None:
+            raise RowError(f"Investment job {job_id} is held by another worker; run again later")
+    if job['status'] != 'completed':
+        raise RowError(job['error'] or 'Investment failed')
+    investment = platform.storage.get('investments', job['investment_id'])
+    return {'job_id': job_id, 'investment_id': investment['id'], 'token_amount': investment['token_amount'],
+            'token_currency': investment['token_currency']}
+
+
+async def _settle(state):
+    """Result of a transaction signed by an earlier run, or None if it expired unapplied."""
+    status, result = await async_xrpl.check_submitted(state['hash'], state['last_ledger_sequence'])
+    if status == 'expired':
+        return None
+    if status == 'pending':
+        result = (await async_xrpl.resubmit(state['tx_blob'])).result
+    return result
+
+
+def _track(note):
+    return lambda signed: note(hash=signed.get_hash(), tx_blob=signed.blob(),
+                               last_ledger_sequence=signed.last_ledger_sequence)
+
+
+async def _issue_credential(platform, fields, state, note):
+    result = await _settle(state) if 'hash' in state else None
+    if result is None:
+        result = await async_xrpl.issue_crop_credential(
+            fields['issuer_seed'], fields['farmer_address'], fields['credential_type'], fields.get('uri'),
+            fields.get('expiration'), on_signed=_track(note))
+    code = result['meta']['TransactionResult']
+    if code != 'tesSUCCESS':
+        raise RowError(code)
+    return {'hash': result.get('hash'), 'result': code}
+
+
+async def _mint(platform, fields, state, note):
+    result = await _settle(state) if 'hash' in state else None
+    if result is not None:
+        nft_id, code = result['meta'].get('nftoken_id'), result['meta']['TransactionResult']
+    else:
+        nft_id, code = await async_xrpl.mint_nft(fields['seed'], fields['uri'], fields.get('taxon', 0),
+                                                 fields.get('flags', 8), on_signed=_track(note))
+    if code != 'tesSUCCESS':
+        raise RowError(code)
+    return {'nft_id': nft_id, 'result': code}
+
+
+HANDLERS = {
+    'create-campaign': _create_campaign,
+    'approve-campaign': _approve_campaign,
+    'invest': _invest,
+    'issue-credential': _issue_credential,
+    'mint': _mint,
+}
+
+
+async def run_batch(platform, command, rows, concurrency=8, checkpoint=None, out=None):
+    """Run ``rows`` through ``command``; writes a JSON line per row to ``out`` and returns a summary."""
+    out = out or sys.stdout
+    checkpoint = checkpoint or Checkpoint(None)
+    handler = HANDLERS[command]
+    todo = []
+    for number, row in enumerate(rows, 1):
+        row_digest = digest(row)
+        if not checkpoint.check(number, row_digest):
+            todo.append((number, row, row_digest))
+    counts = {'ok': 0, 'error': 0}
+
+    async def one(number, row, row_digest):
+        def note(**fields):
+            state.update(fields)
+            checkpoint.write(dict(fields, row=number, digest=row_digest, status='started'))
+
+        state = dict(checkpoint.state.get(number, {}))
+        entry = {'row': number}
+        try:
+            entry['result'] = await handler(platform, parse_row(command, row), state, note)
+            entry['status'] = 'ok'
+        except Exception as e:  # one bad row must not stop the batch
+            entry.update(status='error', error=str(e) or type(e).__name__)
+        counts[entry['status']] += 1
+        checkpoint.write(dict(entry, digest=row_digest))
+        out.write(json.dumps(entry) + '\n')
+        out.flush()
+
+    async def worker(queue):
+        while queue:
+            await one(*queue.pop())
+
+    queue = todo[::-1]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(queue) for _ in range(max(1, concurrency))))
+    seconds = time.perf_counter() - started
+    return {'command': command, 'rows': len(rows), 'skipped': len(rows) - len(todo), **counts,
+            'seconds': round(seconds, 3), 'rows_per_second': round(len(todo) / seconds, 1) if seconds else 0.0}
+
+
+def add_commands(subparsers):
+    for command in FIELDS:
+        parser = subparsers.add_parser(command, help=f"{command} for every row of a CSV/JSONL file")
+        parser.add_argument('input', help="CSV or JSONL file, or - for JSONL on stdin")
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help="default: from the file extension")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--checkpoint', help="JSONL file to resume from and append progress to")
+        parser.add_argument('--output', help="write result lines here instead of stdout")
+        parser.add_argument('--storage', help="storage url, e.g. sqlite:storage.db")
+
+
+def main(args):
+    from src.crowdfunding_platform import CrowdfundingPlatform
+    rows = read_rows(args.input, args.format)
+    checkpoint = Checkpoint(args.checkpoint)
+    out = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            platform = CrowdfundingPlatform(args.storage)
+            summary = asyncio.run(_run(platform, args, rows, checkpoint, out))
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    finally:
+        checkpoint.close()
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if summary['error'] else 0
+
+
+async def _run(platform, args, rows, checkpoint, out):
+    try:
+        return await run_batch(platform, args.command, rows, args.concurrency, checkpoint, out)
+    finally:
+        if 'mods.client_pool' in sys.modules:
+            await sys.modules['mods.client_pool'].close_async_clients()
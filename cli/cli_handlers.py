@@ -1,14 +1,15 @@
 from src.crowdfunding_platform import CrowdfundingPlatform
-from mods.credential_utils import issue_crop_credential, lookup_credentials
-from mods.nft_batch import batch_mint
-from mods.wallet import get_iou_balances
-from mods.nft_utils import (
-    get_nfts_for_address,  
-    prepare_nft_transfer_tx, 
-    prepare_nft_burn_tx,
-)
+from mods import metrics
+from mods.lazy import lazy_import
 import json
 
+# loaded when a handler first needs them: the menu starts without xrpl
+credential_utils = lazy_import('mods.credential_utils')
+nft_batch = lazy_import('mods.nft_batch')
+nft_utils = lazy_import('mods.nft_utils')
+wallet_utils = lazy_import('mods.wallet')
+xrpl_utils = lazy_import('xrpl.utils')
+
 def display_menu():
     print("\n🌾 FARMER CROWDFUNDING PLATFORM 🌾")
     print("1. Create Campaign")
@@ -27,7 +28,9 @@ def display_menu():
     print("14. Batch Mint NFTs")
     print("15. Check IOU Balances")
     print ("16. Display Trustlines")
-    print("17. Exit")
+    print("17. Show Metrics Summary")
+    print("18. Approve All Pending Campaigns (Admin)")
+    print("19. Exit")
 
 def handle_create_campaign(platform):
     farmer_name = input("Farmer name: ")
@@ -64,46 +67,45 @@ def handle_cancel_escrow(platform):
     platform.provide_escrow_cancel_instructions(inv_id, canceller_address)
     print("\nPlease sign and submit the displayed unsigned transaction using your wallet.")
 
+def print_nfts(nfts):
+    hex_to_str = xrpl_utils.hex_to_str
+    for i, nft in enumerate(nfts):
+        print(f"{i+1}) ID: {nft['NFTokenID']} | URI: {hex_to_str(nft['URI'])}")
+
 def handle_view_nfts():
     address = input("XRPL address to view NFTs: ")
-    nfts = get_nfts_for_address(address)
+    nfts = nft_utils.get_nfts_for_address(address)
     if not nfts:
         print("No NFTs found.")
     else:
         print("Your NFTs:")
-        for i, nft in enumerate(nfts):
-            from xrpl.utils import hex_to_str
-            print(f"{i+1}) ID: {nft['NFTokenID']} | URI: {hex_to_str(nft['URI'])}")
+        print_nfts(nfts)
 
 def handle_transfer_nft():
     address = input("Your XRPL address: ")
-    nfts = get_nfts_for_address(address)
+    nfts = nft_utils.get_nfts_for_address(address)
     if not nfts:
         print("No NFTs found to transfer.")
         return
-    for i, nft in enumerate(nfts):
-        from xrpl.utils import hex_to_str
-        print(f"{i+1}) ID: {nft['NFTokenID']} | URI: {hex_to_str(nft['URI'])}")
+    print_nfts(nfts)
     idx = int(input("Select NFT number to transfer: ")) - 1
     dest = input("Destination XRPL address: ")
     nft_id = nfts[idx]['NFTokenID']
-    tx = prepare_nft_transfer_tx(address, dest, nft_id)
+    tx = nft_utils.prepare_nft_transfer_tx(address, dest, nft_id)
     print("\nUnsigned NFT transfer transaction:")
     print(json.dumps(tx, indent=2))
     print("Sign and submit this transaction with your wallet (e.g., XUMM, browser extension).")
 
 def handle_burn_nft():
     address = input("Your XRPL address: ")
-    nfts = get_nfts_for_address(address)
+    nfts = nft_utils.get_nfts_for_address(address)
     if not nfts:
         print("No NFTs found to burn.")
         return
-    for i, nft in enumerate(nfts):
-        from xrpl.utils import hex_to_str
-        print(f"{i+1}) ID: {nft['NFTokenID']} | URI: {hex_to_str(nft['URI'])}")
+    print_nfts(nfts)
     idx = int(input("Select NFT number to burn: ")) - 1
     nft_id = nfts[idx]['NFTokenID']
-    tx = prepare_nft_burn_tx(address, nft_id)
+    tx = nft_utils.prepare_nft_burn_tx(address, nft_id)
     print("\nUnsigned NFT burn transaction:")
     print(json.dumps(tx, indent=2))
     print("Sign and submit this transaction with your wallet (e.g., XUMM, browser extension).")
@@ -119,27 +121,26 @@ def handle_submit_crop_credential():
     expiration = input("Expiration datetime (YYYY-MM-DD or leave blank): ")
     if expiration.strip() == "":
         expiration = None
-    result = issue_crop_credential(issuer_seed, farmer_address, cred_type, uri, expiration)
+    result = credential_utils.issue_crop_credential(issuer_seed, farmer_address, cred_type, uri, expiration)
     print("Credential issued! TX result:")
     print(result)
 
 def handle_view_credentials():
     address = input("XRPL address to view credentials for: ")
-    creds = lookup_credentials(address, by="subject")
+    creds = credential_utils.lookup_credentials(address, by="subject")
     if not creds:
         print("No credentials found.")
         return
     print("Credentials found:")
+    hex_to_str = xrpl_utils.hex_to_str
     for c in creds:
-        from xrpl.utils import hex_to_str
         print(f"- Type: {hex_to_str(c['CredentialType'])}")
         if 'URI' in c:
             print(f"  URI: {hex_to_str(c['URI'])}")
         if 'Issuer' in c:
             print(f"  Issuer: {c['Issuer']}")
         if 'Expiration' in c:
-            from xrpl.utils import ripple_time_to_datetime
-            print(f"  Expiration: {ripple_time_to_datetime(c['Expiration'])}")
+            print(f"  Expiration: {xrpl_utils.ripple_time_to_datetime(c['Expiration'])}")
         print()
 
 def handle_invest_via_check():
@@ -163,12 +164,12 @@ def handle_batch_nft_mint():
     fee = input("Transfer fee (e.g., 0): ")
     taxon = input("NFT Taxon (category code, e.g., 0): ")
     count = input("How many NFTs?: ")
-    resp = batch_mint(seed, uri, flags, fee, taxon, count)
+    resp = nft_batch.batch_mint(seed, uri, flags, fee, taxon, count)
     print(resp)
 
 def handle_check_iou_balances():
     address = input("XRPL Address to check IOU balances: ")
-    ious = get_iou_balances(address)
+    ious = wallet_utils.get_iou_balances(address)
     if not ious:
         print("No IOU balances found.")
     else:
@@ -180,11 +181,25 @@ def handle_display_trustlines(platform):
     address = input("XRPL address to display trustlines: ").strip()
     platform.display_trustlines(address)
 
+def handle_metrics_summary():
+    rows = metrics.summary()
+    if not rows:
+        print("No timings recorded yet.")
+    else:
+        print(f"{'metric':<34} {'labels':<36} {'count':>7} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, labels, count, mean, p50, p95 in rows:
+            print(f"{name:<34} {labels:<36} {count:>7} {mean * 1000:>9.2f} {p50 * 1000:>8g} {p95 * 1000:>8g}")
+    for name, value in metrics.totals().items():
+        print(f"{name}: {value}")
+
 def cli_handle():
     platform = CrowdfundingPlatform()
     while True:
         display_menu()
-        choice = input("\nSelect option (1-17): ").strip()
+        try:
+            choice = input("\nSelect option (1-19): ").strip()
+        except EOFError:  # input piped in, e.g. `echo 2 | python src/main.py`
+            break
         if choice == "1":
             handle_create_campaign(platform)
         elif choice == "2":
@@ -218,6 +233,10 @@ def cli_handle():
         elif choice == "16":
             handle_display_trustlines(platform)
         elif choice == "17":
+            handle_metrics_summary()
+        elif choice == "18":
+            platform.approve_pending_campaigns()
+        elif choice == "19":
             print("👋 Goodbye!")
             break
         else:
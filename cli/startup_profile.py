@@ -0,0 +1,63 @@
+"""Where start-up time goes: ``python src/main.py --profile-startup [cli|api]``.
+
+Starts the entry point in a fresh interpreter with ``-X importtime`` and
+folds the per-module report into self time per top-level package, plus
+the slowest modules by cumulative time, so a new eager import shows up
+at once.
+"""
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# what each entry point does before it can serve its first command
+TARGETS = {
+    'cli': 'from cli.cli_handlers import CrowdfundingPlatform; CrowdfundingPlatform()',
+    'api': 'import api_server',
+}
+
+
+def parse_importtime(stderr):
+    """``[(module, self_us, cumulative_us)]`` from ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile_startup(target='cli', top=15):
+    started = time.perf_counter()
+    child = subprocess.run([sys.executable, '-X', 'importtime', '-c', TARGETS[target]],
+                           cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    rows = parse_importtime(child.stderr)
+    packages = Counter()
+    for name, self_us, _ in rows:
+        packages[name.split('.')[0]] += self_us
+    return {
+        'target': target,
+        'wall_seconds': round(wall, 3),
+        'import_seconds': round(sum(r[1] for r in rows) / 1e6, 3),
+        'modules': len(rows),
+        'packages': packages.most_common(top),
+        'slowest': sorted(((r[0], r[2]) for r in rows), key=lambda r: -r[1])[:top],
+        'xrpl_loaded': 'xrpl' in packages,
+    }
+
+
+def print_report(report):
+    print(f"Start-up of '{report['target']}': {report['wall_seconds']} s wall, "
+          f"{report['import_seconds']} s importing {report['modules']} modules"
+          f" (xrpl {'loaded' if report['xrpl_loaded'] else 'not loaded'})")
+    print("\nSelf time by package:")
+    for package, self_us in report['packages']:
+        print(f"  {package:<32} {self_us / 1000:>9.1f} ms")
+    print("\nSlowest imports (cumulative):")
+    for module, cumulative_us in report['slowest']:
+        print(f"  {module:<48} {cumulative_us / 1000:>9.1f} ms")
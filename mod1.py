@@ -1,9 +1,11 @@
 import xrpl
+from mods import sequences
+from mods.client_pool import get_client
 testnet_url = "https://s.devnet.rippletest.net:51234/"
 
 def get_account(seed):
     """get_account"""
-    client = xrpl.clients.JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     if (seed == ''):
         new_wallet = xrpl.wallet.generate_faucet_wallet(client)
     else:
@@ -12,7 +14,7 @@ def get_account(seed):
 
 def get_account_info(accountId):
     """get_account_info"""
-    client = xrpl.clients.JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     acct_info = xrpl.models.requests.account_info.AccountInfo(
         account=accountId,
         ledger_index="validated"
@@ -22,14 +24,14 @@ def get_account_info(accountId):
 
 def send_xrp(seed, amount, destination):
     sending_wallet = xrpl.wallet.Wallet.from_seed(seed)
-    client = xrpl.clients.JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     payment = xrpl.models.transactions.Payment(
         account=sending_wallet.address,
         amount=xrpl.utils.xrp_to_drops(int(amount)),
         destination=destination,
     )
     try:	
-        response = xrpl.transaction.submit_and_wait(payment, client, sending_wallet)	
+        response = sequences.submit_and_wait(payment, client, sending_wallet)	
     except xrpl.transaction.XRPLReliableSubmissionException as e:	
         response = f"Submit failed: {e}"
 
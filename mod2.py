@@ -1,6 +1,7 @@
 import xrpl
-from xrpl.clients import JsonRpcClient
 from xrpl.wallet import Wallet
+from mods import sequences
+from mods.client_pool import get_client
 
 testnet_url = "https://s.devnet.rippletest.net:51234"
 
@@ -12,7 +13,7 @@ def create_trust_line(seed, issuer, currency, amount):
     """create_trust_line"""
 # Get the client
     receiving_wallet = Wallet.from_seed(seed)
-    client = JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
 # Define the trust line transaction
     trustline_tx=xrpl.models.transactions.TrustSet(
         account=receiving_wallet.address,
@@ -23,7 +24,7 @@ def create_trust_line(seed, issuer, currency, amount):
         )
     )
 
-    response =  xrpl.transaction.submit_and_wait(trustline_tx,
+    response =  sequences.submit_and_wait(trustline_tx,
         client, receiving_wallet)
     return response.result
 
@@ -35,7 +36,7 @@ def send_currency(seed, destination, currency, amount):
     """send_currency"""
 # Get the client
     sending_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
 # Define the payment transaction.
     send_currency_tx=xrpl.models.transactions.Payment(
         account=sending_wallet.address,
@@ -46,7 +47,7 @@ def send_currency(seed, destination, currency, amount):
         ),
         destination=destination
     )
-    response=xrpl.transaction.submit_and_wait(send_currency_tx, client, sending_wallet)
+    response=sequences.submit_and_wait(send_currency_tx, client, sending_wallet)
     return response.result
 
 ###############
@@ -57,7 +58,7 @@ def get_balance(sb_account_seed, op_account_seed):
     """get_balance"""
     wallet = Wallet.from_seed(sb_account_seed)
     opWallet = Wallet.from_seed(op_account_seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     balance=xrpl.models.requests.GatewayBalances(
         account=wallet.address,
         ledger_index="validated"
@@ -73,7 +74,7 @@ def configure_account(seed, default_setting):
     """configure_account"""
 # Get the client
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
 # Create transaction
     if (default_setting):
         setting_tx=xrpl.models.transactions.AccountSet(
@@ -85,5 +86,5 @@ def configure_account(seed, default_setting):
             account=wallet.classic_address,
             clear_flag=xrpl.models.transactions.AccountSetAsfFlag.ASF_DEFAULT_RIPPLE
         )
-    response=xrpl.transaction.submit_and_wait(setting_tx,client,wallet)
+    response=sequences.submit_and_wait(setting_tx,client,wallet)
     return response.result    
@@ -0,0 +1,147 @@
+"""Campaign approval: the farmer's crop credential and a free token currency.
+
+A campaign is approved when
+
+* its farmer holds a valid (accepted, unexpired) credential of type
+  ``AGRIVEST_CREDENTIAL_TYPE`` from one of the oracles in
+  ``AGRIVEST_CREDENTIAL_ISSUERS`` (comma-separated addresses; with no
+  oracles configured the credential check is off), and
+* a token currency code is free for that farmer. Tokens on the XRP Ledger
+  are identified by (issuer, currency), so two campaigns of one farmer must
+  not share a code. The code comes from the project title ("Rice Farm" ->
+  "RIC"), and on a collision the first free variant ("RIA", "RIB", ...) is
+  used. Taken codes are looked up through the storage index on
+  ``token_currency``.
+
+``CampaignApprover.approve_pending`` runs this over every pending campaign
+at once. Each distinct farmer's credentials are read from the ledger once,
+several at a time, into the shared CredentialIndex (mods/credential_index).
+Farmers already read within ``max_age`` seconds cost nothing. Currency
+codes are then chosen and written in one storage transaction, which
+holds the write lock, so concurrent approvals cannot pick the same code.
+Each write expects the campaign to still be pending, so a campaign
+someone else approved meanwhile is left alone. Campaigns that fail stay
+pending with an ``approval_error`` and are tried again on the next run.
+"""
+import itertools
+import os
+import string
+import time
+
+from mods.credential_index import credential_index
+
+ALPHABET = string.ascii_uppercase + string.digits
+CREDENTIAL_MAX_AGE = 300.0
+
+
+def currency_candidates(title):
+    """Token currency codes for a project title, the preferred one first."""
+    letters = ''.join(ch for ch in title.upper() if ch.isascii() and ch.isalnum())
+    base = (letters + 'XXX')[:3]
+    seen = set()
+    for code in itertools.chain([base], (base[:2] + ch for ch in letters[3:] + ALPHABET),
+                                (base[0] + a + b for a in ALPHABET for b in ALPHABET)):
+        if code not in seen and code != 'XRP':  # XRP is not a valid issued-currency code
+            seen.add(code)
+            yield code
+
+
+class CampaignApprover:
+    """Checks and approves pending campaigns, one at a time or all at once."""
+
+    def __init__(self, storage, index=None, issuers=None, credential_type=None,
+                 max_age=CREDENTIAL_MAX_AGE):
+        self.storage = storage
+        self.index = index or credential_index
+        if issuers is None:
+            issuers = [a.strip() for a in os.environ.get('AGRIVEST_CREDENTIAL_ISSUERS', '').split(',')]
+        self.issuers = [a for a in issuers if a]
+        self.credential_type = credential_type or os.environ.get('AGRIVEST_CREDENTIAL_TYPE', 'CropHealthy')
+        self.max_age = max_age
+
+    @property
+    def requires_credential(self):
+        return bool(self.issuers)
+
+    def eligible_farmers(self, farmers):
+        """``{farmer: holds the required credential}``; one ledger read per farmer not seen recently."""
+        farmers = set(farmers)
+        if not self.requires_credential:
+            return dict.fromkeys(farmers, True)
+        self.index.ensure(sorted(farmers), max_age=self.max_age)
+        return {farmer: any(self.index.holds(farmer, issuer, self.credential_type) for issuer in self.issuers)
+                for farmer in farmers}
+
+    def _free_currency(self, campaign, reserved):
+        farmer = campaign['farmer_address']
+        for code in currency_candidates(campaign['project_title']):
+            if (farmer, code) not in reserved and \
+                    not self.storage.count('campaigns', farmer_address=farmer, token_currency=code):
+                return code
+        return None
+
+    def decide(self, campaigns, eligible):
+        """``[(campaign, token_currency or None, error or None)]`` without writing anything."""
+        reserved, decisions = set(), []
+        for campaign in campaigns:
+            code = error = None
+            if not eligible[campaign['farmer_address']]:
+                error = (f"farmer has no valid {self.credential_type} credential from "
+                         f"{', '.join(self.issuers)}")
+            else:
+                code = self._free_currency(campaign, reserved)
+                if code is None:
+                    error = "no free token currency code for this farmer"
+                else:
+                    reserved.add((campaign['farmer_address'], code))
+            decisions.append((campaign, code, error))
+        return decisions
+
+    def _run(self, campaigns):
+        """Decide and write; returns ``(decisions, approved ids)``."""
+        eligible = self.eligible_farmers(c['farmer_address'] for c in campaigns)  # ledger reads: before the lock
+        approved = []
+        with self.storage.atomic():
+            decisions = self.decide(campaigns, eligible)  # indexed reads before the first write
+            for campaign, code, error in decisions:
+                if error is None:
+                    fields = {'token_currency': code, 'status': 'approved', 'approval_error': None}
+                    if self.storage.update('campaigns', campaign['id'], fields, expect={'status': 'pending'}):
+                        approved.append(campaign['id'])
+                elif campaign.get('approval_error') != error:
+                    self.storage.update('campaigns', campaign['id'], {'approval_error': error},
+                                        expect={'status': 'pending'})
+        return decisions, approved
+
+    def approve(self, campaign_id):
+        """Approve one campaign; returns ``(campaign, error)``."""
+        campaign = self.storage.get('campaigns', campaign_id)
+        if not campaign:
+            return None, "Campaign not found"
+        if campaign['status'] != 'pending':
+            return campaign, f"Campaign is {campaign['status']}, not pending"
+        [(_, _, error)], approved = self._run([campaign])
+        if error is None and not approved:
+            error = "Campaign was changed by someone else; try again"
+        return self.storage.get('campaigns', campaign_id), error
+
+    def approve_pending(self):
+        """Approve every pending campaign that passes; returns a summary."""
+        started = time.perf_counter()
+        loads = self.index.loads
+        campaigns = self.storage.find('campaigns', status='pending')
+        decisions, approved = self._run(campaigns)
+        reasons = {}
+        for _, _, error in decisions:
+            if error is not None:
+                reasons[error] = reasons.get(error, 0) + 1
+        return {
+            'pending': len(campaigns),
+            'approved': len(approved),
+            'rejected': sum(reasons.values()),
+            'reasons': reasons,
+            'farmers': len({c['farmer_address'] for c in campaigns}),
+            'credential_reads': self.index.loads - loads,
+            'credential_check': self.requires_credential,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
@@ -0,0 +1,316 @@
+"""Asyncio versions of the mods/* XRPL helpers.
+
+Same names, arguments and return values as the sync helpers in
+mods/wallet.py, mod2.py, mods/nft_utils.py, mods/escrow_utils.py and
+mods/credential_utils.py, but built on the shared pooled
+``AsyncJsonRpcClient`` so an API worker can keep many submissions in
+flight while it waits for ledgers to validate.
+
+Submissions take their Sequence (or a spare ticket) from the signing
+account's AccountSequencer (mods/sequences), shared with the sync
+helpers, and nothing is held while a transaction waits for validation,
+so one wallet - a farmer issuing tokens to every investor - can have
+many transactions in each ledger.
+"""
+import asyncio
+import inspect
+import time
+
+import xrpl
+from xrpl.asyncio.ledger import get_latest_validated_ledger_sequence
+from xrpl.asyncio.transaction import submit_and_wait
+from xrpl.models.amounts import IssuedCurrencyAmount
+from xrpl.models.requests import AccountInfo, AccountLines, AccountNFTs, AccountObjects, SubmitOnly, Tx
+from xrpl.models.transactions import (
+    CredentialCreate,
+    EscrowCancel,
+    EscrowCreate,
+    EscrowFinish,
+    NFTokenMint,
+    Payment,
+    Transaction,
+    TrustSet,
+)
+from xrpl.utils import str_to_hex, xrp_to_drops
+from xrpl.wallet import Wallet
+
+from mods import sequences
+from mods.client_pool import get_async_client, get_client, resolve_url
+from mods.escrow_utils import add_seconds
+from mods.ledger_cache import account_cache
+from mods.metrics import SUBMIT_TO_VALIDATED, TX_RESULTS
+from mods.pagination import apaginate
+
+testnet_url = "https://s.altnet.rippletest.net:51234"
+
+
+def wallet_from_seed(seed):
+    """Derive the wallet for a seed.
+
+    Derived on every call: remembering wallets would keep every seed and
+    private key that passed through the process in memory.
+    """
+    return Wallet.from_seed(seed)
+
+
+async def _wait_validated(signed, client):
+    """submit_and_wait for a signed transaction, timed from submission to validation."""
+    started = time.perf_counter()
+    try:
+        response = await submit_and_wait(signed, client)
+    except xrpl.transaction.XRPLReliableSubmissionException:
+        TX_RESULTS.inc("async", "failed")
+        raise
+    SUBMIT_TO_VALIDATED.observe(time.perf_counter() - started, "async")
+    TX_RESULTS.inc("async", response.result["meta"]["TransactionResult"])
+    return response
+
+
+async def _wait_lane(client, signed):
+    """The validated Tx response, or None once LastLedgerSequence has passed."""
+    while True:
+        response = await client.request(Tx(transaction=signed.get_hash()))
+        if response.is_successful() and response.result.get("validated"):
+            return response
+        if await get_latest_validated_ledger_sequence(client) >= signed.last_ledger_sequence:
+            response = await client.request(Tx(transaction=signed.get_hash()))
+            return response if response.is_successful() and response.result.get("validated") else None
+        await asyncio.sleep(sequences.POLL_INTERVAL)
+
+
+async def _send(client, signed):
+    """Submit a signed transaction once; returns the submit reply."""
+    return (await client.request(SubmitOnly(tx_blob=signed.blob()))).result
+
+
+async def _submit(tx, wallet, on_signed=None, retries=3):
+    """``sequences.submit_and_wait`` for asyncio.
+
+    ``on_signed(signed_tx)`` runs after signing and before each submission;
+    it may be a coroutine function. The sequencer's blocking calls (an occasional account_info, signing)
+    run in a thread.
+    """
+    sync_client, client = get_client(testnet_url), get_async_client(testnet_url)
+    sequencer = sequences.get_sequencer(sync_client, wallet.address)
+    code = None
+    for _ in range(retries + 1):
+        lane = await asyncio.to_thread(sequencer.acquire)
+        try:
+            signed = await asyncio.to_thread(sequences.sign_on, sync_client, tx, wallet, lane, sync_client.url)
+            if on_signed is not None:
+                saved = on_signed(signed)
+                if inspect.isawaitable(saved):
+                    await saved
+            started = time.perf_counter()
+            code = sequences.engine_result(await _send(client, signed))
+            response = None
+            if not sequences.not_applied(code):
+                response = await _wait_lane(client, signed)
+                sequences.record_outcome(response, started, "async")
+        except BaseException:
+            sequencer.release(lane, applied=False)
+            raise
+        response = await asyncio.to_thread(sequences.settle, sequencer, lane, response, code)
+        if response is not None:
+            return response
+    raise xrpl.transaction.XRPLReliableSubmissionException(f"Not applied after {retries + 1} attempts: {code}")
+
+
+async def _submit_or_reply(tx, wallet):
+    try:
+        return await _submit(tx, wallet)
+    except xrpl.transaction.XRPLReliableSubmissionException as e:
+        return f"Submit failed: {e}"
+
+
+async def submit_tracked(tx, wallet, on_signed):
+    """submit_and_wait that reports the signed transaction before sending it.
+
+    ``on_signed(signed_tx)`` runs after autofill and signing but before
+    submission, so callers can persist the hash and blob and later resume
+    with ``check_submitted``/``resubmit`` instead of signing a second payment.
+    A re-signed attempt (on a new Sequence) is reported again.
+    """
+    return await _submit(tx, wallet, on_signed)
+
+
+async def check_submitted(tx_hash, last_ledger_sequence):
+    """Classify an earlier submission: 'validated' (with its result), 'pending' or 'expired'.
+
+    'expired' means the last validated ledger is past the transaction's
+    LastLedgerSequence without including it, so it can never apply and is
+    safe to replace.
+    """
+    client = get_async_client(testnet_url)
+    response = await client.request(Tx(transaction=tx_hash))
+    if response.is_successful() and response.result.get("validated"):
+        return "validated", response.result
+    if await get_latest_validated_ledger_sequence(client) > last_ledger_sequence:
+        return "expired", None
+    return "pending", None
+
+
+async def resubmit(tx_blob):
+    """Submit an already-signed blob again and wait for it (same hash, so it applies once)."""
+    return await _wait_validated(Transaction.from_blob(tx_blob), get_async_client(testnet_url))
+
+
+async def get_account_info(address):
+    async def fetch():
+        req = AccountInfo(account=address, ledger_index="validated", strict=True)
+        response = await get_async_client(testnet_url).request(req)
+        return response.result.get("account_data")
+
+    return await account_cache.acached("account_info", address, "validated", fetch,
+                                       url=resolve_url(testnet_url))
+
+
+async def get_iou_balances(address):
+    async def fetch():
+        req = AccountLines(account=address, ledger_index="validated", limit=400)
+        return [line async for line in apaginate(get_async_client(testnet_url), req)]
+
+    return await account_cache.acached("account_lines", address, "validated", fetch,
+                                       url=resolve_url(testnet_url))
+
+
+get_trustlines = get_iou_balances
+
+
+async def get_balances(addresses, concurrency=64):
+    """XRP and IOU balances for many accounts: ``{address: summary}`` in input order.
+
+    Duplicate addresses are fetched once and at most ``concurrency`` accounts
+    are in flight at a time; account_info and account_lines for one account
+    run together.
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(address):
+        async with slots:
+            try:
+                info, lines = await asyncio.gather(get_account_info(address), get_iou_balances(address))
+            except Exception as e:
+                return {"funded": False, "error": str(e)}
+        if info is None:
+            return {"funded": False, "xrp_balance": None, "tokens": []}
+        return {
+            "funded": True,
+            "xrp_balance": int(info["Balance"]) / 1_000_000,
+            "tokens": [
+                {"currency": line["currency"], "issuer": line["account"], "balance": line["balance"]}
+                for line in lines
+            ],
+        }
+
+    unique = list(dict.fromkeys(addresses))
+    summaries = await asyncio.gather(*(one(address) for address in unique))
+    return dict(zip(unique, summaries))
+
+
+async def send_xrp(seed, amount, destination):
+    sending_wallet = wallet_from_seed(seed)
+    payment = Payment(
+        account=sending_wallet.address,
+        amount=xrp_to_drops(int(amount)),
+        destination=destination,
+    )
+    return await _submit_or_reply(payment, sending_wallet)
+
+
+async def create_trust_line(seed, issuer, currency, amount):
+    receiving_wallet = wallet_from_seed(seed)
+    trustline_tx = TrustSet(
+        account=receiving_wallet.address,
+        limit_amount=IssuedCurrencyAmount(currency=currency, issuer=issuer, value=int(amount)),
+    )
+    response = await _submit(trustline_tx, receiving_wallet)
+    return response.result
+
+
+async def send_currency(seed, destination, currency, amount):
+    sending_wallet = wallet_from_seed(seed)
+    send_currency_tx = Payment(
+        account=sending_wallet.address,
+        amount=IssuedCurrencyAmount(
+            currency=currency, value=int(amount), issuer=sending_wallet.address
+        ),
+        destination=destination,
+    )
+    response = await _submit(send_currency_tx, sending_wallet)
+    return response.result
+
+
+async def mint_nft(seed, uri, taxon=0, flags=8, on_signed=None):
+    """Mint one NFT and return ``(nft_id, tx_result)``.
+
+    ``on_signed`` is passed to ``submit_tracked`` (as for the credential below).
+    """
+    wallet = wallet_from_seed(seed)
+    mint_tx = NFTokenMint(
+        account=wallet.address,
+        uri=str_to_hex(uri),
+        flags=flags,
+        nftoken_taxon=taxon,
+    )
+    response = await _submit(mint_tx, wallet, on_signed)
+    meta = response.result.get("meta", {})
+    return meta.get("nftoken_id"), meta.get("TransactionResult")
+
+
+async def get_nfts_for_address(address):
+    req = AccountNFTs(account=address, limit=400)
+    return [nft async for nft in apaginate(get_async_client(testnet_url), req)]
+
+
+async def create_time_escrow(seed, amount, destination, finish, cancel):
+    wallet = wallet_from_seed(seed)
+    escrow_tx = EscrowCreate(
+        account=wallet.address,
+        amount=amount,
+        destination=destination,
+        finish_after=add_seconds(finish),
+        cancel_after=add_seconds(cancel),
+    )
+    reply = await _submit_or_reply(escrow_tx, wallet)
+    return reply if isinstance(reply, str) else reply.result
+
+
+async def finish_time_escrow(seed, owner, sequence):
+    wallet = wallet_from_seed(seed)
+    finish_tx = EscrowFinish(account=wallet.address, owner=owner, offer_sequence=int(sequence))
+    reply = await _submit_or_reply(finish_tx, wallet)
+    return reply if isinstance(reply, str) else reply.result
+
+
+async def cancel_escrow(seed, owner, sequence):
+    wallet = wallet_from_seed(seed)
+    cancel_tx = EscrowCancel(account=wallet.address, owner=owner, offer_sequence=int(sequence))
+    reply = await _submit_or_reply(cancel_tx, wallet)
+    return reply if isinstance(reply, str) else reply.result
+
+
+async def issue_crop_credential(issuer_seed, farmer_address, credential_type, uri=None, expiration=None,
+                                on_signed=None):
+    wallet = wallet_from_seed(issuer_seed)
+    tx_args = {
+        "account": wallet.address,
+        "subject": farmer_address,
+        "credential_type": str_to_hex(credential_type),
+    }
+    if uri:
+        tx_args["uri"] = str_to_hex(uri)
+    if expiration:
+        from xrpl.utils import datetime_to_ripple_time
+        from datetime import datetime
+        if isinstance(expiration, str):
+            expiration = datetime.fromisoformat(expiration)
+        tx_args["expiration"] = datetime_to_ripple_time(expiration)
+    response = await _submit(CredentialCreate(**tx_args), wallet, on_signed)
+    return response.result
+
+
+async def lookup_credentials(address, by="subject"):
+    req = AccountObjects(account=address, type="credential")
+    response = await get_async_client(testnet_url).request(req)
+    return response.result.get("account_objects", [])
@@ -0,0 +1,135 @@
+"""Paginated, filtered campaign listing for GET /campaigns.
+
+Pages come from IndexedStorage's pre-sorted indexes, so a page costs
+about O(log n + page size) however many campaigns there are. Finished pages
+are kept in a small in-process cache along with an ETag (a hash of the
+page body), and the whole cache is dropped as soon as any campaign
+changes. A frontend polling the same page gets a cached answer, or a 304
+when it sends If-None-Match.
+"""
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from mods import funding
+from mods.indexes import sort_value
+
+SORTS = ('created_at', 'funding_goal', 'id')
+# what a cursor may carry for each sort field (None sorts last)
+SORT_TYPES = {'created_at': (str,), 'funding_goal': (int, float), 'id': (int,)}
+MAX_LIMIT = 500
+# never sent to API clients
+PRIVATE_FIELDS = ('farmer_wallet_seed',)
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+def _typed(value, types):
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def encode_cursor(record, sort, order):
+    raw = json.dumps([sort, order, record.get(sort), record['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort, order):
+    """The ``(sort value, id)`` to continue after; the cursor must come from the same sort and order."""
+    try:
+        cursor_sort, cursor_order, value, record_id = json.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise InvalidQuery('Malformed cursor')
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise InvalidQuery(f"cursor belongs to sort={cursor_sort}&order={cursor_order}, not "
+                           f"sort={sort}&order={order}")
+    if not _typed(record_id, int) or not (value is None or _typed(value, SORT_TYPES[sort])):
+        raise InvalidQuery('Malformed cursor')
+    return sort_value(value), record_id
+
+
+def _public(campaign):
+    public = {k: v for k, v in campaign.items() if k not in PRIVATE_FIELDS}
+    public['funding'] = funding.progress(campaign)
+    return public
+
+
+class CampaignListing:
+    """Serves listing pages from an IndexedStorage, with a write-invalidated page cache."""
+
+    def __init__(self, storage, max_entries=256):
+        self.storage = storage
+        self.max_entries = max_entries
+        self._pages = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def page(self, status=None, farmer=None, min_goal=None, max_goal=None,
+             sort='created_at', order='desc', limit=50, cursor=None):
+        """Return ``(etag, {'campaigns': [...], 'next_cursor': ...})``."""
+        if sort not in SORTS:
+            raise InvalidQuery(f"sort must be one of {', '.join(SORTS)}")
+        if order not in ('asc', 'desc'):
+            raise InvalidQuery("order must be 'asc' or 'desc'")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        key = (status, farmer, min_goal, max_goal, sort, order, limit, cursor)
+
+        self.storage.refresh()
+        version = self.storage.collection_versions['campaigns']
+        with self._lock:
+            if version != self._version:
+                self._pages.clear()
+                self._version = version
+            cached = self._pages.get(key)
+            if cached is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        result = self._build(status, farmer, min_goal, max_goal, sort, order, limit, cursor)
+        body = json.dumps(result, sort_keys=True, default=str).encode()
+        entry = ('"' + hashlib.sha1(body).hexdigest() + '"', result)
+        with self._lock:
+            if version == self._version:
+                self._pages[key] = entry
+                while len(self._pages) > self.max_entries:
+                    self._pages.popitem(last=False)
+        return entry
+
+    def _build(self, status, farmer, min_goal, max_goal, sort, order, limit, cursor):
+        criteria = {}
+        if status is not None:
+            criteria['status'] = status
+        if farmer is not None:
+            criteria['farmer_address'] = farmer
+        candidates = self.storage.ids('campaigns', **criteria)
+
+        def in_goal_range(campaign):
+            goal = campaign.get('funding_goal')
+            return ((min_goal is None or (goal is not None and goal >= min_goal))
+                    and (max_goal is None or (goal is not None and goal <= max_goal)))
+
+        after = decode_cursor(cursor, sort, order) if cursor else None
+        if sort == 'funding_goal':
+            # the goal range is a slice of the goal index itself
+            page, more = self.storage.scan('campaigns', sort, reverse=order == 'desc', after=after,
+                                           low=min_goal, high=max_goal, candidates=candidates,
+                                           limit=limit)
+        else:
+            ranged = min_goal is not None or max_goal is not None
+            page, more = self.storage.scan('campaigns', sort, reverse=order == 'desc', after=after,
+                                           candidates=candidates,
+                                           where=in_goal_range if ranged else None, limit=limit)
+        return {
+            'campaigns': [_public(c) for c in page],
+            'next_cursor': encode_cursor(page[-1], sort, order) if more else None,
+        }
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._pages)}
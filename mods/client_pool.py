@@ -0,0 +1,196 @@
+"""Process-wide registry of pooled XRPL JSON-RPC clients.
+
+xrpl-py's ``JsonRpcClient`` opens a new HTTP connection for every request,
+and each helper used to build a new client per call, which also threw away
+the cached ``server_info`` that autofill needs. ``get_client(url)`` returns
+one long-lived client per endpoint that keeps its connections alive, and
+``get_async_client(url)`` does the same for asyncio code.
+
+Every submitted (or newly validated) transaction also invalidates the
+cached reads in mods/ledger_cache for the accounts it touches, and every
+request is timed into mods/metrics by method.
+
+Set ``XRPL_RPC_URL`` to point every helper at a single endpoint (for example
+a local rippled) regardless of the per-module default.
+"""
+import asyncio
+import itertools
+import os
+import threading
+import time
+import weakref
+from json import JSONDecodeError
+
+import httpx
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.asyncio.clients.client import REQUEST_TIMEOUT
+from xrpl.asyncio.clients.exceptions import XRPLRequestFailureException
+from xrpl.asyncio.clients.utils import json_to_response, request_to_json_rpc
+from xrpl.clients import JsonRpcClient
+from xrpl.models.requests import Submit, Tx
+
+from mods.ledger_cache import account_cache, affected_accounts
+from mods.metrics import ENGINE_RESULTS, RPC_ERRORS, RPC_SECONDS
+
+# The platform's network. Credentials are issued, looked up and followed
+# here (mods/credential_utils, mods/credential_index, mods/ledger_ingest),
+# so the approval gate sees what the platform issued.
+DEFAULT_URL = "https://s.altnet.rippletest.net:51234"
+DEFAULT_WS_URL = "wss://s.altnet.rippletest.net:51233"
+
+_clients = {}
+_async_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _decode(response):
+    try:
+        return json_to_response(response.json())
+    except JSONDecodeError:
+        raise XRPLRequestFailureException(
+            {"error": response.status_code, "error_message": response.text}
+        )
+
+
+def _invalidate_cache(request, response):
+    """Forget cached reads for accounts touched by a submitted or newly validated transaction."""
+    if isinstance(request, Submit) or (isinstance(request, Tx) and response.result.get("validated")):
+        tx = response.result.get("tx_json") or response.result
+        accounts = affected_accounts(tx)
+        if accounts:
+            account_cache.invalidate(*accounts)
+
+
+def _record(request, response, started):
+    method = request.method.value
+    RPC_SECONDS.observe(time.perf_counter() - started, method)
+    if not response.is_successful():
+        RPC_ERRORS.inc(method, response.result.get("error", "unknown"))
+    elif isinstance(request, Submit):
+        ENGINE_RESULTS.inc(response.result.get("engine_result", "unknown"))
+
+
+class PooledJsonRpcClient(JsonRpcClient):
+    """JsonRpcClient that reuses a keep-alive connection pool across requests."""
+
+    def __init__(self, url, max_connections=32, keepalive_expiry=30.0):
+        super().__init__(url)
+        self._http = httpx.Client(
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+    def _post(self, request, timeout=REQUEST_TIMEOUT):
+        started = time.perf_counter()
+        response = _decode(
+            self._http.post(self.url, json=request_to_json_rpc(request), timeout=timeout))
+        _record(request, response, started)
+        _invalidate_cache(request, response)
+        return response
+
+    def request(self, request):
+        return self._post(request)
+
+    async def _request_impl(self, request, *, timeout=REQUEST_TIMEOUT):
+        # xrpl's sync helpers (submit_and_wait, autofill) drive this from a
+        # private event loop that runs nothing else, so a blocking call on
+        # the shared pool is fine here.
+        return self._post(request, timeout)
+
+    def close(self):
+        self._http.close()
+
+
+class PooledAsyncJsonRpcClient(AsyncJsonRpcClient):
+    """AsyncJsonRpcClient with keep-alive connection pools per event loop.
+
+    httpcore re-checks every connection in a pool whenever a request is
+    queued or finishes, so one pool of 128 connections costs far more CPU
+    per request than the request itself. Requests are spread round-robin
+    over small pools of ``connections_per_shard`` connections instead.
+    """
+
+    def __init__(self, url, max_connections=128, keepalive_expiry=30.0, connections_per_shard=4):
+        super().__init__(url)
+        self._shards = max(1, max_connections // connections_per_shard)
+        self._limits = httpx.Limits(
+            max_connections=connections_per_shard,
+            max_keepalive_connections=connections_per_shard,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._pools = weakref.WeakKeyDictionary()
+
+    def _pool(self):
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            shards = [httpx.AsyncClient(timeout=REQUEST_TIMEOUT, limits=self._limits)
+                      for _ in range(self._shards)]
+            pool = self._pools[loop] = (shards, itertools.cycle(shards))
+        return next(pool[1])
+
+    async def _request_impl(self, request, *, timeout=REQUEST_TIMEOUT):
+        started = time.perf_counter()
+        response = _decode(await self._pool().post(
+            self.url, json=request_to_json_rpc(request), timeout=timeout
+        ))
+        _record(request, response, started)
+        _invalidate_cache(request, response)
+        return response
+
+    async def aclose(self):
+        """Close the pools bound to the running event loop."""
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            for http in pool[0]:
+                await http.aclose()
+
+
+def resolve_url(url=None):
+    return os.environ.get("XRPL_RPC_URL") or url or DEFAULT_URL
+
+
+def resolve_ws_url(url=None):
+    return url or os.environ.get("XRPL_WS_URL") or DEFAULT_WS_URL
+
+
+def get_client(url=None, **pool_options):
+    """Return the shared client for ``url``, creating it on first use."""
+    url = resolve_url(url)
+    client = _clients.get(url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(url)
+            if client is None:
+                client = _clients[url] = PooledJsonRpcClient(url, **pool_options)
+    return client
+
+
+def get_async_client(url=None, **pool_options):
+    """Async counterpart of ``get_client``."""
+    url = resolve_url(url)
+    client = _async_clients.get(url)
+    if client is None:
+        with _clients_lock:
+            client = _async_clients.get(url)
+            if client is None:
+                client = _async_clients[url] = PooledAsyncJsonRpcClient(url, **pool_options)
+    return client
+
+
+async def close_async_clients():
+    """Close the async pools bound to the running event loop."""
+    for client in list(_async_clients.values()):
+        await client.aclose()
+
+
+def close_clients():
+    """Close every pooled client (e.g. on application shutdown)."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
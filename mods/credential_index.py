@@ -0,0 +1,187 @@
+"""In-process index of on-ledger credentials.
+
+Approvals ask "does farmer X hold a valid credential Y from issuer Z" for
+every campaign they look at; ``CredentialIndex.holds`` answers that from
+memory. A credential is valid once its subject has accepted it and until
+its Expiration passes.
+
+The index learns about a subject in two ways:
+
+* ``load(subjects)`` reads each subject's Credential objects
+  (account_objects, paginated and pinned to one validated ledger),
+  several subjects at a time; ``ensure`` loads only the ones it has not
+  seen yet (or, with ``max_age``, not seen recently), and ``check`` does
+  that for one subject before answering;
+* ``apply(tx, meta, ledger_index)`` takes validated CredentialCreate /
+  CredentialAccept / CredentialDelete transactions. The platform hooks it
+  onto the LedgerIngestor (mods/ledger_ingest), which follows every
+  campaign farmer, so loaded subjects stay current without polling.
+
+Every entry remembers the ledger it was last changed in, and deletions
+leave a marker, so a snapshot loaded from an older ledger never undoes a
+newer streamed change.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mods.metrics import REGISTRY
+
+RIPPLE_EPOCH = 946684800
+LSF_ACCEPTED = 0x00010000
+
+
+def credential_type_hex(credential_type):
+    """CredentialType as stored on the ledger (upper-case hex of the UTF-8 name)."""
+    return credential_type.encode().hex().upper()
+
+
+def _ripple_now():
+    return int(time.time()) - RIPPLE_EPOCH
+
+
+class CredentialIndex:
+    """(subject, issuer, credential type) -> the credential's flags and expiration."""
+
+    def __init__(self, url=None, concurrency=8, clock=_ripple_now):
+        self.url = url
+        self.concurrency = concurrency
+        self.clock = clock
+        self._entries = {}     # (subject, issuer, type hex) -> {'accepted', 'expiration', 'uri', 'ledger_index'}
+        self._subjects = {}    # subject -> {key, ...} (entries and deletion markers)
+        self._loaded = {}      # subject -> time.monotonic() of its last load
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.applied = self.loads = 0
+
+    # -- queries ----------------------------------------------------------------
+
+    def holds(self, subject, issuer, credential_type):
+        """Whether ``subject`` holds an accepted, unexpired ``credential_type`` from ``issuer``.
+
+        ``credential_type`` is the plain name, e.g. "CropHealthy2025".
+        Subjects that were never loaded count as misses; call ``ensure``
+        first for an authoritative answer.
+        """
+        key = (subject, issuer, credential_type_hex(credential_type))
+        with self._lock:
+            if subject in self._loaded:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return self._valid(self._entries.get(key))
+
+    def check(self, subject, issuer, credential_type, max_age):
+        """``holds``, reading ``subject`` again first if it was last read over ``max_age`` seconds ago.
+
+        For subjects the ledger stream may not follow: a credential revoked
+        or deleted since the last read stops counting within ``max_age``.
+        """
+        self.ensure([subject], max_age=max_age)
+        return self.holds(subject, issuer, credential_type)
+
+    def credentials(self, subject):
+        """The subject's valid credentials as ``[(issuer, type hex), ...]``."""
+        with self._lock:
+            return sorted((key[1], key[2]) for key in self._subjects.get(subject, ())
+                          if self._valid(self._entries[key]))
+
+    def is_loaded(self, subject):
+        return subject in self._loaded
+
+    def _valid(self, entry):
+        if entry is None or entry.get('deleted') or not entry['accepted']:
+            return False
+        return entry['expiration'] is None or entry['expiration'] > self.clock()
+
+    # -- updates ----------------------------------------------------------------
+
+    def _put(self, key, entry):
+        """Store ``entry`` unless what we hold for ``key`` comes from a later ledger."""
+        current = self._entries.get(key)
+        if current is not None and current['ledger_index'] > entry['ledger_index']:
+            return
+        self._entries[key] = entry
+        self._subjects.setdefault(key[0], set()).add(key)
+
+    def apply(self, tx, meta, ledger_index):
+        """Apply one validated transaction; anything but a successful credential change is ignored."""
+        kind = tx.get('TransactionType')
+        if not kind or not kind.startswith('Credential') or meta.get('TransactionResult') != 'tesSUCCESS':
+            return
+        if kind == 'CredentialCreate':
+            key = (tx['Subject'], tx['Account'], tx['CredentialType'])
+        else:  # Accept is signed by the subject, Delete by either party
+            key = (tx.get('Subject', tx['Account']), tx.get('Issuer', tx['Account']), tx['CredentialType'])
+        with self._lock:
+            self.applied += 1
+            if kind == 'CredentialCreate':
+                self._put(key, {'accepted': False, 'expiration': tx.get('Expiration'), 'uri': tx.get('URI'),
+                                'ledger_index': ledger_index})
+            elif kind == 'CredentialAccept':
+                current = self._entries.get(key)
+                if current is not None and not current.get('deleted'):
+                    self._put(key, dict(current, accepted=True, ledger_index=ledger_index))
+            elif kind == 'CredentialDelete':
+                self._put(key, {'deleted': True, 'ledger_index': ledger_index})
+
+    def _store_snapshot(self, subject, objects, ledger_index):
+        with self._lock:
+            self.loads += 1
+            seen = set()
+            for obj in objects:
+                if obj.get('Subject') != subject:
+                    continue  # credentials this account issued
+                key = (subject, obj['Issuer'], obj['CredentialType'])
+                seen.add(key)
+                self._put(key, {'accepted': bool(obj.get('Flags', 0) & LSF_ACCEPTED),
+                                'expiration': obj.get('Expiration'), 'uri': obj.get('URI'),
+                                'ledger_index': ledger_index})
+            for key in self._subjects.get(subject, set()) - seen:
+                self._put(key, {'deleted': True, 'ledger_index': ledger_index})
+            self._loaded[subject] = time.monotonic()
+
+    # -- loading from the ledger ------------------------------------------------
+
+    def _client(self):
+        from mods.client_pool import get_client
+        return get_client(self.url)   # None: the network credential_utils issues on
+
+    def load(self, subjects):
+        """Read the Credential objects of ``subjects`` from the last validated ledger."""
+        from xrpl.ledger import get_latest_validated_ledger_sequence
+        from xrpl.models.requests import AccountObjects, AccountObjectType
+        from mods.pagination import paginate
+
+        subjects = list(dict.fromkeys(subjects))
+        if not subjects:
+            return 0
+        client = self._client()
+        ledger_index = get_latest_validated_ledger_sequence(client)
+
+        def one(subject):
+            request = AccountObjects(account=subject, type=AccountObjectType.CREDENTIAL,
+                                     ledger_index=ledger_index, limit=400)
+            self._store_snapshot(subject, list(paginate(client, request)), ledger_index)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(subjects)))) as pool:
+            list(pool.map(one, subjects))
+        return len(subjects)
+
+    def ensure(self, subjects, max_age=None):
+        """``load`` the subjects not loaded yet (or longer than ``max_age`` seconds ago).
+
+        Returns how many were read from the ledger.
+        """
+        now = time.monotonic()
+        return self.load([s for s in dict.fromkeys(subjects) if s not in self._loaded
+                          or (max_age is not None and now - self._loaded[s] > max_age)])
+
+    def stats(self):
+        with self._lock:
+            return {'subjects': len(self._loaded), 'credentials': len(self._entries), 'hits': self.hits,
+                    'misses': self.misses, 'applied': self.applied, 'loads': self.loads}
+
+
+credential_index = CredentialIndex()
+REGISTRY.collector('credential_index_lookups', 'Credential checks answered in-process by outcome',
+                   ('outcome',), lambda: {('hit',): credential_index.hits, ('miss',): credential_index.misses})
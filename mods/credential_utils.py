@@ -1,18 +1,19 @@
 import xrpl
 from xrpl.wallet import Wallet
-from xrpl.clients import JsonRpcClient
-from xrpl.models.transactions import CredentialCreate
-from xrpl.transaction import submit_and_wait
+from xrpl.models.transactions import CredentialAccept, CredentialCreate
 from xrpl.utils import str_to_hex
+from mods.client_pool import get_client
+from mods.pagination import paginate
+from mods.sequences import submit_and_wait
+from mods.ticket_batch import MAX_TICKETS, create_tickets, run_with_tickets, unused_tickets
 
-TESTNET_URL = "https://s.devnet.rippletest.net:51234"
-
-def issue_crop_credential(issuer_seed, farmer_address, credential_type, uri=None, expiration=None):
-    wallet = Wallet.from_seed(issuer_seed)
-    client = JsonRpcClient(TESTNET_URL)
+# None: the platform's network (client_pool.DEFAULT_URL), which the
+# credential index and the approval gate read as well
+TESTNET_URL = None
 
+def _credential_args(issuer, farmer_address, credential_type, uri=None, expiration=None):
     tx_args = {
-        "account": wallet.address,
+        "account": issuer,
         "subject": farmer_address,
         "credential_type": str_to_hex(credential_type),
     }
@@ -24,17 +25,73 @@ def issue_crop_credential(issuer_seed, farmer_address, credential_type, uri=None
         if isinstance(expiration, str):
             expiration = datetime.fromisoformat(expiration)
         tx_args["expiration"] = datetime_to_ripple_time(expiration)
+    return tx_args
 
-    cred_tx = CredentialCreate(**tx_args)
+def issue_crop_credential(issuer_seed, farmer_address, credential_type, uri=None, expiration=None):
+    wallet = Wallet.from_seed(issuer_seed)
+    client = get_client(TESTNET_URL)
+    cred_tx = CredentialCreate(**_credential_args(wallet.address, farmer_address, credential_type, uri, expiration))
     resp = submit_and_wait(cred_tx, client, wallet)
     return resp.result
 
+def issue_credentials(issuer_seed, credentials, window=32, retries=2):
+    """issue_credentials
+
+    Issues many credentials from one issuer, e.g. a season's crop
+    certificates. `credentials` is a list of dicts with farmer_address,
+    credential_type and optional uri/expiration. Every CredentialCreate is
+    signed on its own ticket and submitted concurrently (at most `window`
+    in flight), then confirmed in bulk from validated ledgers, so a few
+    hundred credentials take a few ledger closes (see mods/ticket_batch).
+    A credential the farmer already has from this issuer (tecDUPLICATE)
+    counts as issued, so a repeated run is harmless.
+
+    Returns {'issued': n, 'failed': {(farmer_address, credential_type): code},
+    'unused_tickets': [...]}.
+    """
+    wallet = Wallet.from_seed(issuer_seed)
+    client = get_client(TESTNET_URL)
+    # one transaction per (farmer, type): the ledger keeps a single credential for the pair
+    todo = list({(c["farmer_address"], c["credential_type"]): c for c in credentials}.values())
+    summary = {"issued": 0, "failed": {}, "unused_tickets": []}
+    while todo:
+        chunk, todo = todo[:MAX_TICKETS], todo[MAX_TICKETS:]
+        try:
+            tickets = create_tickets(client, wallet, len(chunk))
+        except xrpl.transaction.XRPLReliableSubmissionException as e:
+            for c in chunk + todo:
+                summary["failed"][(c["farmer_address"], c["credential_type"])] = f"Submit failed: {e}"
+            break
+        by_ticket = dict(zip(tickets, chunk))
+        txs = {ticket: CredentialCreate(**_credential_args(
+                   wallet.address, c["farmer_address"], c["credential_type"], c.get("uri"), c.get("expiration")))
+               for ticket, c in by_ticket.items()}
+        results, errors, _ = run_with_tickets(client, wallet, txs, window, retries)
+        for ticket, c in by_ticket.items():
+            code = results.get(ticket) or errors.get(ticket)
+            if code in ("tesSUCCESS", "tecDUPLICATE"):
+                summary["issued"] += 1
+            else:
+                summary["failed"][(c["farmer_address"], c["credential_type"])] = code
+        summary["unused_tickets"] += unused_tickets(client, wallet, tickets)
+    return summary
+
+def accept_credential(subject_seed, issuer, credential_type):
+    """The farmer's side: a credential only counts once its subject accepts it."""
+    wallet = Wallet.from_seed(subject_seed)
+    client = get_client(TESTNET_URL)
+    accept_tx = CredentialAccept(account=wallet.address, issuer=issuer,
+                                 credential_type=str_to_hex(credential_type))
+    return submit_and_wait(accept_tx, client, wallet).result
+
 def lookup_credentials(address, by="subject"):
-    client = JsonRpcClient(TESTNET_URL)
+    """Credentials where `address` is the subject (by="subject") or the issuer (by="issuer")."""
+    client = get_client(TESTNET_URL)
     from xrpl.models.requests import AccountObjects, AccountObjectType
     req = AccountObjects(
         account=address,
         type=AccountObjectType.CREDENTIAL,
+        limit=400,
     )
-    resp = client.request(req)
-    return resp.result.get("account_objects", [])
+    field = "Issuer" if by == "issuer" else "Subject"
+    return [obj for obj in paginate(client, req) if obj.get(field) == address]
@@ -0,0 +1,255 @@
+"""Finish or cancel microloan escrows as soon as they mature.
+
+Every active microloan has two deadlines on its escrow: ``FinishAfter``
+(the farmer can be paid) and ``CancelAfter`` (the investor can take the
+funds back). ``EscrowScheduler`` keeps both in a heap ordered by time,
+sleeps until the earliest one, then handles everything that has come due
+in one batch: an operator account signs an EscrowFinish or EscrowCancel
+per loan on its own ticket, they are submitted concurrently and confirmed
+from validated ledgers (mods/ticket_batch), and the loans' statuses are
+written back in a single storage write.
+
+Time-based escrows can be finished or cancelled by any account, so the
+operator only pays the fees. Set ``AGRIVEST_OPERATOR_SEED`` to enable it.
+
+Every API worker runs a scheduler with the same operator account, so a run
+first takes the ``escrow-scheduler`` record in ``leases`` (written through
+``storage.update(..., expect=...)``, like investment jobs and payouts). The
+other workers stand by until its lease lapses.
+"""
+import asyncio
+import heapq
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from xrpl.models.transactions import EscrowCancel, EscrowFinish
+from xrpl.wallet import Wallet
+
+from mods import ticket_batch
+from mods.client_pool import get_client
+from mods.escrow_utils import RIPPLE_EPOCH, testnet_url
+
+# seconds past FinishAfter/CancelAfter before submitting: the deadline is
+# checked against the parent ledger's close time, not our clock
+MARGIN = 10
+
+LEASE = 'escrow-scheduler'
+
+ACTIONS = {
+    'finish': ('finish_after', EscrowFinish, 'completed', 'completed_at'),
+    'cancel': ('cancel_after', EscrowCancel, 'cancelled', 'cancelled_at'),
+}
+
+
+class EscrowScheduler:
+    """Time-ordered queue of microloan escrow deadlines, processed in ticketed batches."""
+
+    def __init__(self, storage, operator_seed=None, url=None, margin=MARGIN, window=32, retries=2,
+                 max_attempts=5, max_sleep=60.0, clock=time.time, lease_seconds=300):
+        self.storage = storage
+        self.operator_seed = operator_seed or os.environ.get('AGRIVEST_OPERATOR_SEED')
+        self.url = url or testnet_url
+        self.margin = margin
+        self.window = window
+        self.retries = retries
+        self.max_attempts = max_attempts
+        self.max_sleep = max_sleep
+        self.clock = clock
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.stats = Counter()
+        self._heap = []          # (due ripple time, loan id, action)
+        self._queued = set()     # (loan id, action) currently in the heap
+        self._finished = set()   # (loan id, action) that must not be submitted again
+        self._attempts = Counter()
+        self._lock = threading.Lock()
+        self._task = None
+
+    def ripple_now(self):
+        return int(self.clock()) - RIPPLE_EPOCH
+
+    # -- the queue ----------------------------------------------------------------
+
+    def schedule(self, loan, action=None, due=None):
+        """Queue a loan's finish and cancel deadlines (or one ``action`` at ``due``)."""
+        if loan.get('status') != 'active' or not loan.get('escrow_sequence'):
+            return
+        with self._lock:
+            for name, (field, _, _, _) in ACTIONS.items():
+                if action not in (None, name) or (loan['id'], name) in self._queued \
+                        or (loan['id'], name) in self._finished:
+                    continue
+                at = due if due is not None else loan.get(field)
+                if at is None:
+                    continue
+                heapq.heappush(self._heap, (at + (self.margin if due is None else 0), loan['id'], name))
+                self._queued.add((loan['id'], name))
+
+    def sync(self):
+        """Queue active loans we have not seen yet (created by other workers, or before a restart).
+
+        Loans we gave up on, whose escrow is gone, or whose finish came too
+        late stay ``active`` until the ledger ingestor records what happened,
+        but are not queued again.
+        """
+        for loan in self.storage.find('microloans', status='active'):
+            self.schedule(loan)
+
+    def next_due(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """``[(loan, action)]`` for every deadline that has passed, at most one action per loan."""
+        now = self.ripple_now() if now is None else now
+        popped = {}
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, loan_id, action = heapq.heappop(self._heap)
+                self._queued.discard((loan_id, action))
+                popped.setdefault(loan_id, set()).add(action)
+        due = []
+        for loan_id, actions in sorted(popped.items()):
+            loan = self.storage.get('microloans', loan_id)
+            if not loan or loan['status'] != 'active':
+                continue
+            cancel_after = loan.get('cancel_after')
+            if 'cancel' in actions or (cancel_after is not None and now > cancel_after):
+                # past CancelAfter an escrow can no longer be finished
+                with self._lock:
+                    self._finished.add((loan_id, 'finish'))
+                    if (loan_id, 'cancel') in self._queued:
+                        continue  # its cancel deadline is still queued
+                due.append((loan, 'cancel'))
+            else:
+                due.append((loan, 'finish'))
+        return due
+
+    # -- processing ---------------------------------------------------------------
+
+    def _escrow_tx(self, wallet, loan, action):
+        kind = ACTIONS[action][1]
+        return kind(account=wallet.address, owner=loan['investor_address'],
+                    offer_sequence=int(loan['escrow_sequence']))
+
+    def _take_lease(self):
+        """Take or renew the scheduler lease; False while another worker holds it."""
+        now = time.time()
+        with self.storage.atomic():
+            # reads before writes (see IndexedStorage.atomic)
+            lease = next((l for l in self.storage.all('leases') if l['name'] == LEASE), None)
+            if lease is None:
+                self.storage.insert('leases', {'name': LEASE, 'owner': self.worker_id,
+                                               'expires': now + self.lease_seconds})
+                return True
+        if lease['owner'] != self.worker_id and lease['expires'] >= now:
+            return False
+        return self.storage.update('leases', lease['id'], {
+            'owner': self.worker_id, 'expires': now + self.lease_seconds,
+        }, expect={'owner': lease['owner'], 'expires': lease['expires']}) is not None
+
+    def run_due(self, now=None):
+        """Submit every due finish/cancel; returns a summary of this run.
+
+        None if another worker holds the lease: its scheduler settles the loans.
+        """
+        if not self._take_lease():
+            return None
+        due = self.pop_due(now)
+        summary = Counter()
+        if not due:
+            return summary
+        client = get_client(self.url)
+        wallet = Wallet.from_seed(self.operator_seed)
+        for start in range(0, len(due), ticket_batch.MAX_TICKETS):
+            chunk = due[start:start + ticket_batch.MAX_TICKETS]
+            if start and not self._take_lease():   # renewed between batches
+                for loan, action in due[start:]:
+                    self.schedule(loan, action, due=self.ripple_now())   # for whoever holds it now
+                break
+            try:
+                tickets = ticket_batch.create_tickets(client, wallet, len(chunk))
+                txs = {ticket: self._escrow_tx(wallet, loan, action)
+                       for ticket, (loan, action) in zip(tickets, chunk)}
+                results, errors, hashes = ticket_batch.run_with_tickets(
+                    client, wallet, txs, self.window, self.retries)
+            except Exception as e:
+                print(f"⚠️  Escrow batch failed: {e}")
+                self._retry(chunk, now)
+                summary['retried'] += len(chunk)
+                continue
+            settled, retry = [], []
+            for ticket, (loan, action) in zip(tickets, chunk):
+                code = results.get(ticket) or errors.get(ticket)
+                if code == 'tesSUCCESS':
+                    settled.append((loan, action, hashes[ticket]))
+                elif code == 'tecNO_TARGET':
+                    summary['gone'] += 1  # settled by someone else; the ledger ingestor records it
+                    with self._lock:
+                        self._finished.update((loan['id'], name) for name in ACTIONS)
+                else:
+                    retry.append((loan, action))  # not due on the ledger clock yet, or not applied
+            self._settle(settled)
+            self._retry(retry, now)
+            summary['batches'] += 1
+            summary['retried'] += len(retry)
+            for _, action, _ in settled:
+                summary[ACTIONS[action][2]] += 1
+        summary = +summary  # drop zero counts
+        self.stats.update(summary)
+        return summary
+
+    def _settle(self, settled):
+        """Write every settled loan's new status in one storage write."""
+        if not settled:
+            return
+        now = datetime.now().isoformat()
+        with self.storage.atomic():
+            for loan, action, tx_hash in settled:
+                _, _, status, stamp = ACTIONS[action]
+                self.storage.update('microloans', loan['id'],
+                                    {'status': status, stamp: now, 'settled_tx': tx_hash},
+                                    expect={'status': 'active'})
+
+    def _retry(self, items, now=None):
+        now = self.ripple_now() if now is None else now
+        for loan, action in items:
+            self._attempts[(loan['id'], action)] += 1
+            if self._attempts[(loan['id'], action)] >= self.max_attempts:
+                print(f"❌ Giving up on {action} for microloan #{loan['id']}")
+                self.stats['abandoned'] += 1
+                with self._lock:
+                    self._finished.add((loan['id'], action))
+                continue
+            self.schedule(loan, action, due=now + self.margin * self._attempts[(loan['id'], action)])
+
+    # -- background loop ----------------------------------------------------------
+
+    async def run(self):
+        """Sleep until the next deadline, process everything due, repeat."""
+        while True:
+            self.sync()
+            due, now = self.next_due(), self.ripple_now()
+            if due is not None and due <= now:
+                try:
+                    if await asyncio.to_thread(self.run_due) is None:
+                        await asyncio.sleep(self.margin)   # another worker holds the lease
+                except Exception as e:
+                    print(f"⚠️  Escrow scheduler error: {e}")
+                    await asyncio.sleep(self.margin)
+                continue
+            await asyncio.sleep(self.max_sleep if due is None else min(self.max_sleep, due - now))
+
+    async def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
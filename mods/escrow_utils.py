@@ -1,14 +1,17 @@
 
 import xrpl
-from xrpl.clients import JsonRpcClient
 from xrpl.wallet import Wallet
 from xrpl.models.transactions import EscrowCreate, EscrowFinish, EscrowCancel
 from xrpl.models.requests import AccountObjects, Tx
-from xrpl.transaction import submit_and_wait
 from xrpl.utils import datetime_to_ripple_time, xrp_to_drops, drops_to_xrp, ripple_time_to_datetime
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from os import urandom
 from cryptoconditions import PreimageSha256
+from mods.client_pool import get_client
+from mods.sequences import submit_and_wait
+from mods.pagination import paginate
 
 testnet_url = "https://s.altnet.rippletest.net:51234"
 
@@ -30,7 +33,7 @@ def add_seconds(numOfSeconds):
 def create_time_escrow(seed, amount, destination, finish, cancel):
     """Create a time-based escrow"""
     wallet = Wallet.from_seed(seed)
-    client = JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     finish_date = add_seconds(finish)
     cancel_date = add_seconds(cancel)
 
@@ -53,7 +56,7 @@ def create_time_escrow(seed, amount, destination, finish, cancel):
 def create_conditional_escrow(seed, amount, destination, cancel, condition):
     """Create a conditional escrow"""
     wallet = Wallet.from_seed(seed)
-    client = JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     cancel_date = add_seconds(cancel)
 
     escrow_tx = EscrowCreate(
@@ -75,7 +78,7 @@ def create_conditional_escrow(seed, amount, destination, cancel, condition):
 def finish_time_escrow(seed, owner, sequence):
     """Finish a time-based escrow"""
     wallet = Wallet.from_seed(seed)
-    client = JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     finish_tx = EscrowFinish(
         account=wallet.address,
         owner=owner,
@@ -93,7 +96,7 @@ def finish_time_escrow(seed, owner, sequence):
 def finish_conditional_escrow(seed, owner, sequence, condition, fulfillment):
     """Finish a conditional escrow"""
     wallet = Wallet.from_seed(seed)
-    client = JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     finish_tx = EscrowFinish(
         account=wallet.address,
         owner=owner,
@@ -113,7 +116,7 @@ def finish_conditional_escrow(seed, owner, sequence, condition, fulfillment):
 def cancel_escrow(seed, owner, sequence):
     """Cancel an escrow"""
     wallet = Wallet.from_seed(seed)
-    client = JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     cancel_tx = EscrowCancel(
         account=wallet.address,
         owner=owner,
@@ -128,51 +131,94 @@ def cancel_escrow(seed, owner, sequence):
         reply = f"Submit failed: {e}"
     return reply
 
+RIPPLE_EPOCH = 946684800  # 2000-01-01T00:00:00Z in Unix time
+
+# columns of a scan_escrows result, one list per field
+ESCROW_COLUMNS = ('escrow_id', 'sender', 'receiver', 'amount', 'finish_after', 'cancel_after',
+                  'condition', 'prev_txn_id')
+
+
+def _append_escrows(columns, entries, seen):
+    """Add XRP escrows to the column lists: drops as ints, times as Unix epoch ints (or None)."""
+    escrow_ids, senders, receivers, amounts, finishes, cancels, conditions, prev_txns = (
+        columns[name].append for name in ESCROW_COLUMNS)
+    for escrow in entries:
+        amount = escrow["Amount"]
+        if not isinstance(amount, str) or escrow["index"] in seen:
+            continue  # token escrows are not part of a loan portfolio
+        seen.add(escrow["index"])
+        finish = escrow.get("FinishAfter")
+        cancel = escrow.get("CancelAfter")
+        escrow_ids(escrow["index"])
+        senders(escrow["Account"])
+        receivers(escrow["Destination"])
+        amounts(int(amount))
+        finishes(None if finish is None else finish + RIPPLE_EPOCH)
+        cancels(None if cancel is None else cancel + RIPPLE_EPOCH)
+        conditions(escrow.get("Condition"))
+        prev_txns(escrow.get("PreviousTxnID"))
+
+
+def scan_escrows(accounts, concurrency=8):
+    """Every XRP escrow sent or received by any of `accounts`, as columns.
+
+    Returns ``{column: [values]}`` for ESCROW_COLUMNS, each escrow once even
+    when both of its parties are scanned. Every account is paged to the end,
+    `concurrency` accounts at a time. Nothing is formatted here; use
+    escrow_rows() for display.
+    """
+    client = get_client(testnet_url)
+
+    def fetch(account):
+        req = AccountObjects(account=account, ledger_index="validated", type="escrow", limit=400)
+        return list(paginate(client, req))
+
+    columns = {name: [] for name in ESCROW_COLUMNS}
+    seen = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for entries in pool.map(fetch, dict.fromkeys(accounts)):
+            _append_escrows(columns, entries, seen)
+    return columns
+
+
+@lru_cache(maxsize=65536)
+def _format_time(epoch):
+    # loans mature on a handful of dates, so most lookups are hits
+    return str(ripple_time_to_datetime(epoch - RIPPLE_EPOCH))
+
+
+def escrow_rows(columns, start=0, stop=None):
+    """Yield display dicts (the get_escrows format) for rows start..stop of a scan."""
+    stop = len(columns["escrow_id"]) if stop is None else stop
+    for i in range(start, stop):
+        row = {
+            "escrow_id": columns["escrow_id"][i],
+            "sender": columns["sender"][i],
+            "receiver": columns["receiver"][i],
+            "amount": str(drops_to_xrp(str(columns["amount"][i]))),
+        }
+        if columns["prev_txn_id"][i] is not None:
+            row["prev_txn_id"] = columns["prev_txn_id"][i]
+        if columns["finish_after"][i] is not None:
+            row["redeem_date"] = _format_time(columns["finish_after"][i])
+        if columns["cancel_after"][i] is not None:
+            row["expiry_date"] = _format_time(columns["cancel_after"][i])
+        if columns["condition"][i] is not None:
+            row["condition"] = columns["condition"][i]
+        yield row
+
+
 def get_escrows(account):
     """Get all escrows for an account, formatted"""
-    client = JsonRpcClient(testnet_url)
-    
-    all_escrows_dict = {} 
-    sent_escrows = [] 
-    received_escrows = []
-
-    req = AccountObjects(
-        account=account,
-        ledger_index="validated",
-        type="escrow"
-    )
-    response = client.request(req)
-    escrows = response.result["account_objects"]
-
-    for escrow in escrows:
-        escrow_data = {} 
-        if isinstance(escrow["Amount"], str):
-            escrow_data["escrow_id"] = escrow["index"]
-            escrow_data["sender"] = escrow["Account"] 
-            escrow_data["receiver"] = escrow["Destination"] 
-            escrow_data["amount"] = str(drops_to_xrp(escrow["Amount"])) 
-            if "PreviousTxnID" in escrow:
-                escrow_data["prev_txn_id"] = escrow["PreviousTxnID"] 
-            if "FinishAfter" in escrow:
-                escrow_data["redeem_date"] = str(ripple_time_to_datetime(escrow["FinishAfter"])) 
-            if "CancelAfter" in escrow:
-                escrow_data["expiry_date"] = str(ripple_time_to_datetime(escrow["CancelAfter"]))
-            if "Condition" in escrow:
-                escrow_data["condition"] = escrow["Condition"]
-                
-            # Sort escrows
-            if escrow_data["sender"] == account:
-                sent_escrows.append(escrow_data)
-            else:
-                received_escrows.append(escrow_data)
-
-    all_escrows_dict["sent"] = sent_escrows
-    all_escrows_dict["received"] = received_escrows
+    columns = scan_escrows([account])
+    all_escrows_dict = {"sent": [], "received": []}
+    for row in escrow_rows(columns):
+        all_escrows_dict["sent" if row["sender"] == account else "received"].append(row)
     return all_escrows_dict
 
 def get_escrow_sequence(prev_txn_id):
     """Get escrow sequence from transaction ID"""
-    client = JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     req = Tx(transaction=prev_txn_id) 
     response = client.request(req)
     result = response.result
@@ -0,0 +1,84 @@
+"""Running funding totals per campaign.
+
+Every campaign record carries a ``funding`` dict - total raised, number of
+investments and distinct investors, tokens issued - that is updated in the
+same storage write that records an investment (``record_investment``), so
+reading a campaign's progress never touches the investments table.
+
+``verify`` recomputes the totals from the investment records and reports
+(or, with ``fix=True``, rewrites) every campaign whose stored totals have
+drifted - e.g. after a manual edit or a database restored from backup.
+"""
+
+FUNDING_FIELDS = ('total_raised', 'investment_count', 'investor_count', 'tokens_issued')
+
+
+def empty_funding():
+    return {field: 0 for field in FUNDING_FIELDS}
+
+
+def progress(campaign):
+    """The campaign's funding totals plus ``percent_funded`` of its goal."""
+    funding = dict(empty_funding(), **(campaign.get('funding') or {}))
+    goal = campaign.get('funding_goal')
+    funding['percent_funded'] = round(100 * funding['total_raised'] / goal, 2) if goal else None
+    return funding
+
+
+def _add(funding, investment, new_investor):
+    funding = dict(empty_funding(), **(funding or {}))
+    funding['total_raised'] += investment['amount']
+    funding['investment_count'] += 1
+    funding['investor_count'] += 1 if new_investor else 0
+    funding['tokens_issued'] += investment.get('token_amount') or 0
+    return funding
+
+
+def record_investment(storage, investment):
+    """Insert an investment and fold it into its campaign's totals in one write.
+
+    ``storage`` is an IndexedStorage; returns the stored investment.
+    """
+    campaign_id, investor = investment['campaign_id'], investment['investor_address']
+    with storage.atomic():
+        # reads first: the indexes must not pick up this block's uncommitted writes
+        campaign = storage.get('campaigns', campaign_id)
+        new_investor = not storage.count('investments', campaign_id=campaign_id,
+                                         investor_address=investor)
+        investment = storage.insert('investments', investment)
+        if campaign is not None:
+            storage.update('campaigns', campaign_id,
+                           {'funding': _add(campaign.get('funding'), investment, new_investor)})
+    return investment
+
+
+def recompute(investments):
+    """campaign_id -> funding totals, from scratch."""
+    totals, seen = {}, set()
+    for investment in investments:
+        key = (investment['campaign_id'], investment['investor_address'])
+        totals[investment['campaign_id']] = _add(totals.get(investment['campaign_id']),
+                                                 investment, key not in seen)
+        seen.add(key)
+    return totals
+
+
+def verify(storage, fix=False):
+    """Campaigns whose stored totals differ from their investments.
+
+    Returns ``[{'campaign_id', 'stored', 'expected'}, ...]``; with ``fix``
+    the expected totals are written back. Runs under the write lock so no
+    investment lands between reading the two collections.
+    """
+    drift = []
+    with storage.atomic():
+        expected = recompute(storage.all('investments'))
+        for campaign in storage.all('campaigns'):
+            stored = dict(empty_funding(), **(campaign.get('funding') or {}))
+            should_be = expected.get(campaign['id'], empty_funding())
+            if stored != should_be:
+                drift.append({'campaign_id': campaign['id'], 'stored': stored, 'expected': should_be})
+        if fix:
+            for entry in drift:
+                storage.update('campaigns', entry['campaign_id'], {'funding': entry['expected']})
+    return drift
@@ -0,0 +1,254 @@
+"""In-memory secondary indexes over a storage backend.
+
+``IndexedStorage`` wraps any backend from mods/storage and answers
+``get(collection, id)`` and ``find(collection, field=value, ...)`` from
+memory. ``find`` costs O(k) in the number of matches instead of scanning the
+whole collection.
+
+``scan`` walks a collection in the order of one of its SORT_KEYS from a
+cursor, without re-sorting anything per call.
+
+The indexes follow the backend's ``data_version``. Before a read it costs
+one cheap version check; after a write - ours or another worker's - only
+the changed records are re-indexed. A full reload happens when the whole
+dataset was replaced (``save_data``/``transaction``), and on the JSON
+backend, which cannot tell which records changed.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+
+from mods.metrics import INDEX_REFRESH_SECONDS, timed
+
+# collection -> fields that get a secondary index
+INDEXED_FIELDS = {
+    'campaigns': ('status', 'farmer_address', 'token_currency'),
+    'investments': ('campaign_id', 'investor_address', 'job_id'),
+    'microloans': ('status', 'farmer_address', 'investor_address'),
+    'investment_jobs': ('status', 'campaign_id'),
+    'ledger_events': ('hash',),
+    'payouts': ('campaign_id',),
+    'payout_transfers': ('payout_id', 'status'),
+}
+
+# collection -> fields kept as pre-sorted (value, id) lists for ordered scans
+SORT_KEYS = {
+    'campaigns': ('created_at', 'funding_goal', 'id'),
+}
+
+
+def sort_value(value):
+    """Orderable form of a field value; missing values sort after everything else."""
+    return (value is None, 0 if value is None else value)
+
+
+class IndexedStorage:
+    """Storage backend plus in-memory indexes by id and by the fields in INDEXED_FIELDS."""
+
+    def __init__(self, storage, fields=None, sort_keys=None):
+        self.storage = storage
+        self.fields = fields or INDEXED_FIELDS
+        self.sort_keys = sort_keys or SORT_KEYS
+        self._lock = threading.RLock()
+        self._version = None
+        self._records = {}   # collection -> {id: record}
+        self._index = {}     # (collection, field) -> {value: set(ids)}
+        self._sorted = {}    # (collection, key) -> sorted [(sort_value, id)]
+        self.collection_versions = Counter()   # bumped whenever a collection's records change
+        self._reset()
+
+    def __getattr__(self, name):
+        # created, migrated_from, path, ...
+        return getattr(self.storage, name)
+
+    # -- index maintenance ----------------------------------------------------
+
+    def _reset(self):
+        self._records = defaultdict(dict)
+        self._index = {(c, f): defaultdict(set) for c, fields in self.fields.items() for f in fields}
+        self._sorted = {(c, k): [] for c, keys in self.sort_keys.items() for k in keys}
+        for collection in self.fields:
+            self.collection_versions[collection] += 1
+
+    def _unindex(self, collection, record):
+        for field in self.fields.get(collection, ()):
+            ids = self._index[(collection, field)].get(record.get(field))
+            if ids is not None:
+                ids.discard(record['id'])
+                if not ids:
+                    del self._index[(collection, field)][record.get(field)]
+        for key in self.sort_keys.get(collection, ()):
+            entries = self._sorted[(collection, key)]
+            entry = (sort_value(record.get(key)), record['id'])
+            i = bisect_left(entries, entry)
+            if i < len(entries) and entries[i] == entry:
+                del entries[i]
+
+    def _index_record(self, collection, record, loading=False):
+        old = None if loading else self._records[collection].get(record['id'])
+        if old is not None:
+            self._unindex(collection, old)
+        self._records[collection][record['id']] = record
+        for field in self.fields.get(collection, ()):
+            self._index[(collection, field)][record.get(field)].add(record['id'])
+        if not loading:
+            for key in self.sort_keys.get(collection, ()):
+                insort(self._sorted[(collection, key)], (sort_value(record.get(key)), record['id']))
+        self.collection_versions[collection] += 1
+
+    @timed(INDEX_REFRESH_SECONDS, 'reload')
+    def _reload(self):
+        self._reset()
+        for collection in self.fields:
+            records = self.storage.all(collection)
+            for record in records:
+                self._index_record(collection, record, loading=True)
+            for key in self.sort_keys.get(collection, ()):
+                self._sorted[(collection, key)] = sorted(
+                    (sort_value(r.get(key)), r['id']) for r in records)
+
+    def refresh(self):
+        """Bring the indexes up to date with the backend."""
+        with self._lock:
+            current = self.storage.data_version()
+            if current == self._version:
+                return
+            if self._version is None:
+                # records written while loading are picked up again by the next refresh
+                self._reload()
+                self._version = current
+                return
+            with INDEX_REFRESH_SECONDS.time('changes'):
+                version, changes = self.storage.changes_since(self._version)
+                for collection, record in changes or ():
+                    if collection in self.fields:
+                        self._index_record(collection, record)
+            if changes is None:
+                self._reload()
+            self._version = version
+
+    # -- reads ------------------------------------------------------------------
+
+    def get(self, collection, record_id):
+        if collection not in self.fields:
+            return self.storage.get(collection, record_id)
+        self.refresh()
+        record = self._records[collection].get(record_id)
+        return dict(record) if record is not None else None
+
+    def all(self, collection):
+        if collection not in self.fields:
+            return self.storage.all(collection)
+        self.refresh()
+        with self._lock:
+            return [dict(r) for _, r in sorted(self._records[collection].items())]
+
+    def find(self, collection, **criteria):
+        """Records whose indexed fields equal every given value, in id order."""
+        self.refresh()
+        with self._lock:
+            matches = None
+            for field, value in sorted(criteria.items(),
+                                       key=lambda kv: len(self._ids(collection, *kv))):
+                ids = self._ids(collection, field, value)
+                matches = set(ids) if matches is None else matches & ids
+                if not matches:
+                    return []
+            records = self._records[collection]
+            return [dict(records[i]) for i in sorted(matches if matches is not None else records)]
+
+    def count(self, collection, **criteria):
+        self.refresh()
+        with self._lock:
+            if len(criteria) == 1:
+                return len(self._ids(collection, *next(iter(criteria.items()))))
+        return len(self.find(collection, **criteria))
+
+    def scan(self, collection, key, reverse=False, after=None, low=None, high=None,
+             candidates=None, where=None, limit=50):
+        """One page of records ordered by ``key`` (a SORT_KEYS field), then id.
+
+        ``after`` is the ``(sort_value, id)`` of the last record already
+        seen. ``low``/``high`` bound ``key`` itself (inclusive) by bisection;
+        ``candidates`` restricts the page to a set of ids (e.g. from
+        ``ids()``) and ``where`` is any further predicate. Returns
+        ``(records, more)``.
+        """
+        self.refresh()
+        with self._lock:
+            entries = self._sorted[(collection, key)]
+            if candidates is not None and len(candidates) * 8 < len(entries):
+                # few matches: sorting them beats walking the whole index
+                records = self._records[collection]
+                entries = sorted((sort_value(records[i].get(key)), i) for i in candidates)
+                candidates = None
+            start = 0 if low is None else bisect_left(entries, (sort_value(low),))
+            stop = len(entries) if high is None else bisect_left(entries, (sort_value(high), float('inf')))
+            if after is not None:
+                if reverse:
+                    stop = min(stop, bisect_left(entries, after))
+                else:
+                    start = max(start, bisect_right(entries, after))
+            positions = range(stop - 1, start - 1, -1) if reverse else range(start, stop)
+
+            page, records = [], self._records[collection]
+            for position in positions:
+                record_id = entries[position][1]
+                if candidates is not None and record_id not in candidates:
+                    continue
+                record = records[record_id]
+                if where is not None and not where(record):
+                    continue
+                if len(page) == limit:
+                    return page, True
+                page.append(dict(record))
+            return page, False
+
+    def ids(self, collection, **criteria):
+        """Ids matching every indexed ``field=value``, or None when there are no criteria."""
+        self.refresh()
+        with self._lock:
+            matches = None
+            for field, value in criteria.items():
+                found = self._ids(collection, field, value)
+                matches = set(found) if matches is None else matches & found
+            return matches
+
+    def distinct(self, collection, field):
+        """Every value an indexed field currently takes (None excluded)."""
+        self.refresh()
+        with self._lock:
+            return {value for value in self._ids_by_value(collection, field) if value is not None}
+
+    def _ids_by_value(self, collection, field):
+        index = self._index.get((collection, field))
+        if index is None:
+            raise KeyError(f"{collection}.{field} is not indexed")
+        return index
+
+    def _ids(self, collection, field, value):
+        return self._ids_by_value(collection, field).get(value, ())
+
+    # -- writes go straight to the backend --------------------------------------
+
+    def insert(self, collection, record):
+        return self.storage.insert(collection, record)
+
+    def update(self, collection, record_id, fields, expect=None):
+        return self.storage.update(collection, record_id, fields, expect=expect)
+
+    def load_data(self):
+        return self.storage.load_data()
+
+    def save_data(self, data):
+        self.storage.save_data(data)
+
+    def transaction(self):
+        return self.storage.transaction()
+
+    def atomic(self):
+        """The backend's ``atomic()``; do indexed reads before the block's first write."""
+        return self.storage.atomic()
+
+    def close(self):
+        self.storage.close()
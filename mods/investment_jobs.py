@@ -0,0 +1,432 @@
+"""Background pipeline for investments.
+
+``enqueue`` records an investment job and returns straight away; an
+``InvestmentWorker`` then drives the job through payment -> trustline ->
+tokens. Every step persists its signed transaction (hash, blob,
+LastLedgerSequence) before it is submitted, so a worker that restarts
+mid-job looks the transaction up instead of paying the farmer twice:
+
+* validated on ledger      -> take the result and move on
+* still within its window  -> resubmit the same blob (same hash, applies once)
+* past LastLedgerSequence  -> it can never apply, so sign a fresh one
+
+The trustline step is skipped when the investor's existing line to the
+farmer's currency (read through the account_lines cache) already has room
+for the tokens, so repeat investments save a TrustSet fee and a ledger
+wait; ``InvestmentWorker.stats`` counts both outcomes. The check is only
+sound if earlier tokens have landed, so one investor's jobs run their
+trustline and tokens steps one at a time (the payments still overlap).
+
+Once the payment is validated the investment is always recorded: if the
+trustline or tokens step then fails, the job still completes with a
+``token_amount`` of 0 and the failure in ``token_error`` (and the job's
+``error``), so the farmer can issue the tokens by hand later.
+
+Jobs are claimed with a lease (``lease_owner``/``lease_expires``) written
+through ``storage.update(..., expect=...)``, so several API workers can share
+one database without running the same job twice. Storage writes run in a
+thread, off the event loop.
+
+The investor's seed is never stored: the worker that queued the job holds
+it in memory until the job finishes. A job resumed without it (after a
+restart, or by another worker) runs until it next needs the investor's
+signature and then waits as 'awaiting_seed' until ``provide_seed`` hands
+the seed in again.
+"""
+import asyncio
+import contextlib
+import math
+import os
+import socket
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from xrpl.models.amounts import IssuedCurrencyAmount
+from xrpl.models.transactions import Payment, TrustSet
+from xrpl.transaction import XRPLReliableSubmissionException
+from xrpl.utils import xrp_to_drops
+
+from mods import async_xrpl, funding
+from mods.indexes import IndexedStorage
+from mods.tokens import trustline_limit_needed
+
+STEPS = ('payment', 'trustline', 'tokens')
+FINISHED = ('completed', 'failed')
+
+
+class LeaseLost(Exception):
+    """Another worker took over the job (our lease expired)."""
+
+
+class SeedMissing(Exception):
+    """The job needs the investor's signature and this worker does not hold the seed."""
+
+
+def _new_step():
+    return {'status': 'pending', 'hash': None, 'tx_blob': None,
+            'last_ledger_sequence': None, 'result': None, 'error': None}
+
+
+def public_view(job):
+    """Job status without the signed blobs."""
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'step': job.get('step'),
+        'campaign_id': job['campaign_id'],
+        'investor_address': job['investor_address'],
+        'amount': job['amount'],
+        'investment_id': job.get('investment_id'),
+        'error': job.get('error'),
+        'steps': {
+            name: {k: step[k] for k in ('status', 'hash', 'result', 'error')}
+            for name, step in job['steps'].items()
+        },
+        'created_at': job['created_at'],
+        'updated_at': job.get('updated_at'),
+    }
+
+
+class InvestmentWorker:
+    """Runs queued investment jobs on the current event loop.
+
+    ``concurrency`` bounds how many jobs are in flight at once (jobs for
+    different investors overlap; the account sequencer behind async_xrpl
+    hands each wallet's transactions their own sequence numbers). Unfinished jobs whose lease has
+    expired - e.g. after a crash - are picked up again on ``start()`` and on
+    every ``recover_interval``.
+    """
+
+    def __init__(self, storage, concurrency=64, lease_seconds=300, recover_interval=30.0):
+        self.storage = storage if isinstance(storage, IndexedStorage) else IndexedStorage(storage)
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.recover_interval = recover_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.stats = Counter()   # trustlines_submitted / trustlines_skipped / preflight_errors
+        self._investor_locks = {}   # investor address -> [asyncio.Lock, jobs holding or waiting]
+        self._seeds = {}            # job id -> investor seed, never written to storage
+        self._queue = None
+        self._loop = None
+        self._tasks = set()
+        self._runner = None
+
+    # -- queueing -----------------------------------------------------------
+
+    def enqueue(self, campaign_id, investor_seed, amount, schedule=True):
+        """Record a job for an approved campaign; returns the job or None.
+
+        Safe to call from any thread.
+        """
+        campaign = self.storage.get('campaigns', campaign_id)
+        if not campaign or campaign['status'] != 'approved':
+            return None
+        now = datetime.now().isoformat()
+        job = self.storage.insert('investment_jobs', {
+            'campaign_id': campaign_id,
+            'investor_address': None,  # derived by the worker: key derivation is slow
+            'amount': amount,
+            'status': 'queued',
+            'step': None,
+            'steps': {name: _new_step() for name in STEPS},
+            'investment_id': None,
+            'error': None,
+            'lease_owner': None,
+            'lease_expires': 0,
+            'created_at': now,
+            'updated_at': now,
+        })
+        self._seeds[job['id']] = investor_seed
+        if schedule:
+            self._schedule(job['id'])
+        return job
+
+    def provide_seed(self, job_id, investor_seed):
+        """Hand in the seed for a job this worker does not hold it for; returns the job.
+
+        Raises ValueError if the seed is not the job's investor's.
+        """
+        job = self.storage.get('investment_jobs', job_id)
+        if not job or job['status'] in FINISHED:
+            return job
+        if job['investor_address'] and \
+                async_xrpl.wallet_from_seed(investor_seed).address != job['investor_address']:
+            raise ValueError(f"Seed does not belong to investment job {job_id}'s investor")
+        self._seeds[job_id] = investor_seed
+        if job['status'] == 'awaiting_seed':
+            self._schedule(job_id)
+        return job
+
+    def _schedule(self, job_id):
+        if self._queue is None:
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._queue.put_nowait(job_id)
+        else:  # e.g. the /invest route's thread
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, job_id)
+
+    def status(self, job_id):
+        job = self.storage.get('investment_jobs', job_id)
+        return public_view(job) if job else None
+
+    # -- worker lifecycle ---------------------------------------------------
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._runner = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        """Stop taking new jobs and wait for the ones in flight."""
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._queue = None
+
+    async def join(self):
+        """Wait until every queued job has been processed."""
+        await self._queue.join()
+
+    def recover(self):
+        """Queue every unfinished job whose lease has lapsed (waiting ones only once their seed is here)."""
+        now = time.time()
+        unfinished = (self.storage.find('investment_jobs', status='queued')
+                      + self.storage.find('investment_jobs', status='running')
+                      + [job for job in self.storage.find('investment_jobs', status='awaiting_seed')
+                         if job['id'] in self._seeds])
+        stale = [job['id'] for job in unfinished if job.get('lease_expires', 0) < now]
+        for job_id in stale:
+            self._queue.put_nowait(job_id)
+        return stale
+
+    async def _run_forever(self):
+        slots = asyncio.Semaphore(self.concurrency)
+        self.recover()
+        next_recover = time.monotonic() + self.recover_interval
+        while True:
+            try:
+                timeout = max(0.0, next_recover - time.monotonic())
+                job_id = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                self.recover()
+                next_recover = time.monotonic() + self.recover_interval
+                continue
+            await slots.acquire()
+            task = asyncio.create_task(self._run_slot(job_id, slots))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_slot(self, job_id, slots):
+        try:
+            await self.run_job(job_id)
+        except Exception as e:
+            print(f"❌ Investment job {job_id} crashed: {e}")
+        finally:
+            slots.release()
+            self._queue.task_done()
+
+    # -- the state machine --------------------------------------------------
+
+    def _claim(self, job_id):
+        """Take the lease on a job if it is free; returns the claimed job or None."""
+        job = self.storage.get('investment_jobs', job_id)
+        if not job or job['status'] in FINISHED:
+            return None
+        if job.get('lease_owner') and job['lease_expires'] >= time.time():
+            return None  # running right now, here or in another worker
+        if job.get('investor_seed'):
+            self._seeds.setdefault(job_id, job['investor_seed'])  # a row from before seeds left storage
+        return self.storage.update('investment_jobs', job_id, {
+            'lease_owner': self.worker_id,
+            'lease_expires': time.time() + self.lease_seconds,
+            'status': 'running',
+            'resumed': job['status'] in ('running', 'awaiting_seed'),
+            'investor_seed': None,
+        }, expect={'lease_owner': job.get('lease_owner'), 'lease_expires': job['lease_expires']})
+
+    def _save(self, job, fields):
+        fields = dict(fields, lease_expires=time.time() + self.lease_seconds,
+                      updated_at=datetime.now().isoformat())
+        saved = self.storage.update('investment_jobs', job['id'], fields,
+                                    expect={'lease_owner': self.worker_id})
+        if saved is None:
+            raise LeaseLost(job['id'])
+        return saved
+
+    def _save_step(self, job, name, **fields):
+        steps = dict(job['steps'], **{name: dict(job['steps'][name], **fields)})
+        return self._save(job, {'steps': steps, 'step': name})
+
+    def _investor(self, job):
+        seed = self._seeds.get(job['id'])
+        if seed is None:
+            raise SeedMissing(job['id'])
+        return async_xrpl.wallet_from_seed(seed)
+
+    def _build(self, name, job, campaign, limit=None):
+        """Return ``(transaction, signing_wallet)`` for a step, or None to skip it."""
+        farmer_address = campaign['farmer_address']
+        currency = campaign['token_currency']
+        amount = job['amount']
+        if name != 'tokens':
+            investor = self._investor(job)
+        if name == 'payment':
+            return Payment(account=investor.address, amount=xrp_to_drops(int(amount)),
+                           destination=farmer_address), investor
+        if name == 'trustline':
+            return TrustSet(account=investor.address, limit_amount=IssuedCurrencyAmount(
+                currency=currency, issuer=farmer_address,
+                value=str(math.ceil(limit if limit is not None else amount * 10)))), investor
+        if not campaign.get('farmer_wallet_seed'):
+            return None  # the farmer issues tokens from their own wallet
+        farmer = async_xrpl.wallet_from_seed(campaign['farmer_wallet_seed'])
+        return Payment(account=farmer.address, destination=job['investor_address'], amount=IssuedCurrencyAmount(
+            currency=currency, issuer=farmer.address, value=str(int(amount)))), farmer
+
+    async def _run_step(self, job, name, campaign):
+        step = job['steps'][name]
+        if step['status'] == 'submitted':
+            outcome, result = await async_xrpl.check_submitted(step['hash'], step['last_ledger_sequence'])
+            if outcome == 'validated':
+                return await asyncio.to_thread(self._finish_step, job, name, result)
+            if outcome == 'pending':
+                try:
+                    response = await async_xrpl.resubmit(step['tx_blob'])
+                except XRPLReliableSubmissionException as e:
+                    return await asyncio.to_thread(self._save_step, job, name, status='failed', error=str(e))
+                return await asyncio.to_thread(self._finish_step, job, name, response.result)
+            # expired: fall through and sign a replacement
+
+        limit = None
+        if name == 'trustline':
+            limit = await self._trustline_limit(job, campaign)
+            if limit is None:
+                self.stats['trustlines_skipped'] += 1
+                return await asyncio.to_thread(self._save_step, job, name, status='skipped', result='covered')
+            self.stats['trustlines_submitted'] += 1
+        built = self._build(name, job, campaign, limit)
+        if built is None:
+            return await asyncio.to_thread(self._save_step, job, name, status='skipped')
+        tx, wallet = built
+
+        async def on_signed(signed):
+            nonlocal job
+            job = await asyncio.to_thread(self._save_step, job, name, status='submitted',
+                                          hash=signed.get_hash(), tx_blob=signed.blob(),
+                                          last_ledger_sequence=signed.last_ledger_sequence)
+
+        try:
+            response = await async_xrpl.submit_tracked(tx, wallet, on_signed)
+        except XRPLReliableSubmissionException as e:
+            return await asyncio.to_thread(self._save_step, job, name, status='failed', error=str(e))
+        return await asyncio.to_thread(self._finish_step, job, name, response.result)
+
+    async def _trustline_limit(self, job, campaign):
+        """Limit the investor's line needs for this investment, or None if it already has room."""
+        try:
+            lines = await async_xrpl.get_trustlines(job['investor_address'])
+        except Exception:
+            self.stats['preflight_errors'] += 1
+            return job['amount'] * 10   # cannot tell: set the line as before
+        return trustline_limit_needed(lines, campaign['farmer_address'], campaign['token_currency'],
+                                      job['amount'])
+
+    def _finish_step(self, job, name, result):
+        engine_result = result.get('meta', {}).get('TransactionResult')
+        if engine_result != 'tesSUCCESS':
+            return self._save_step(job, name, status='failed', result=engine_result,
+                                   error=f"Transaction failed: {engine_result}")
+        return self._save_step(job, name, status='validated', result=engine_result,
+                               hash=result.get('hash'))
+
+    def _record_investment(self, job, campaign):
+        investment = None
+        if job.get('resumed'):
+            # a crash may have landed between inserting and marking the job
+            investment = next(iter(self.storage.find('investments', job_id=job['id'])), None)
+        if investment is None:
+            tokens = job['steps']['tokens']
+            failed = [name for name in STEPS if job['steps'][name]['status'] == 'failed']
+            investment = funding.record_investment(self.storage, {
+                'campaign_id': job['campaign_id'],
+                'investor_address': job['investor_address'],
+                'amount': job['amount'],
+                'token_amount': job['amount'] if tokens['status'] == 'validated' else 0,
+                'token_error': (f"{failed[0]} step: {job['steps'][failed[0]]['error']}"
+                                if failed else None),
+                'token_currency': campaign['token_currency'],
+                'token_id': None,
+                'job_id': job['id'],
+                'tx_hashes': {name: job['steps'][name]['hash'] for name in STEPS},
+                'created_at': datetime.now().isoformat(),
+            })
+        return investment
+
+    @contextlib.asynccontextmanager
+    async def _investor_lock(self, address):
+        entry = self._investor_locks.setdefault(address, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._investor_locks[address]
+
+    async def _run_steps(self, job, names, campaign):
+        """Run ``names`` in order, stopping at the first failed step."""
+        for name in names:
+            if job['steps'][name]['status'] in ('validated', 'skipped'):
+                continue
+            job = await self._run_step(job, name, campaign)
+            if job['steps'][name]['status'] == 'failed':
+                break
+        return job
+
+    async def _finish(self, job, fields):
+        job = await asyncio.to_thread(self._save, job, dict(fields, lease_owner=None))
+        self._seeds.pop(job['id'], None)
+        return job
+
+    async def run_job(self, job_id):
+        """Drive one job to 'completed', 'failed' or 'awaiting_seed' and return it.
+
+        None if another worker owns it.
+        """
+        job = await asyncio.to_thread(self._claim, job_id)
+        if job is None:
+            return None
+        try:
+            campaign = self.storage.get('campaigns', job['campaign_id'])
+            if not job['investor_address']:
+                job = await asyncio.to_thread(self._save, job, {'investor_address': self._investor(job).address})
+            job = await self._run_steps(job, STEPS[:1], campaign)
+            payment = job['steps']['payment']
+            if payment['status'] == 'failed':
+                return await self._finish(job, {'status': 'failed', 'error': payment['error']})
+            # the trustline preflight must see the tokens of this investor's earlier jobs
+            async with self._investor_lock(job['investor_address']):
+                # a failure here still records the investment: the farmer has the XRP
+                job = await self._run_steps(job, STEPS[1:], campaign)
+            investment = await asyncio.to_thread(self._record_investment, job, campaign)
+            return await self._finish(job, {'status': 'completed', 'investment_id': investment['id'],
+                                            'error': investment.get('token_error')})
+        except SeedMissing:
+            job = self.storage.get('investment_jobs', job_id)
+            return await asyncio.to_thread(self._save, job, {
+                'status': 'awaiting_seed', 'lease_owner': None,
+                'error': "The investor's seed is needed to continue; provide it again to resume"})
+        except LeaseLost:
+            return None
+        # any other error leaves the job 'running' under our lease; recover()
+        # picks it up again once the lease lapses
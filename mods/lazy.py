@@ -0,0 +1,38 @@
+"""Modules that are imported on first use.
+
+Importing ``xrpl`` costs most of a second, and the escrow, NFT, credential
+and investment stacks all pull it in. Entry points bind those modules with
+``lazy_import`` so that starting the CLI or the API, or running a command
+that only reads storage, does not pay for them:
+
+    escrow_utils = lazy_import('mods.escrow_utils')
+    escrow_utils.create_time_escrow(...)   # imported here, once
+
+The first attribute access goes through ``importlib.import_module`` (whose
+module locks make concurrent first use safe); later ones are a plain
+``getattr`` on the real module, so monkeypatching the module still works.
+"""
+import importlib
+
+
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = self.__dict__['_module'] = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -0,0 +1,140 @@
+"""Read-through cache for per-account ledger reads.
+
+Dashboards ask for the same account_info/account_lines many times a
+minute. ``account_cache`` keeps those answers keyed by
+(kind, address, ledger_index, endpoint); callers pass the URL they read
+from (as resolved by ``client_pool.resolve_url``), so the same account on
+two networks never shares an entry:
+
+* entries for a symbolic ledger ("validated", "current") live for ``ttl``
+  seconds - about one ledger close by default;
+* entries for a numbered ledger never go stale and only leave on LRU
+  eviction;
+* the pooled clients in mods/client_pool call ``invalidate`` for every
+  address a submitted or newly validated transaction touches, so our own
+  writes show up on the next read.
+
+Tune with ``AGRIVEST_CACHE_TTL`` (seconds, 0 disables caching) and
+``AGRIVEST_CACHE_SIZE`` (entries).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from mods.metrics import REGISTRY
+
+MISS = object()
+
+# transaction fields that name an account whose balances or lines can change
+_PARTY_FIELDS = ('Account', 'Destination', 'Owner', 'Subject', 'Issuer')
+_AMOUNT_FIELDS = ('Amount', 'LimitAmount', 'SendMax', 'DeliverMax')
+
+
+def affected_accounts(tx):
+    """Addresses whose account_info/account_lines a transaction can change."""
+    accounts = {tx[f] for f in _PARTY_FIELDS if isinstance(tx.get(f), str)}
+    for field in _AMOUNT_FIELDS:
+        amount = tx.get(field)
+        if isinstance(amount, dict) and amount.get('issuer'):
+            accounts.add(amount['issuer'])
+    return accounts
+
+
+class LedgerCache:
+    """Thread-safe LRU cache with a TTL for symbolic ledger indexes."""
+
+    def __init__(self, maxsize=4096, ttl=3.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()   # (kind, address, ledger_index, url) -> (expires, value, cost)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self.seconds_saved = 0.0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    @staticmethod
+    def _key(kind, address, ledger_index, url):
+        return kind, address, ledger_index, url.rstrip('/') if url else None
+
+    def get(self, kind, address, ledger_index='validated', url=None):
+        key = self._key(kind, address, ledger_index, url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < self.clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.seconds_saved += entry[2]
+            return entry[1]
+
+    def put(self, kind, address, ledger_index, value, cost=0.0, url=None):
+        if not self.enabled:
+            return
+        key = self._key(kind, address, ledger_index, url)
+        expires = self.clock() + self.ttl if isinstance(ledger_index, str) else float('inf')
+        with self._lock:
+            self._entries[key] = (expires, value, cost)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def cached(self, kind, address, ledger_index, fetch, url=None):
+        """Return the cached value or call ``fetch()`` and remember what it returns."""
+        value = self.get(kind, address, ledger_index, url) if self.enabled else MISS
+        if value is MISS:
+            started = time.perf_counter()
+            value = fetch()
+            self.put(kind, address, ledger_index, value, time.perf_counter() - started, url)
+        return value
+
+    async def acached(self, kind, address, ledger_index, fetch, url=None):
+        """``cached`` for a coroutine function ``fetch``."""
+        value = self.get(kind, address, ledger_index, url) if self.enabled else MISS
+        if value is MISS:
+            started = time.perf_counter()
+            value = await fetch()
+            self.put(kind, address, ledger_index, value, time.perf_counter() - started, url)
+        return value
+
+    def invalidate(self, *addresses):
+        """Drop every entry for the given addresses, on every endpoint."""
+        addresses = set(addresses)
+        with self._lock:
+            stale = [key for key in self._entries if key[1] in addresses]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self._entries),
+            'seconds_saved': round(self.seconds_saved, 4),
+        }
+
+
+account_cache = LedgerCache(
+    maxsize=int(os.environ.get('AGRIVEST_CACHE_SIZE', 4096)),
+    ttl=float(os.environ.get('AGRIVEST_CACHE_TTL', 3.0)),
+)
+REGISTRY.collector('ledger_cache_lookups', 'Cached account reads by outcome', ('outcome',),
+                   lambda: {('hit',): account_cache.hits, ('miss',): account_cache.misses})
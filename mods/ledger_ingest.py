@@ -0,0 +1,278 @@
+"""Follow the ledger over WebSocket and apply what happens to our records.
+
+``LedgerIngestor`` subscribes to every account the platform knows about
+(campaign farmers, investors, microloan parties) and handles each
+validated transaction that touches them once:
+
+* EscrowFinish / EscrowCancel on a microloan's escrow -> the loan becomes
+  'completed' / 'cancelled', also when the farmer or investor signed it in
+  their own wallet;
+* EscrowCreate matching a microloan                   -> ``escrow_ledger``;
+* an investment's payment                             -> ``payment_ledger``;
+* the farmer issuing tokens an investment is owed     -> ``token_amount``
+  and the campaign's ``tokens_issued``.
+
+Callables in ``listeners`` get ``(tx, meta, ledger_index)`` for every
+transaction ingested for the first time (the platform's credential index
+follows credentials this way). They run before the transaction is recorded,
+so one that raises leaves it unrecorded and the back-fill after the
+reconnect delivers it again; a listener may therefore see a transaction
+twice and must not mind.
+
+Each transaction lands in ``ledger_events`` (keyed by hash, so replays are
+no-ops) in the same write as its effects. ``ingest_checkpoints`` remembers
+the last ledger seen in full and is written once per ledger close; after a
+disconnect the ingestor re-subscribes and back-fills from there with
+``account_tx`` before following the stream again. Storage reads and writes
+run in a thread, off the event loop.
+"""
+import asyncio
+import time
+from datetime import datetime
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.models.requests import AccountTx, StreamParameter, Subscribe
+
+from mods import funding
+from mods.client_pool import resolve_ws_url
+from mods.pagination import apaginate
+
+# collection -> indexed fields holding addresses we follow
+WATCHED_FIELDS = {
+    'campaigns': ('farmer_address',),
+    'investments': ('investor_address',),
+    'microloans': ('farmer_address', 'investor_address'),
+}
+
+
+def _unpack(message):
+    """``(tx, meta, hash, ledger_index)`` from a stream message or an account_tx entry (API v1 or v2)."""
+    tx = message.get('tx_json') or message.get('transaction') or message.get('tx') or {}
+    tx_hash = message.get('hash') or tx.get('hash')
+    ledger_index = message.get('ledger_index') or tx.get('ledger_index')
+    return tx, message.get('meta') or {}, tx_hash, ledger_index
+
+
+def _amount_value(amount):
+    return float(amount['value']) if isinstance(amount, dict) else int(amount) / 1_000_000
+
+
+class LedgerIngestor:
+    """Keeps microloan and investment status in step with validated ledgers."""
+
+    def __init__(self, storage, url=None, idle_timeout=20.0, reconnect_delay=1.0,
+                 max_reconnect_delay=30.0, backfill_concurrency=8):
+        self.storage = storage
+        self.url = resolve_ws_url(url)
+        self.idle_timeout = idle_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.backfill_concurrency = backfill_concurrency
+        self.subscribed = set()
+        self.connected = asyncio.Event()
+        self._last_message = 0.0
+        self.listeners = []
+        self.stats = {'connects': 0, 'ingested': 0, 'duplicates': 0, 'backfilled': 0,
+                      'ledger_index': None}
+        self._checkpoint_id = None
+        self._task = None
+
+    # -- accounts and checkpoint ------------------------------------------------
+
+    def watched_accounts(self):
+        accounts = set()
+        for collection, fields in WATCHED_FIELDS.items():
+            for field in fields:
+                accounts |= self.storage.distinct(collection, field)
+        return accounts
+
+    def checkpoint(self):
+        """Last ledger whose transactions have all been ingested, or None."""
+        saved = self.storage.all('ingest_checkpoints')
+        return saved[0]['ledger_index'] if saved else None
+
+    def _save_checkpoint(self, ledger_index):
+        if self.stats['ledger_index'] is not None and ledger_index <= self.stats['ledger_index']:
+            return
+        if self._checkpoint_id is None:
+            saved = self.storage.all('ingest_checkpoints')
+            if not saved:
+                saved = [self.storage.insert('ingest_checkpoints', {'url': self.url, 'ledger_index': ledger_index})]
+            self._checkpoint_id = saved[0]['id']
+            if ledger_index <= saved[0]['ledger_index']:
+                self.stats['ledger_index'] = saved[0]['ledger_index']
+                return
+        self.storage.update('ingest_checkpoints', self._checkpoint_id, {'ledger_index': ledger_index})
+        self.stats['ledger_index'] = ledger_index
+
+    # -- applying one transaction -----------------------------------------------
+
+    def ingest(self, tx, meta, tx_hash, ledger_index):
+        """Record a validated transaction and its effects; False if it was seen before.
+
+        Listeners run first: if one raises, nothing is recorded and the
+        exception propagates, so the transaction is delivered again.
+        """
+        if self.storage.count('ledger_events', hash=tx_hash):
+            self.stats['duplicates'] += 1
+            return False
+        for listener in self.listeners:
+            listener(tx, meta, ledger_index)
+        result = meta.get('TransactionResult')
+        with self.storage.atomic():
+            # reads before writes (see IndexedStorage.atomic)
+            if self.storage.count('ledger_events', hash=tx_hash):
+                self.stats['duplicates'] += 1
+                return False
+            updates = self._effects(tx, tx_hash, ledger_index) if result == 'tesSUCCESS' else []
+            for collection, record_id, fields, expect in updates:
+                self.storage.update(collection, record_id, fields, expect=expect)
+            self.storage.insert('ledger_events', {
+                'hash': tx_hash,
+                'ledger_index': ledger_index,
+                'type': tx.get('TransactionType'),
+                'account': tx.get('Account'),
+                'destination': tx.get('Destination'),
+                'result': result,
+                'applied': [[collection, record_id] for collection, record_id, _, _ in updates],
+            })
+        self.stats['ingested'] += 1
+        return True
+
+    def _effects(self, tx, tx_hash, ledger_index):
+        """``[(collection, id, fields, expect), ...]`` this transaction implies."""
+        kind = tx.get('TransactionType')
+        if kind in ('EscrowFinish', 'EscrowCancel'):
+            status, stamp = ('completed', 'completed_at') if kind == 'EscrowFinish' else ('cancelled', 'cancelled_at')
+            return [('microloans', loan['id'],
+                     {'status': status, stamp: datetime.now().isoformat(), 'settled_ledger': ledger_index,
+                      'settled_tx': tx_hash}, {'status': 'active'})
+                    for loan in self._loans(tx.get('Owner'), tx.get('OfferSequence'))
+                    if loan['status'] == 'active']
+        if kind == 'EscrowCreate':
+            sequence = tx.get('TicketSequence') or tx.get('Sequence')
+            return [('microloans', loan['id'], {'escrow_ledger': ledger_index, 'escrow_tx': tx_hash}, None)
+                    for loan in self._loans(tx.get('Account'), sequence)
+                    if loan.get('escrow_ledger') is None]
+        if kind == 'Payment':
+            return self._payment_effects(tx, tx_hash, ledger_index)
+        return []
+
+    def _loans(self, investor, sequence):
+        return [loan for loan in self.storage.find('microloans', investor_address=investor)
+                if sequence is not None and int(loan.get('escrow_sequence') or -1) == int(sequence)]
+
+    def _payment_effects(self, tx, tx_hash, ledger_index):
+        amount = tx.get('DeliverMax') or tx.get('Amount')
+        updates = []
+        for investment in self.storage.find('investments', investor_address=tx.get('Account')):
+            if (investment.get('tx_hashes') or {}).get('payment') == tx_hash \
+                    and investment.get('payment_ledger') is None:
+                updates.append(('investments', investment['id'], {'payment_ledger': ledger_index}, None))
+        if not isinstance(amount, dict) or amount.get('issuer') != tx.get('Account'):
+            return updates
+        # the farmer issuing campaign tokens to an investor who has not received them yet
+        value = _amount_value(amount)
+        for investment in self.storage.find('investments', investor_address=tx.get('Destination')):
+            campaign = self.storage.get('campaigns', investment['campaign_id'])
+            if (campaign and campaign['farmer_address'] == tx['Account']
+                    and investment.get('token_currency') == amount['currency']
+                    and not investment.get('token_amount') and investment['amount'] == value):
+                totals = dict(funding.empty_funding(), **(campaign.get('funding') or {}))
+                totals['tokens_issued'] += investment['amount']
+                updates.append(('investments', investment['id'],
+                                {'token_amount': investment['amount'], 'tokens_tx_hash': tx_hash},
+                                {'token_amount': investment.get('token_amount')}))
+                updates.append(('campaigns', campaign['id'], {'funding': totals},
+                                {'funding': campaign.get('funding')}))
+                break
+        return updates
+
+    # -- the stream ---------------------------------------------------------------
+
+    async def backfill(self, client, accounts, from_ledger):
+        """Ingest every validated transaction since ``from_ledger`` for ``accounts``."""
+        slots = asyncio.Semaphore(self.backfill_concurrency)
+
+        async def one(account):
+            async with slots:
+                request = AccountTx(account=account, ledger_index_min=from_ledger,
+                                    ledger_index_max=-1, forward=True)
+                async for entry in apaginate(client, request):
+                    if await asyncio.to_thread(self.ingest, *_unpack(entry)):
+                        self.stats['backfilled'] += 1
+
+        await asyncio.gather(*(one(account) for account in sorted(accounts)))
+
+    async def _subscribe(self, client, accounts):
+        if accounts:
+            await client.request(Subscribe(accounts=sorted(accounts)))
+            self.subscribed |= accounts
+
+    async def _session(self, client):
+        self.subscribed = set()
+        accounts = await asyncio.to_thread(self.watched_accounts)
+        await client.request(Subscribe(streams=[StreamParameter.LEDGER]))
+        await self._subscribe(client, accounts)
+        resume_from = await asyncio.to_thread(self.checkpoint)
+        if resume_from is not None:
+            await self.backfill(client, accounts, resume_from + 1)
+        self.connected.set()
+        self._last_message = time.monotonic()
+        follower = asyncio.create_task(self._follow(client))
+        try:
+            # the client's iterator never ends on a dropped connection, so check every second
+            while not follower.done() and client.is_open():
+                await asyncio.wait({follower}, timeout=1.0)
+                if time.monotonic() - self._last_message > self.idle_timeout:
+                    return  # silent connection: reconnect and back-fill
+        finally:
+            follower.cancel()
+            await asyncio.gather(follower, return_exceptions=True)
+        if follower.done() and not follower.cancelled():
+            follower.result()
+
+    async def _follow(self, client):
+        async for message in client:
+            self._last_message = time.monotonic()
+            new_accounts = await asyncio.to_thread(self.handle_message, message)
+            await self._subscribe(client, new_accounts)
+
+    def handle_message(self, message):
+        """Apply one stream message; returns the accounts still to subscribe to."""
+        kind = message.get('type')
+        if kind == 'transaction' and message.get('validated'):
+            self.ingest(*_unpack(message))
+        elif kind == 'ledgerClosed':
+            # rippled publishes ledgerClosed before that ledger's transactions,
+            # so everything up to the previous ledger has arrived
+            self._save_checkpoint(message['ledger_index'] - 1)
+            # pick up farmers and investors added since we subscribed
+            return self.watched_accounts() - self.subscribed
+        return set()
+
+    async def run(self):
+        """Follow the ledger until cancelled, reconnecting with backoff."""
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with AsyncWebsocketClient(self.url) as client:
+                    self.stats['connects'] += 1
+                    delay = self.reconnect_delay
+                    await self._session(client)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Ledger stream error: {e}")
+            self.connected.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
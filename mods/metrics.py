@@ -0,0 +1,199 @@
+"""Process-wide counters and latency histograms in the Prometheus text format.
+
+The hot paths record into the metrics defined at the bottom of this
+module:
+
+* every JSON-RPC call through mods/client_pool  -> ``xrpl_rpc_seconds``
+  by method, ``xrpl_rpc_errors_total`` by method and error;
+* every submission                              -> ``xrpl_engine_results_total``
+  (preliminary result) and, once validated, ``xrpl_submit_to_validated_seconds``
+  and ``xrpl_transaction_results_total`` by path;
+* the storage backends                          -> ``storage_seconds`` by
+  backend and operation, ``index_refresh_seconds`` by kind;
+* the API                                       -> ``http_request_seconds``.
+
+Caches report through collectors (``REGISTRY.collector``) that are read at
+scrape time. ``render()`` is what GET /metrics serves; ``summary()`` and
+``totals()`` are what the CLI prints.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labels, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += seconds
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def snapshot(self):
+        """``{labels: (count, sum, p50, p95)}``; quantiles are bucket upper bounds."""
+        with self._lock:
+            series = {labels: list(s) for labels, s in self._series.items()}
+        result = {}
+        for labels, s in series.items():
+            count = sum(s[:-1])
+            result[labels] = (count, s[-1], self._quantile(s, count, 0.5), self._quantile(s, count, 0.95))
+        return result
+
+    def _quantile(self, series, count, q):
+        seen = 0
+        for bound, n in zip(self.buckets + (float('inf'),), series):
+            seen += n
+            if seen >= q * count:
+                return bound
+        return float('inf')
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(s)) for labels, s in self._series.items())
+        for labels, s in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), s):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_labels(self.labels + ("le",), labels + (le,))} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, labels)} {s[-1]}')
+            lines.append(f'{self.name}_count{_labels(self.labels, labels)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []   # (name, help, labels, fn() -> {label values: value})
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, name, help, labels, fn):
+        """A gauge whose values ``fn()`` returns at scrape time."""
+        self.collectors.append((name, help, tuple(labels), fn))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for name, help, labels, fn in self.collectors:
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+            for values, value in sorted(fn().items()):
+                lines.append(f'{name}{_labels(labels, values)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Rows of ``(metric, labels, count, mean seconds, p50, p95)`` for every histogram series."""
+        rows = []
+        for metric in self.metrics:
+            if isinstance(metric, Histogram):
+                for labels, (count, total, p50, p95) in sorted(metric.snapshot().items()):
+                    if count:
+                        rows.append((metric.name, ','.join(map(str, labels)), count, total / count, p50, p95))
+        return rows
+
+    def totals(self):
+        """``{'name{labels}': value}`` for every counter and collector value."""
+        totals = {}
+        for metric in self.metrics:
+            if isinstance(metric, Counter):
+                for labels, value in sorted(metric._values.items()):
+                    totals[metric.name + _labels(metric.labels, labels)] = value
+        for name, _, labels, fn in self.collectors:
+            for values, value in sorted(fn().items()):
+                totals[name + _labels(labels, values)] = value
+        return totals
+
+
+REGISTRY = Registry()
+render = REGISTRY.render
+summary = REGISTRY.summary
+totals = REGISTRY.totals
+
+RPC_SECONDS = REGISTRY.histogram(
+    'xrpl_rpc_seconds', 'Round trip of one JSON-RPC request', ('method',))
+RPC_ERRORS = REGISTRY.counter(
+    'xrpl_rpc_errors_total', 'JSON-RPC requests answered with an error', ('method', 'error'))
+ENGINE_RESULTS = REGISTRY.counter(
+    'xrpl_engine_results_total', 'Preliminary engine results of submitted transactions', ('result',))
+SUBMIT_TO_VALIDATED = REGISTRY.histogram(
+    'xrpl_submit_to_validated_seconds', 'From submission until a validated result is known', ('path',))
+TX_RESULTS = REGISTRY.counter(
+    'xrpl_transaction_results_total', 'Final results of our transactions', ('path', 'result'))
+STORAGE_SECONDS = REGISTRY.histogram(
+    'storage_seconds', 'Storage backend operations', ('backend', 'op'))
+INDEX_REFRESH_SECONDS = REGISTRY.histogram(
+    'index_refresh_seconds', 'Bringing the in-memory indexes up to date', ('kind',))
+HTTP_SECONDS = REGISTRY.histogram(
+    'http_request_seconds', 'API requests, including response serialization', ('method', 'route', 'status'))
+
+
+def timed(histogram, *labels):
+    """Decorator: observe every call's duration in ``histogram``."""
+    def wrap(fn):
+        def timed_fn(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, *labels)
+        timed_fn.__name__, timed_fn.__doc__, timed_fn.__wrapped__ = fn.__name__, fn.__doc__, fn
+        return timed_fn
+    return wrap
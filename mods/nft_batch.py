@@ -1,78 +1,68 @@
 import xrpl
-from xrpl.clients import JsonRpcClient
-from xrpl.wallet import Wallet
 from xrpl.models.requests import AccountNFTs
+from xrpl.models.transactions import NFTokenMint
+from xrpl.wallet import Wallet
+from mods.client_pool import get_client
+from mods.pagination import paginate
+from mods.ticket_batch import MAX_TICKETS, create_tickets, run_with_tickets, unused_tickets
 
 testnet_url = "https://s.altnet.rippletest.net:51234"
 
-def batch_mint(seed, uri, flags, transfer_fee, taxon, count):
-    """batch_mint"""
-    wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
 
-    acct_info = xrpl.models.requests.account_info.AccountInfo(
-        account=wallet.classic_address,
-        ledger_index='validated'
-    )
-    get_seq_request = client.request(acct_info)
-    current_sequence=get_seq_request.result['account_data']['Sequence']
-    ticket_tx=xrpl.models.transactions.TicketCreate(
-        account=wallet.address,
-        ticket_count=int(count),
-        sequence=current_sequence  
-    )
-    
-    response=xrpl.transaction.submit_and_wait(ticket_tx,client,wallet)
+def _mint_with_tickets(client, wallet, tickets, mint_fields, window, retries):
+    """Mint one NFT per ticket; returns ({ticket: final result}, {ticket: last error})."""
+    mints = {ticket: NFTokenMint(**mint_fields) for ticket in tickets}
+    results, errors, _ = run_with_tickets(client, wallet, mints, window, retries)
+    return results, errors
+
 
-    ticket_numbers_req=xrpl.models.requests.AccountObjects(
-        account=wallet.address,
-        type='ticket'
-    )
-    ticket_response=client.request(ticket_numbers_req)
-    
-    tickets=[int(0)] * int(count)
-    acct_objs= ticket_response.result['account_objects']
-    for x in range(int(count)):
-        tickets[x] = acct_objs[x]['TicketSequence']
+def batch_mint(seed, uri, flags, transfer_fee, taxon, count, window=32, retries=2):
+    """batch_mint
+
+    Creates tickets, signs every NFTokenMint up front and submits them
+    concurrently (at most `window` in flight), then confirms them in bulk
+    from validated ledgers. A batch takes a few ledger closes rather than one
+    per NFT. Mints that expire or fail locally are re-signed on the same
+    ticket up to `retries` times; tickets left unused are reported.
+    """
+    wallet=Wallet.from_seed(seed)
+    client=get_client(testnet_url)
+    mint_fields = {
+        'account': wallet.classic_address,
+        'uri': xrpl.utils.str_to_hex(uri),
+        'flags': int(flags),
+        'transfer_fee': int(transfer_fee),
+        'nftoken_taxon': int(taxon),
+    }
     reply=""
     create_count=0
-    # Define the mint transaction
-    for x in range(int(count)):
-        mint_tx=xrpl.models.transactions.NFTokenMint(
-            account=wallet.classic_address,
-            uri=xrpl.utils.str_to_hex(uri),
-            flags=int(flags),
-            transfer_fee=int(transfer_fee),
-            ticket_sequence=tickets[x],
-            sequence=0,
-            nftoken_taxon=int(taxon)
-        )
-        # Submit the transaction and get results
+    unused=[]
+    remaining=int(count)
+    while remaining > 0:
         try:
-            response=xrpl.transaction.submit_and_wait(mint_tx,client,
-                wallet)
-            create_count+=1 
+            tickets = create_tickets(client, wallet, min(remaining, MAX_TICKETS))
         except xrpl.transaction.XRPLReliableSubmissionException as e:
             reply+=f"Submit failed: {e}\n"
+            break
+        remaining -= len(tickets)
+        results, errors = _mint_with_tickets(client, wallet, tickets, mint_fields, window, retries)
+        for ticket in tickets:
+            code = results.get(ticket) or errors.get(ticket)
+            if code == 'tesSUCCESS':
+                create_count+=1
+            else:
+                reply+=f"Submit failed: ticket {ticket}: {code}\n"
+        unused += unused_tickets(client, wallet, tickets)
     reply+=str(create_count)+' NFTs generated.'
+    if unused:
+        reply+=f"\nUnused tickets: {', '.join(map(str, unused))}"
     return reply
 
 
-def get_batch(seed, account):
-    """get_batch"""
-    client=JsonRpcClient(testnet_url)
-    acct_nfts=AccountNFTs(
-        account=account,
-        limit=400
-    )
-    response=client.request(acct_nfts)
-    responses=response.result
-    while(acct_nfts.marker):
-        acct_nfts=AccountNFTs(
-            account=account,
-            limit=400,
-            marker=acct_nfts.marker
-        )
-        response=client.request(acct_nfts)
-        responses+=response.result
-    return responses
\ No newline at end of file
+def get_batch(seed, account, prefetch=1):
+    """get_batch
+
+    Lazily yields every NFT held by `account`, one page of 400 at a time.
+    """
+    client=get_client(testnet_url)
+    return paginate(client, AccountNFTs(account=account, limit=400), prefetch=prefetch)
@@ -1,33 +1,35 @@
-import xrpl
-from xrpl.clients import JsonRpcClient
 from xrpl.models.transactions import (
     NFTokenMint,
     NFTokenBurn,
     NFTokenCreateOffer,
-    NFTokenAcceptOffer,
 )
 from xrpl.models.requests import AccountNFTs
 from xrpl.utils import str_to_hex
-from xrpl.transaction import autofill
+from mods.client_pool import get_client
+from mods.pagination import paginate
+from mods.tx_prepare import get_preparer
 
 TESTNET_URL = "https://s.devnet.rippletest.net:51234"
 
-def prepare_nft_mint_tx(account_address, uri, taxon=0):
-    mint_tx = NFTokenMint(
+def _mint_tx(account_address, uri, taxon):
+    return NFTokenMint(
         account=account_address,
         uri=str_to_hex(uri),
         flags=8, # Transferable
         nftoken_taxon=taxon,
     )
-    client = JsonRpcClient(TESTNET_URL)
-    autofilled = autofill(mint_tx, client)
-    return autofilled.to_xrpl()
+
+def prepare_nft_mint_tx(account_address, uri, taxon=0):
+    return get_preparer(TESTNET_URL).prepare(_mint_tx(account_address, uri, taxon))
+
+def prepare_nft_mint_txs(account_address, uris, taxon=0):
+    """Unsigned mints for every URI, on consecutive sequences, from one fee/ledger/account lookup"""
+    return get_preparer(TESTNET_URL).prepare_many(_mint_tx(account_address, uri, taxon) for uri in uris)
 
 def get_nfts_for_address(address):
-    client = JsonRpcClient(TESTNET_URL)
-    req = AccountNFTs(account=address)
-    resp = client.request(req)
-    return resp.result.get("account_nfts", [])
+    client = get_client(TESTNET_URL)
+    req = AccountNFTs(account=address, limit=400)
+    return list(paginate(client, req))
 
 def prepare_nft_transfer_tx(owner_address, dest_address, nft_id):
     # Create an offer to give (sell for 0) the NFT to the dest_address
@@ -37,15 +39,11 @@ def prepare_nft_transfer_tx(owner_address, dest_address, nft_id):
         amount="0", # 0 XRP = free transfer
         destination=dest_address,
     )
-    client = JsonRpcClient(TESTNET_URL)
-    autofilled = autofill(offer_tx, client)
-    return autofilled.to_xrpl()
+    return get_preparer(TESTNET_URL).prepare(offer_tx)
 
 def prepare_nft_burn_tx(owner_address, nft_id):
     burn_tx = NFTokenBurn(
         account=owner_address,
         nftoken_id=nft_id,
     )
-    client = JsonRpcClient(TESTNET_URL)
-    autofilled = autofill(burn_tx, client)
-    return autofilled.to_xrpl()
\ No newline at end of file
+    return get_preparer(TESTNET_URL).prepare(burn_tx)
\ No newline at end of file
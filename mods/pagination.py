@@ -0,0 +1,115 @@
+"""Lazy iteration over XRPL's marker-paginated requests.
+
+``AccountNFTs``, ``AccountObjects``, ``AccountLines`` and ``AccountTx``
+return one page at a time plus a ``marker`` for the next one. ``paginate``
+follows the markers from the *response* and yields items one by one, so an
+account with tens of thousands of NFTs is scanned with at most
+``prefetch + 1`` pages in memory. Later pages are pinned to the ledger the
+first page came from, since a marker is only valid against that ledger.
+"""
+import queue
+import threading
+
+from xrpl.asyncio.clients.exceptions import XRPLRequestFailureException
+from xrpl.models.requests import AccountLines, AccountNFTs, AccountObjects, AccountTx
+
+# request type -> key of the item list in its result
+ITEM_KEYS = {
+    AccountNFTs: 'account_nfts',
+    AccountObjects: 'account_objects',
+    AccountLines: 'lines',
+    AccountTx: 'transactions',
+}
+
+_DONE = object()
+
+
+def _next_request(request, result):
+    fields = dict(request.to_dict(), marker=result['marker'])
+    if not isinstance(request, AccountTx) and 'ledger_index' in result:
+        fields['ledger_index'] = result['ledger_index']
+    return type(request).from_dict(fields)
+
+
+def _page_items(request, response, first):
+    """Items of one page; an error on the first page means "nothing to list"."""
+    if not response.is_successful():
+        if first:
+            return [], None
+        raise XRPLRequestFailureException(response.result)
+    result = response.result
+    return result.get(ITEM_KEYS[type(request)], []), result
+
+
+def iter_pages(client, request):
+    """Yield the item list of each page in turn."""
+    first = True
+    while True:
+        items, result = _page_items(request, client.request(request), first)
+        yield items
+        if not result or not result.get('marker'):
+            return
+        request = _next_request(request, result)
+        first = False
+
+
+def _prefetched(pages, prefetch):
+    """Fetch up to ``prefetch`` pages ahead on a background thread."""
+    buffer = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False  # the consumer went away
+
+    def fetch():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+            put(_DONE)
+        except Exception as e:
+            put(e)
+
+    threading.Thread(target=fetch, daemon=True).start()
+    try:
+        while True:
+            page = buffer.get()
+            if page is _DONE:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        stop.set()
+
+
+def paginate(client, request, prefetch=0):
+    """Yield every item of a marker-paginated request, fetching pages lazily.
+
+    With ``prefetch`` > 0 the next pages are requested while the caller is
+    still working through the current one.
+    """
+    pages = iter_pages(client, request)
+    if prefetch:
+        pages = _prefetched(pages, prefetch)
+    for items in pages:
+        yield from items
+
+
+async def apaginate(client, request):
+    """Async counterpart of ``paginate`` for ``AsyncJsonRpcClient``."""
+    first = True
+    while True:
+        items, result = _page_items(request, await client.request(request), first)
+        for item in items:
+            yield item
+        if not result or not result.get('marker'):
+            return
+        request = _next_request(request, result)
+        first = False
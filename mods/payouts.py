@@ -0,0 +1,275 @@
+"""Pay a harvest out to every investor of a campaign, pro rata, exactly once.
+
+``PayoutEngine.plan`` splits an amount of XRP (or the campaign's token)
+over the campaign's investors in proportion to what each invested, in
+whole drops (or millionths of a token) with the remainder going to the
+largest fractions, so the shares add up to the amount exactly. The plan
+is stored as one ``payouts`` record plus a ``payout_transfers`` record
+per investor, in one write.
+
+``run`` pays the pending transfers in waves of up to 250 from the farmer's
+wallet (mods/ticket_batch): each transfer is given its own ticket, its
+signed hash and blob are stored before it is submitted, and results are
+written back once per wave. A ticket can only be used once, so even when
+a transfer is re-signed after expiring, or a crashed run is resumed, at
+most one payment per recipient can ever apply. A run holds a lease on the
+payout, so a second run (another worker, a repeated request) does nothing
+until the first one finishes or its lease lapses.
+"""
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+from xrpl.ledger import get_latest_validated_ledger_sequence
+from xrpl.models.amounts import IssuedCurrencyAmount
+from xrpl.models.requests import SubmitOnly, Tx
+from xrpl.models.transactions import Payment
+from xrpl.wallet import Wallet
+
+from mods import ticket_batch
+from mods.client_pool import get_client
+
+UNITS = 1_000_000        # drops per XRP; token shares are rounded to millionths too
+LEDGER_OFFSET = 20       # LastLedgerSequence - validated ledger at signing (autofill's offset)
+
+
+def pro_rata(total_units, weights):
+    """Split ``total_units`` over ``{key: weight}``; largest remainders get the leftover units."""
+    whole = sum(weights.values())
+    if whole <= 0:
+        return {}
+    shares, remainders = {}, []
+    for key, weight in weights.items():
+        shares[key], remainder = divmod(total_units * weight, whole)
+        remainders.append((-remainder, key))
+    for _, key in sorted(remainders)[:total_units - sum(shares.values())]:
+        shares[key] += 1
+    return shares
+
+
+def _to_units(amount):
+    return int((Decimal(str(amount)) * UNITS).to_integral_value())
+
+
+def _from_units(units):
+    return format(Decimal(units) / UNITS, 'f')
+
+
+class PayoutEngine:
+    """Plans and runs pro-rata payouts over ``payouts``/``payout_transfers``."""
+
+    def __init__(self, storage, url=None, window=32, retries=2, poll_interval=None, lease_seconds=600):
+        self.storage = storage
+        self.url = url
+        self.window = window
+        self.retries = retries
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+
+    # -- planning -------------------------------------------------------------
+
+    def plan(self, campaign_id, amount, asset='XRP', key=None):
+        """Store a payout of ``amount`` XRP (or campaign tokens with asset='token').
+
+        With ``key`` set, planning the same key again returns the existing
+        payout instead of a second one. Returns None for an unknown campaign
+        or one without investments.
+        """
+        existing = self._planned(campaign_id, key)
+        if existing is not None:
+            return existing
+        campaign = self.storage.get('campaigns', campaign_id)
+        investments = self.storage.find('investments', campaign_id=campaign_id)
+        if not campaign or not investments:
+            return None
+        if asset == 'token' and not campaign.get('token_currency'):
+            raise ValueError("Campaign has no token")
+        weights = defaultdict(int)
+        for investment in investments:
+            weights[investment['investor_address']] += _to_units(investment['amount'])
+        shares = pro_rata(_to_units(amount), weights)
+        now = datetime.now().isoformat()
+        with self.storage.atomic():
+            # again under the write lock, before the first insert (see IndexedStorage.atomic)
+            existing = self._planned(campaign_id, key)
+            if existing is not None:
+                return existing
+            payout = self.storage.insert('payouts', {
+                'campaign_id': campaign_id,
+                'key': key,
+                'asset': asset,
+                'currency': campaign.get('token_currency') if asset == 'token' else 'XRP',
+                'issuer': campaign['farmer_address'] if asset == 'token' else None,
+                'amount': _from_units(_to_units(amount)),
+                'recipients': len(shares),
+                'status': 'planned',
+                'lease_expires': 0,
+                'counts': {'pending': len(shares)},
+                'created_at': now,
+                'updated_at': now,
+            })
+            for address, units in sorted(shares.items()):
+                self.storage.insert('payout_transfers', {
+                    'payout_id': payout['id'],
+                    'investor_address': address,
+                    'units': units,
+                    'amount': _from_units(units),
+                    'status': 'pending' if units else 'skipped',
+                    'ticket': None,
+                    'hash': None,
+                    'tx_blob': None,
+                    'last_ledger_sequence': None,
+                    'result': None,
+                    'attempts': 0,
+                })
+        return payout
+
+    def _planned(self, campaign_id, key):
+        """The payout already planned under ``key``, or None."""
+        if key is None:
+            return None
+        for payout in self.storage.find('payouts', campaign_id=campaign_id):
+            if payout.get('key') == key:
+                return payout
+        return None
+
+    def status(self, payout_id):
+        payout = self.storage.get('payouts', payout_id)
+        if payout is None:
+            return None
+        transfers = self.storage.find('payout_transfers', payout_id=payout_id)
+        failed = [{'investor_address': t['investor_address'], 'amount': t['amount'], 'result': t['result']}
+                  for t in transfers if t['status'] == 'failed']
+        return dict(payout, failed=failed)
+
+    # -- running --------------------------------------------------------------
+
+    def _payment(self, payout, wallet, transfer):
+        if payout['asset'] == 'token':
+            amount = IssuedCurrencyAmount(currency=payout['currency'], issuer=payout['issuer'],
+                                          value=transfer['amount'])
+        else:
+            amount = str(transfer['units'])
+        return Payment(account=wallet.address, destination=transfer['investor_address'], amount=amount)
+
+    def run(self, payout_id, farmer_seed, wave=ticket_batch.MAX_TICKETS):
+        """Pay every pending transfer once (resuming submitted ones first); returns the payout.
+
+        Returns the payout unchanged if another run holds it.
+        """
+        payout = self.storage.get('payouts', payout_id)
+        wallet = Wallet.from_seed(farmer_seed)
+        if payout['issuer'] is not None and payout['issuer'] != wallet.address:
+            raise ValueError("Only the campaign's farmer can issue its tokens")
+        if self._claim(payout) is None:
+            return payout
+        try:
+            client = get_client(self.url)
+            self._resume(client, self.storage.find('payout_transfers', payout_id=payout_id,
+                                                   status='submitted'))
+            pending = self.storage.find('payout_transfers', payout_id=payout_id, status='pending')
+            for start in range(0, len(pending), wave):
+                self._run_wave(client, payout, wallet, pending[start:start + wave])
+                self._set_status(payout_id, 'running')   # progress, and renews the lease
+        finally:
+            payout = self._set_status(payout_id)
+        return payout
+
+    def _claim(self, payout):
+        if payout['status'] == 'running' and payout['lease_expires'] >= time.time():
+            return None
+        return self.storage.update('payouts', payout['id'], {
+            'status': 'running', 'lease_expires': time.time() + self.lease_seconds,
+        }, expect={'status': payout['status'], 'lease_expires': payout['lease_expires']})
+
+    def _run_wave(self, client, payout, wallet, transfers):
+        fresh = [t for t in transfers if t['ticket'] is None]
+        if fresh:
+            tickets = ticket_batch.create_tickets(client, wallet, len(fresh))
+            self._write([(t['id'], {'ticket': ticket}) for t, ticket in zip(fresh, tickets)])
+            for transfer, ticket in zip(fresh, tickets):
+                transfer['ticket'] = ticket
+        by_ticket = {t['ticket']: t for t in transfers}
+        txs = {ticket: self._payment(payout, wallet, t) for ticket, t in by_ticket.items()}
+
+        def on_signed(signed):
+            self._write([(by_ticket[ticket]['id'], {
+                'status': 'submitted', 'hash': tx.get_hash(), 'tx_blob': tx.blob(),
+                'last_ledger_sequence': tx.last_ledger_sequence,
+                'attempts': by_ticket[ticket]['attempts'] + 1,
+            }) for ticket, tx in signed.items()])
+
+        results, errors, hashes = ticket_batch.run_with_tickets(
+            client, wallet, txs, self.window, self.retries, poll_interval=self.poll_interval,
+            on_signed=on_signed)
+        updates = []
+        for ticket, transfer in by_ticket.items():
+            if ticket in results:
+                updates.append((transfer['id'], self._outcome(results[ticket], hashes[ticket])))
+            elif errors.get(ticket, '').startswith('tem'):
+                updates.append((transfer['id'], {'status': 'failed', 'result': errors[ticket]}))
+            else:
+                # expired or not applied: the ticket is still unused, so retrying is safe
+                updates.append((transfer['id'], {'status': 'pending', 'result': errors.get(ticket)}))
+        self._write(updates)
+
+    def _outcome(self, result, tx_hash):
+        # a tec result used the ticket up, so the payment can never be retried
+        return {'status': 'validated' if result == 'tesSUCCESS' else 'failed',
+                'result': result, 'hash': tx_hash, 'tx_blob': None}
+
+    def _resume(self, client, transfers):
+        """Settle transfers a previous run signed and maybe submitted."""
+        if not transfers:
+            return
+
+        def lookup(transfer):
+            response = client.request(Tx(transaction=transfer['hash']))
+            return transfer, response.result if response.is_successful() else None
+
+        with ThreadPoolExecutor(max_workers=self.window) as pool:
+            found = list(pool.map(lookup, transfers))
+        validated = get_latest_validated_ledger_sequence(client)
+        updates, waiting = [], {}
+        for transfer, result in found:
+            if result and result.get('validated'):
+                updates.append((transfer['id'], self._outcome(result['meta']['TransactionResult'],
+                                                              transfer['hash'])))
+            elif validated > transfer['last_ledger_sequence']:
+                updates.append((transfer['id'], {'status': 'pending'}))   # expired unapplied
+            else:
+                client.request(SubmitOnly(tx_blob=transfer['tx_blob']))   # same blob, applies once
+                waiting[transfer['hash']] = transfer
+        if waiting:
+            last = max(t['last_ledger_sequence'] for t in waiting.values())
+            first = min(t['last_ledger_sequence'] for t in waiting.values()) - LEDGER_OFFSET
+            for tx_hash, result in ticket_batch.confirm(client, {h: h for h in waiting}, first, last,
+                                                        self.poll_interval).items():
+                updates.append((waiting.pop(tx_hash)['id'], self._outcome(result, tx_hash)))
+            updates += [(t['id'], {'status': 'pending'}) for t in waiting.values()]
+        self._write(updates)
+
+    # -- bookkeeping ------------------------------------------------------------
+
+    def _write(self, updates):
+        if not updates:
+            return
+        with self.storage.atomic():
+            for transfer_id, fields in updates:
+                self.storage.update('payout_transfers', transfer_id, fields)
+
+    def _set_status(self, payout_id, status=None):
+        transfers = self.storage.find('payout_transfers', payout_id=payout_id)
+        counts = Counter(t['status'] for t in transfers)
+        if status is None:
+            if counts['pending'] or counts['submitted']:
+                status = 'partial'
+            else:
+                status = 'failed' if counts['failed'] else 'completed'
+        paid = sum(t['units'] for t in transfers if t['status'] == 'validated')
+        return self.storage.update('payouts', payout_id, {
+            'status': status, 'counts': dict(counts), 'paid': _from_units(paid),
+            'lease_expires': time.time() + self.lease_seconds if status == 'running' else 0,
+            'updated_at': datetime.now().isoformat()})
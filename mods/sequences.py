@@ -0,0 +1,274 @@
+"""Hand out Sequence numbers locally so one wallet can submit concurrently.
+
+xrpl-py's ``submit_and_wait`` autofills ``Sequence`` from the ledger, so
+two submissions from the same wallet in flight at once both get the same
+number and one of them fails. ``AccountSequencer`` keeps the next number
+per signing account and hands it out under a lock; ``submit_and_wait``
+here is a drop-in replacement that signs on it and reacts to what the
+server says:
+
+* ``tefPAST_SEQ``  - someone else used the number (another process, a
+  wallet app): read the account again and re-sign on a fresh one;
+* ``terPRE_SEQ``   - an earlier number is missing; the server holds the
+  transaction until the gap fills, so we keep waiting. Numbers given out
+  but never applied (``tel``/``tem`` results) are handed out again first,
+  which fills such gaps; if the transaction still expires the account is
+  read again and it is re-signed;
+* ``tel...``       - not applied: re-signed on another number.
+
+Past ``max_in_flight`` unconfirmed sequences (rippled queues at most 10
+per account) transactions go out on tickets reserved with
+``add_tickets``, which have no ordering between them.
+
+Fee and LastLedgerSequence come from the cached values in mods/tx_prepare
+(types with special fees, like a conditional EscrowFinish, are autofilled
+around the allocated Sequence).
+"""
+import heapq
+import threading
+import time
+from collections import Counter
+
+from xrpl.ledger import get_latest_validated_ledger_sequence
+from xrpl.models.requests import AccountInfo, SubmitOnly, Tx
+from xrpl.models.transactions import TicketCreate
+from xrpl.transaction import XRPLReliableSubmissionException, autofill, sign
+
+from mods.metrics import SUBMIT_TO_VALIDATED, TX_RESULTS
+from mods.tx_prepare import get_preparer, plain_fee
+
+POLL_INTERVAL = 1.0
+MAX_IN_FLIGHT = 10
+
+
+class AccountSequencer:
+    """Next Sequence, unused numbers and spare tickets of one signing account."""
+
+    def __init__(self, client, address, max_in_flight=MAX_IN_FLIGHT):
+        self.client = client
+        self.address = address
+        self.max_in_flight = max_in_flight
+        self.stats = Counter()
+        self._next = None
+        self._floor = 0          # the account's Sequence when we last read it
+        self._holes = []         # heap of numbers handed out but never applied
+        self._in_flight = set()  # sequences handed out and not yet final
+        self._tickets = []       # spare tickets
+        self._lock = threading.Lock()
+
+    def _read_sequence(self):
+        self.stats['resyncs'] += 1
+        response = self.client.request(AccountInfo(account=self.address, ledger_index='current'))
+        if not response.is_successful():
+            raise XRPLReliableSubmissionException(
+                f"Account {self.address} not found: {response.result.get('error')}")
+        self._floor = response.result['account_data']['Sequence']
+        return self._floor
+
+    def acquire(self):
+        """``('sequence', n)`` or, when too many sequences are in flight, ``('ticket', n)``."""
+        with self._lock:
+            if len(self._in_flight) >= self.max_in_flight and self._tickets:
+                self.stats['tickets'] += 1
+                return 'ticket', self._tickets.pop()
+            if self._holes:
+                number = heapq.heappop(self._holes)
+            else:
+                if self._next is None:
+                    self._next = self._read_sequence()
+                number = self._next
+                self._next += 1
+            self._in_flight.add(number)
+            self.stats['sequences'] += 1
+            return 'sequence', number
+
+    def release(self, lane, applied):
+        """Done with a lane; an unapplied number is handed out again."""
+        kind, number = lane
+        with self._lock:
+            if kind == 'ticket':
+                if not applied:
+                    self._tickets.append(number)
+                return
+            self._in_flight.discard(number)
+            if not applied and self._floor <= number < (self._next or 0):
+                heapq.heappush(self._holes, number)
+
+    def drop_ticket(self, number):
+        """Forget a ticket the ledger no longer has (tefNO_TICKET)."""
+        with self._lock:
+            if number in self._tickets:
+                self._tickets.remove(number)
+
+    def resync(self):
+        """Continue from the account's Sequence on the ledger."""
+        with self._lock:
+            self._next = self._read_sequence()
+            self._holes = []
+
+    def reserve(self, count):
+        """``count`` consecutive sequences (e.g. for a TicketCreate and what it creates)."""
+        with self._lock:
+            if self._next is None:
+                self._next = self._read_sequence()
+            first = self._next
+            self._next += count
+            return first
+
+    def create_tickets(self, wallet, count, url=None):
+        """Create ``count`` tickets on a Sequence from this allocator; returns their numbers.
+
+        The tickets are the caller's (mods/ticket_batch signs on them); see
+        ``add_tickets`` for spare lanes.
+        """
+        sequence = self.reserve(count + 1)   # the TicketCreate itself, then its tickets
+        tx = TicketCreate(account=self.address, ticket_count=count)
+        response, code = _submit_lane(self, tx, wallet, ('sequence', sequence), url or self.client.url)
+        if response is None or response.result['meta']['TransactionResult'] != 'tesSUCCESS':
+            self.resync()
+            raise XRPLReliableSubmissionException(f"TicketCreate failed: {code}")
+        return list(range(sequence + 1, sequence + 1 + count))
+
+    def add_tickets(self, wallet, count, url=None):
+        """Create ``count`` tickets for extra parallel lanes; returns their numbers."""
+        tickets = self.create_tickets(wallet, count, url)
+        with self._lock:
+            self._tickets.extend(reversed(tickets))
+        return tickets
+
+    def spare_tickets(self):
+        with self._lock:
+            return len(self._tickets)
+
+
+_sequencers = {}
+_sequencers_lock = threading.Lock()
+
+
+def get_sequencer(client, address):
+    """The shared AccountSequencer for an address on a client's endpoint."""
+    key = (client.url, address)
+    with _sequencers_lock:
+        sequencer = _sequencers.get(key)
+        if sequencer is None:
+            sequencer = _sequencers[key] = AccountSequencer(client, address)
+        return sequencer
+
+
+def sequencer_stats():
+    return {address: dict(s.stats, spare_tickets=s.spare_tickets())
+            for (_, address), s in _sequencers.items()}
+
+
+def sign_on(client, tx, wallet, lane, url):
+    fields = tx.to_dict()
+    kind, number = lane
+    if kind == 'ticket':
+        fields.update(sequence=0, ticket_sequence=number)
+    else:
+        fields['sequence'] = number
+    if not plain_fee(tx):
+        return sign(autofill(type(tx).from_dict(fields), client), wallet)
+    preparer = get_preparer(url)
+    fields.update(fee=fields.get('fee') or str(preparer.fee()),
+                  last_ledger_sequence=preparer.validated_ledger() + preparer.ledger_offset)
+    if preparer.network_id() is not None:
+        fields['network_id'] = preparer.network_id()
+    return sign(type(tx).from_dict(fields), wallet)
+
+
+def _wait(client, signed):
+    """The validated Tx response, or None once LastLedgerSequence has passed."""
+    while True:
+        response = client.request(Tx(transaction=signed.get_hash()))
+        if response.is_successful() and response.result.get('validated'):
+            return response
+        if get_latest_validated_ledger_sequence(client) >= signed.last_ledger_sequence:
+            response = client.request(Tx(transaction=signed.get_hash()))
+            return response if response.is_successful() and response.result.get('validated') else None
+        time.sleep(POLL_INTERVAL)
+
+
+def engine_result(submitted):
+    """The engine result of a submit reply ('' if it has none); raises on a malformed (tem) transaction."""
+    code = submitted.get('engine_result') or ''
+    if code.startswith('tem'):
+        raise XRPLReliableSubmissionException(f"{code}: {submitted.get('engine_result_message')}")
+    return code
+
+
+def not_applied(code):
+    return code.startswith(('tel', 'tef'))
+
+
+def record_outcome(response, started, path='sequenced'):
+    if response is None:
+        TX_RESULTS.inc(path, 'expired')
+    else:
+        SUBMIT_TO_VALIDATED.observe(time.perf_counter() - started, path)
+        TX_RESULTS.inc(path, response.result['meta']['TransactionResult'])
+
+
+def _submit_lane(sequencer, tx, wallet, lane, url):
+    """Sign ``tx`` on ``lane``, submit it and wait; (response or None, engine result)."""
+    signed = sign_on(sequencer.client, tx, wallet, lane, url)
+    started = time.perf_counter()
+    code = engine_result(sequencer.client.request(SubmitOnly(tx_blob=signed.blob())).result)
+    if not_applied(code):
+        return None, code
+    response = _wait(sequencer.client, signed)
+    record_outcome(response, started)
+    return response, code
+
+
+def settle(sequencer, lane, response, code):
+    """Release ``lane`` after one attempt.
+
+    Returns the validated response, None if the transaction should be
+    signed again on a new lane, or raises XRPLReliableSubmissionException
+    if it failed. May read the account again (a blocking request).
+    """
+    if response is not None:
+        sequencer.release(lane, applied=True)
+        result = response.result['meta']['TransactionResult']
+        if result != 'tesSUCCESS':
+            raise XRPLReliableSubmissionException(f"Transaction failed: {result}")
+        return response
+    sequencer.stats['retries'] += 1
+    if code == 'tefPAST_SEQ':
+        sequencer.release(lane, applied=True)   # the number is used up
+        sequencer.resync()
+    elif code == 'tefNO_TICKET':
+        sequencer.release(lane, applied=True)
+        sequencer.drop_ticket(lane[1])
+    elif code.startswith('tef') and code != 'tefMAX_LEDGER':
+        sequencer.release(lane, applied=False)
+        raise XRPLReliableSubmissionException(f"Transaction failed: {code}")
+    else:
+        # tel, or expired unapplied (maybe held behind a gap): nothing took the number
+        sequencer.release(lane, applied=False)
+        if code == 'terPRE_SEQ' or not code.startswith('tel'):
+            sequencer.resync()
+    return None
+
+
+def submit_and_wait(tx, client, wallet, retries=3, url=None):
+    """``xrpl.transaction.submit_and_wait`` on a locally allocated Sequence (or ticket).
+
+    Raises XRPLReliableSubmissionException like xrpl-py when the
+    transaction fails or cannot be applied after ``retries`` re-signs.
+    """
+    sequencer = get_sequencer(client, wallet.address)
+    url = url or client.url
+    code = None
+    for _ in range(retries + 1):
+        lane = sequencer.acquire()
+        try:
+            response, code = _submit_lane(sequencer, tx, wallet, lane, url)
+        except Exception:
+            sequencer.release(lane, applied=False)
+            raise
+        response = settle(sequencer, lane, response, code)
+        if response is not None:
+            return response
+    raise XRPLReliableSubmissionException(f"Not applied after {retries + 1} attempts: {code}")
@@ -0,0 +1,428 @@
+"""Storage backends for CrowdfundingPlatform.
+
+Two backends share one interface:
+
+* ``JsonStorage`` keeps the original single-file ``storage.json`` layout.
+* ``SQLiteStorage`` keeps one row per record, so inserts and updates are
+  keyed by (collection, id) instead of rewriting the whole dataset.
+
+Both expose the legacy ``load_data()``/``save_data()`` pair so existing
+callers keep working while hot paths move to ``insert``/``update``/``get``.
+Writes are atomic and safe across threads and worker processes; use
+``transaction()`` for any other read-modify-write of the whole dataset,
+``update(..., expect={...})`` for a compare-and-set on one record, or
+``atomic()`` to commit several inserts/updates together. Their durations
+are recorded in mods/metrics.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-place rename without a lock
+    fcntl = None
+
+from mods.metrics import STORAGE_SECONDS, timed
+
+# collection name -> counter holding the next id to hand out
+COLLECTIONS = {
+    'campaigns': 'next_campaign_id',
+    'investments': 'next_investment_id',
+    'microloans': 'next_microloan_id',
+    'investment_jobs': 'next_investment_job_id',
+    'ledger_events': 'next_ledger_event_id',
+    'ingest_checkpoints': 'next_ingest_checkpoint_id',
+    'payouts': 'next_payout_id',
+    'payout_transfers': 'next_payout_transfer_id',
+    'leases': 'next_lease_id',
+}
+
+DEFAULT_STORAGE_URL = 'sqlite:storage.db'
+LEGACY_JSON_FILE = 'storage.json'
+
+
+def empty_data():
+    data = {name: [] for name in COLLECTIONS}
+    for counter in COLLECTIONS.values():
+        data[counter] = 1
+    return data
+
+
+def _matches(record, expect):
+    """Optimistic check for ``update(..., expect=...)``: every expected field must match."""
+    return not expect or all(record.get(k) == v for k, v in expect.items())
+
+
+class JsonStorage:
+    """Original layout: every write re-serializes the whole file.
+
+    Writers hold an exclusive ``flock`` on ``<path>.lock`` for the whole
+    read-modify-write and replace the file atomically, so concurrent
+    workers cannot lose each other's updates or leave a half-written file.
+    """
+
+    def __init__(self, path=LEGACY_JSON_FILE):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self._local = threading.local()
+        with self._locked():
+            self.created = not os.path.exists(self.path)
+            if self.created:
+                self._write_atomic(empty_data())
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_atomic(self, data):
+        """Write to a temp file, fsync it, then rename it over the original."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.storage-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        if hasattr(os, 'O_DIRECTORY'):
+            dir_fd = os.open(directory, os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    @contextmanager
+    def transaction(self):
+        """Yield the full dataset under the write lock and save it on exit."""
+        data = getattr(self._local, 'data', None)
+        if data is not None:
+            yield data  # nested inside atomic(): the outer block saves
+            return
+        with self._locked():
+            data = self._local.data = self.load_data()
+            try:
+                yield data
+                self._write_atomic(data)
+            finally:
+                self._local.data = None
+
+    @contextmanager
+    def atomic(self):
+        """Run several inserts/updates as one write; yields the storage itself."""
+        with self.transaction():
+            yield self
+
+    @timed(STORAGE_SECONDS, 'json', 'load_data')
+    def load_data(self):
+        data = getattr(self._local, 'data', None)
+        if data is not None:
+            return data
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    @timed(STORAGE_SECONDS, 'json', 'save_data')
+    def save_data(self, data):
+        with self._locked():
+            self._write_atomic(data)
+
+    def data_version(self):
+        """Changes on every write: each one renames a new file into place."""
+        st = os.stat(self.path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def changes_since(self, version):
+        """``(current_version, None)``: a whole-file backend can only say "reload everything"."""
+        return self.data_version(), None
+
+    @timed(STORAGE_SECONDS, 'json', 'insert')
+    def insert(self, collection, record):
+        with self.transaction() as data:
+            counter = COLLECTIONS[collection]
+            record = dict(record, id=data.get(counter, 1))
+            data.setdefault(collection, []).append(record)
+            data[counter] = record['id'] + 1
+        return record
+
+    @timed(STORAGE_SECONDS, 'json', 'update')
+    def update(self, collection, record_id, fields, expect=None):
+        with self.transaction() as data:
+            for record in data.get(collection, []):
+                if record['id'] == record_id:
+                    if not _matches(record, expect):
+                        return None
+                    record.update(fields)
+                    return record
+        return None
+
+    def get(self, collection, record_id):
+        return next((r for r in self.all(collection) if r['id'] == record_id), None)
+
+    def all(self, collection):
+        return self.load_data().get(collection, [])
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage:
+    """One row per record in a WAL-mode SQLite database.
+
+    Each thread gets its own connection and every write runs inside
+    ``BEGIN IMMEDIATE``, so writers from any thread or worker process are
+    serialized by SQLite's file lock rather than by a Python-level lock.
+    """
+
+    def __init__(self, path='storage.db', migrate_from=None, busy_timeout=30.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.migrated_from = None
+        if migrate_from is None:
+            migrate_from = os.path.join(os.path.dirname(path), LEGACY_JSON_FILE)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                collection TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                body TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (collection, id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._upgrade_schema()
+        self.created = self._meta('initialized') is None
+        if self.created:
+            self._initialize(migrate_from)
+        else:
+            # databases created before a collection existed lack its counter
+            with self._write() as conn:
+                conn.executemany('INSERT OR IGNORE INTO counters VALUES (?, 1)',
+                                 [(counter,) for counter in COLLECTIONS.values()])
+
+    def _upgrade_schema(self):
+        """Add the per-row ``version`` column to databases created before it existed."""
+        with self._write() as conn:
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(records)')]
+            if 'version' not in columns:
+                conn.execute('ALTER TABLE records ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+            conn.execute('CREATE INDEX IF NOT EXISTS records_by_version ON records (version)')
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('data_version', 0)")
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('reset_version', 0)")
+
+    @property
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=FULL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """Run the block as one write transaction (nested blocks join the outer one)."""
+        conn = self._conn
+        if getattr(self._local, 'writing', False):
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        self._local.writing = True
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+        finally:
+            self._local.writing = False
+
+    @contextmanager
+    def atomic(self):
+        """Run several inserts/updates as one write; yields the storage itself.
+
+        Reads inside the block see its own uncommitted writes, and the write
+        lock is held throughout, so read-check-write sequences are safe.
+        """
+        with self._write():
+            yield self
+
+    @contextmanager
+    def transaction(self):
+        """Yield the full dataset under the write lock and save it on exit."""
+        with self._write():
+            data = self.load_data()
+            yield data
+            self._replace_all(data)
+
+    def _meta(self, key):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _bump_version(self):
+        """Next data version; call inside a write transaction."""
+        self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+        return int(self._meta('data_version'))
+
+    def data_version(self):
+        """Increases with every committed write, from any thread or process."""
+        return int(self._meta('data_version'))
+
+    def changes_since(self, version):
+        """Records written after ``version``: ``(current_version, [(collection, record), ...])``.
+
+        The list is None when the whole dataset was replaced (``save_data``
+        or ``transaction``) since then, so callers must reload everything.
+        """
+        conn = self._conn
+        in_write = getattr(self._local, 'writing', False)
+        if not in_write:
+            conn.execute('BEGIN')  # one snapshot for both reads
+        try:
+            current = int(self._meta('data_version'))
+            if int(self._meta('reset_version')) > version:
+                return current, None
+            rows = conn.execute(
+                'SELECT collection, body FROM records WHERE version > ? ORDER BY version',
+                (version,)).fetchall()
+            return current, [(collection, json.loads(body)) for collection, body in rows]
+        finally:
+            if not in_write:
+                conn.execute('COMMIT')
+
+    def _initialize(self, migrate_from):
+        """Seed counters and run the one-shot import of a legacy storage.json."""
+        data = empty_data()
+        migrated = migrate_from and os.path.exists(migrate_from)
+        if migrated:
+            with open(migrate_from, 'r') as f:
+                data.update(json.load(f))
+        with self._write() as conn:
+            if self._meta('initialized') is not None:
+                # another worker initialized the database first
+                self.created = False
+                return
+            self._replace_all(data)
+            conn.execute("INSERT INTO meta VALUES ('initialized', datetime('now'))")
+            if migrated:
+                conn.execute("INSERT INTO meta VALUES ('migrated_from', ?)",
+                             (os.path.abspath(migrate_from),))
+        self.migrated_from = migrate_from if migrated else None
+
+    def _replace_all(self, data):
+        version = self._bump_version()
+        self._conn.execute("UPDATE meta SET value = ? WHERE key = 'reset_version'", (version,))
+        self._conn.execute('DELETE FROM records')
+        self._conn.execute('DELETE FROM counters')
+        for collection, counter in COLLECTIONS.items():
+            rows = data.get(collection, [])
+            self._conn.executemany(
+                'INSERT INTO records (collection, id, body, version) VALUES (?, ?, ?, ?)',
+                [(collection, r['id'], json.dumps(r), version) for r in rows],
+            )
+            next_id = max([data.get(counter, 1)] + [r['id'] + 1 for r in rows])
+            self._conn.execute('INSERT INTO counters VALUES (?, ?)', (counter, next_id))
+
+    @timed(STORAGE_SECONDS, 'sqlite', 'load_data')
+    def load_data(self):
+        data = empty_data()
+        for collection in COLLECTIONS:
+            data[collection] = self.all(collection)
+        for name, value in self._conn.execute('SELECT name, value FROM counters'):
+            data[name] = value
+        return data
+
+    @timed(STORAGE_SECONDS, 'sqlite', 'save_data')
+    def save_data(self, data):
+        with self._write():
+            self._replace_all(data)
+
+    @timed(STORAGE_SECONDS, 'sqlite', 'insert')
+    def insert(self, collection, record):
+        counter = COLLECTIONS[collection]
+        with self._write() as conn:
+            (record_id,) = conn.execute(
+                'SELECT value FROM counters WHERE name = ?', (counter,)).fetchone()
+            record = dict(record, id=record_id)
+            conn.execute('INSERT INTO records (collection, id, body, version) VALUES (?, ?, ?, ?)',
+                         (collection, record_id, json.dumps(record), self._bump_version()))
+            conn.execute('UPDATE counters SET value = ? WHERE name = ?',
+                         (record_id + 1, counter))
+        return record
+
+    @timed(STORAGE_SECONDS, 'sqlite', 'update')
+    def update(self, collection, record_id, fields, expect=None):
+        with self._write() as conn:
+            row = conn.execute(
+                'SELECT body FROM records WHERE collection = ? AND id = ?',
+                (collection, record_id)).fetchone()
+            if row is None:
+                return None
+            record = json.loads(row[0])
+            if not _matches(record, expect):
+                return None
+            record.update(fields)
+            conn.execute('UPDATE records SET body = ?, version = ? WHERE collection = ? AND id = ?',
+                         (json.dumps(record), self._bump_version(), collection, record_id))
+        return record
+
+    def get(self, collection, record_id):
+        row = self._conn.execute(
+            'SELECT body FROM records WHERE collection = ? AND id = ?',
+            (collection, record_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self, collection):
+        rows = self._conn.execute(
+            'SELECT body FROM records WHERE collection = ? ORDER BY id', (collection,))
+        return [json.loads(body) for (body,) in rows]
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def open_storage(url=None):
+    """Open a backend from a ``scheme:path`` url, e.g. ``sqlite:storage.db``.
+
+    Defaults to the ``AGRIVEST_STORAGE`` environment variable, then to SQLite.
+    A fresh SQLite database imports an existing ``storage.json`` once.
+    """
+    url = url or os.environ.get('AGRIVEST_STORAGE', DEFAULT_STORAGE_URL)
+    scheme, _, path = url.partition(':')
+    if scheme == 'json':
+        return JsonStorage(path or LEGACY_JSON_FILE)
+    if scheme == 'sqlite':
+        return SQLiteStorage(path or 'storage.db')
+    raise ValueError(f"Unknown storage backend '{scheme}' (expected 'json' or 'sqlite').")
@@ -0,0 +1,137 @@
+"""Submit many transactions from one account concurrently using tickets.
+
+With plain sequence numbers an account's transactions must apply one
+after another. Signed on tickets, they are independent: ``run_with_tickets``
+signs every transaction up front (one autofill per transaction type),
+submits them with at most ``window`` requests in flight and then confirms
+them in bulk by scanning validated ledgers instead of looking each hash up.
+Transactions that expire or fail locally are re-signed on the same ticket,
+so at most one version of each can ever apply.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from xrpl.ledger import get_latest_validated_ledger_sequence
+from xrpl.models.requests import AccountObjects, Ledger, SubmitOnly
+from xrpl.transaction import autofill, sign
+
+from mods.metrics import SUBMIT_TO_VALIDATED, TX_RESULTS
+from mods.sequences import get_sequencer
+
+MAX_TICKETS = 250  # rippled keeps at most 250 tickets per account
+POLL_INTERVAL = 1.0
+
+
+def create_tickets(client, wallet, count):
+    """Create `count` tickets and return their numbers.
+
+    The TicketCreate takes its Sequence from the account's allocator in
+    mods/sequences, so it never collides with the account's other
+    submissions.
+    """
+    return get_sequencer(client, wallet.address).create_tickets(wallet, count)
+
+
+def sign_with_tickets(client, wallet, txs):
+    """Sign ``{ticket: unsigned tx}``; transactions of one type share a fee/LastLedgerSequence lookup."""
+    templates, signed = {}, {}
+    for ticket, tx in txs.items():
+        kind = type(tx)
+        if kind not in templates:
+            templates[kind] = autofill(kind.from_dict(dict(tx.to_dict(), ticket_sequence=ticket)),
+                                       client).to_dict()
+        template = templates[kind]
+        fields = dict(tx.to_dict(), ticket_sequence=ticket, sequence=0, fee=template['fee'],
+                      last_ledger_sequence=template['last_ledger_sequence'])
+        if 'network_id' in template:
+            fields['network_id'] = template['network_id']
+        signed[ticket] = sign(kind.from_dict(fields), wallet)
+    return signed
+
+
+def submit_all(client, signed, window):
+    """Submit every signed blob with at most `window` requests in flight; returns {ticket: engine_result}."""
+    def submit(item):
+        ticket, tx = item
+        return ticket, client.request(SubmitOnly(tx_blob=tx.blob())).result.get('engine_result')
+
+    with ThreadPoolExecutor(max_workers=window) as pool:
+        return dict(pool.map(submit, signed.items()))
+
+
+def confirm(client, pending, first_ledger, last_ledger, poll_interval=None, submitted_at=None):
+    """Scan validated ledgers for the pending hashes; returns {ticket: TransactionResult}.
+
+    One `ledger` request per closed ledger instead of one `tx` lookup per
+    transaction. Whatever is still in `pending` afterwards expired unapplied.
+    With ``submitted_at`` (a ``time.perf_counter()`` value) each result is
+    timed into mods/metrics.
+    """
+    results = {}
+    while pending and first_ledger <= last_ledger:
+        validated = get_latest_validated_ledger_sequence(client)
+        if validated < first_ledger:
+            time.sleep(POLL_INTERVAL if poll_interval is None else poll_interval)
+            continue
+        for index in range(first_ledger, min(validated, last_ledger) + 1):
+            ledger = client.request(Ledger(ledger_index=index, transactions=True, expand=True))
+            for tx in ledger.result['ledger'].get('transactions', []):
+                ticket = pending.pop(tx.get('hash'), None)
+                if ticket is not None:
+                    meta = tx.get('meta') or tx.get('metaData')
+                    results[ticket] = meta['TransactionResult']
+                    TX_RESULTS.inc('tickets', results[ticket])
+                    if submitted_at is not None:
+                        SUBMIT_TO_VALIDATED.observe(time.perf_counter() - submitted_at, 'tickets')
+        first_ledger = validated + 1
+    return results
+
+
+def run_with_tickets(client, wallet, txs, window=32, retries=2, submit=None, poll_interval=None,
+                     on_signed=None):
+    """Apply ``{ticket: unsigned tx}``; returns ({ticket: final result}, {ticket: last error}, {ticket: hash}).
+
+    ``submit`` defaults to ``submit_all`` and ``poll_interval`` to
+    ``POLL_INTERVAL``. ``on_signed({ticket: signed tx})`` runs before each
+    round is submitted, so callers can persist hashes and blobs first.
+    """
+    submit = submit or submit_all
+    results, errors, hashes = {}, {}, {}
+    todo = list(txs)
+    for _ in range(retries + 1):
+        if not todo:
+            break
+        first_ledger = get_latest_validated_ledger_sequence(client) + 1
+        signed = sign_with_tickets(client, wallet, {ticket: txs[ticket] for ticket in todo})
+        if on_signed is not None:
+            on_signed(signed)
+        todo, pending = [], {}
+        submitted_at = time.perf_counter()
+        for ticket, code in submit(client, signed, window).items():
+            if not code or code.startswith(('tes', 'tec', 'ter')) or code == 'tefALREADY':
+                # an error reply (no engine result) may or may not have reached the server:
+                # watch for it, and if it expires unseen the ticket is tried again
+                pending[signed[ticket].get_hash()] = ticket
+                hashes[ticket] = signed[ticket].get_hash()
+            elif code.startswith('tel') or code == 'tefMAX_LEDGER':
+                errors[ticket] = code  # not applied: try this ticket again
+                todo.append(ticket)
+            else:
+                errors[ticket] = code  # malformed or ticket gone: retrying cannot help
+        last_ledger = next(iter(signed.values())).last_ledger_sequence
+        for ticket, code in confirm(client, pending, first_ledger, last_ledger, poll_interval,
+                                    submitted_at).items():
+            results[ticket] = code
+            errors.pop(ticket, None)
+        for ticket in pending.values():
+            errors[ticket] = 'expired'
+            TX_RESULTS.inc('tickets', 'expired')
+            todo.append(ticket)
+    return results, errors, hashes
+
+
+def unused_tickets(client, wallet, tickets):
+    ours = set(tickets)
+    req = AccountObjects(account=wallet.address, type='ticket', limit=400)
+    objs = client.request(req).result.get('account_objects', [])
+    return sorted(o['TicketSequence'] for o in objs if o['TicketSequence'] in ours)
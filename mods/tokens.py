@@ -1,16 +1,17 @@
-import xrpl
-from xrpl.clients import JsonRpcClient
 from xrpl.models.transactions import TrustSet
-from xrpl.utils import xrp_to_drops
+from mods.client_pool import resolve_url
+from mods.ledger_cache import account_cache
+from mods.tx_prepare import get_preparer
+from mods.wallet import fetch_account_lines
 
 TESTNET_URL = "https://s.devnet.rippletest.net:51234"
 
-def prepare_trustset_tx(account_address, issuer_address, currency, limit_value):
+def _trustset_tx(account_address, issuer_address, currency, limit_value):
     if len(currency) == 3:
         currency_code = currency.upper()
     else:
         raise ValueError("Currency must be a 3-character code (e.g. 'USD', 'ABC').")
-    trustset_tx = TrustSet(
+    return TrustSet(
         account=account_address,
         limit_amount={
             "currency": currency_code,
@@ -18,14 +19,31 @@ def prepare_trustset_tx(account_address, issuer_address, currency, limit_value):
             "value": str(limit_value)
         },
     )
-    client = JsonRpcClient(TESTNET_URL)
-    from xrpl.transaction import autofill
-    autofilled = autofill(trustset_tx, client)
-    return autofilled.to_xrpl()
+
+def prepare_trustset_tx(account_address, issuer_address, currency, limit_value):
+    return get_preparer(TESTNET_URL).prepare(
+        _trustset_tx(account_address, issuer_address, currency, limit_value))
+
+def prepare_trustset_txs(account_addresses, issuer_address, currency, limit_value):
+    """Unsigned TrustSets for many accounts (e.g. a campaign's investors) in one batch"""
+    return get_preparer(TESTNET_URL).prepare_many(
+        _trustset_tx(address, issuer_address, currency, limit_value) for address in account_addresses)
 
 def get_trustlines(address):
-    from xrpl.models.requests import AccountLines
-    client = JsonRpcClient(TESTNET_URL)
-    req = AccountLines(account=address, ledger_index="validated")
-    resp = client.request(req)
-    return resp.result.get("lines", [])
\ No newline at end of file
+    url = resolve_url(TESTNET_URL)
+    return account_cache.cached("account_lines", address, "validated",
+                                lambda: fetch_account_lines(address, url), url=url)
+
+def trustline_limit_needed(lines, issuer, currency, amount, headroom=10):
+    """Limit a TrustSet must set so `amount` more tokens fit, or None if the existing line already allows it.
+
+    `lines` is an account_lines result. A new line gets `headroom` times the
+    amount; an existing one is never lowered.
+    """
+    for line in lines:
+        if line["account"] == issuer and line["currency"] == currency:
+            balance, limit = float(line["balance"]), float(line["limit"])
+            if limit >= balance + amount:
+                return None
+            return max(amount * headroom, balance + amount, limit)
+    return amount * headroom
@@ -0,0 +1,159 @@
+"""Prepare unsigned transactions for wallets without a full autofill each.
+
+xrpl-py's ``autofill`` asks the network for the account's ``Sequence``, the
+fee and the latest validated ledger for every transaction. ``TxPreparer``
+fills the same fields from local state instead:
+
+* the fee and the validated ledger index are cached for ``fee_ttl`` /
+  ``ledger_ttl`` seconds;
+* each account's next ``Sequence`` is read once per call and handed out
+  consecutively within it, so a batch for one account gets 1, 2, 3, ...
+  without a lookup each. Nothing is carried over between calls: a
+  transaction that is prepared but never submitted must not push later
+  ones onto a Sequence the account will not reach, so every call starts
+  from the account's current Sequence, as autofill does;
+* ``NetworkID`` comes from one ``server_info`` per endpoint.
+
+``prepare_many`` fills a whole batch, so 500 transactions for a campaign
+cost a fee, a ledger and one account lookup per account instead of 1500
+round trips. Callers that prepare in several calls for one account must
+submit each batch before preparing the next (or keep their own sequence,
+as mods/sequences does). Transaction types with special fees (AccountDelete, Batch,
+conditional EscrowFinish, ...) still go through ``autofill``.
+"""
+import threading
+import time
+from collections import Counter
+
+from xrpl.ledger import get_fee, get_latest_validated_ledger_sequence
+from xrpl.models.requests import AccountInfo, ServerInfo
+from xrpl.models.transactions import (
+    AccountSet, CredentialCreate, EscrowCancel, EscrowCreate, EscrowFinish, NFTokenBurn,
+    NFTokenCreateOffer, NFTokenMint, Payment, TicketCreate, TrustSet)
+from xrpl.transaction import autofill
+
+from mods.client_pool import get_client, resolve_url
+
+LEDGER_OFFSET = 20       # what autofill adds to the validated index for LastLedgerSequence
+RESTRICTED_NETWORKS = 1024   # networks above this id need NetworkID on every transaction
+
+# types whose fee is the plain network fee
+SIMPLE_FEE_TYPES = (NFTokenMint, NFTokenCreateOffer, NFTokenBurn, TrustSet, Payment, AccountSet,
+                    TicketCreate, EscrowCreate, EscrowCancel, CredentialCreate)
+
+
+def plain_fee(tx):
+    """True if ``tx`` costs the network fee (no fulfillment, reserve or batch surcharge)."""
+    if isinstance(tx, EscrowFinish):
+        return tx.fulfillment is None
+    return isinstance(tx, SIMPLE_FEE_TYPES)
+
+
+class TxPreparer:
+    """Fills Sequence, Fee, LastLedgerSequence and NetworkID from short-lived local state."""
+
+    def __init__(self, url=None, fee_ttl=10.0, ledger_ttl=2.0, ledger_offset=LEDGER_OFFSET,
+                 clock=time.monotonic):
+        self.url = url
+        self.fee_ttl = fee_ttl
+        self.ledger_ttl = ledger_ttl
+        self.ledger_offset = ledger_offset
+        self.clock = clock
+        self.stats = Counter()
+        self._fee = None          # (expires, drops)
+        self._ledger = None       # (expires, validated index)
+        self._network_id = False  # False until server_info has been read
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        return get_client(self.url)
+
+    # -- cached network state ---------------------------------------------------
+
+    def fee(self):
+        with self._lock:
+            if self._fee is None or self._fee[0] < self.clock():
+                self.stats['fee_lookups'] += 1
+                self._fee = (self.clock() + self.fee_ttl, get_fee(self.client))
+            return self._fee[1]
+
+    def validated_ledger(self):
+        with self._lock:
+            if self._ledger is None or self._ledger[0] < self.clock():
+                self.stats['ledger_lookups'] += 1
+                self._ledger = (self.clock() + self.ledger_ttl,
+                                get_latest_validated_ledger_sequence(self.client))
+            return self._ledger[1]
+
+    def network_id(self):
+        with self._lock:
+            if self._network_id is False:
+                self.stats['server_info_lookups'] += 1
+                info = self.client.request(ServerInfo()).result.get('info', {})
+                network_id = info.get('network_id')
+                self._network_id = network_id if network_id and network_id > RESTRICTED_NETWORKS else None
+            return self._network_id
+
+    def account_sequence(self, account):
+        """``account``'s next Sequence in the current ledger (one account_info)."""
+        with self._lock:
+            self.stats['sequence_lookups'] += 1
+        info = self.client.request(AccountInfo(account=account, ledger_index='current'))
+        if not info.is_successful():
+            raise ValueError(f"Account {account} not found: {info.result.get('error')}")
+        return info.result['account_data']['Sequence']
+
+    # -- preparing ----------------------------------------------------------------
+
+    def prepare(self, tx):
+        """One unsigned transaction, autofilled, in XRPL JSON."""
+        return self.prepare_many([tx])[0]
+
+    def prepare_many(self, txs):
+        """Autofill ``txs`` in order (sequences follow list order per account); returns XRPL JSON dicts."""
+        txs = list(txs)
+        simple = [tx for tx in txs if plain_fee(tx)]
+        if simple:
+            fee, network_id = str(self.fee()), self.network_id()
+            last_ledger = self.validated_ledger() + self.ledger_offset
+            wanted = dict.fromkeys(tx.account for tx in simple
+                                   if tx.sequence is None and tx.ticket_sequence is None)
+            next_sequence = {account: self.account_sequence(account) for account in wanted}
+        prepared = []
+        for tx in txs:
+            if not plain_fee(tx):
+                self.stats['autofilled'] += 1
+                prepared.append(autofill(tx, self.client).to_xrpl())
+                continue
+            fields = tx.to_dict()
+            fields.setdefault('fee', fee)
+            fields.setdefault('last_ledger_sequence', last_ledger)
+            if network_id is not None:
+                fields.setdefault('network_id', network_id)
+            if tx.ticket_sequence is not None:
+                fields['sequence'] = 0
+            elif tx.sequence is None:
+                fields['sequence'] = next_sequence[tx.account]
+                next_sequence[tx.account] += 1
+            prepared.append(type(tx).from_dict(fields).to_xrpl())
+        self.stats['prepared'] += len(prepared)
+        return prepared
+
+
+_preparers = {}
+_preparers_lock = threading.Lock()
+
+
+def get_preparer(url=None):
+    """The shared TxPreparer for an endpoint (honours XRPL_RPC_URL like get_client)."""
+    url = resolve_url(url)
+    with _preparers_lock:
+        preparer = _preparers.get(url)
+        if preparer is None:
+            preparer = _preparers[url] = TxPreparer(url)
+        return preparer
+
+
+def preparer_stats():
+    return {url: dict(preparer.stats) for url, preparer in _preparers.items()}
@@ -1,36 +1,41 @@
 import xrpl
-from xrpl.clients import JsonRpcClient
 from xrpl.models.requests import AccountLines
+from mods import sequences
+from mods.client_pool import get_client, resolve_url
+from mods.ledger_cache import account_cache
+from mods.pagination import paginate
 
 testnet_url = "https://s.devnet.rippletest.net:51234/"
 
 def get_account_info(address):
-    from xrpl.clients import JsonRpcClient
     from xrpl.models.requests.account_info import AccountInfo
+    url = resolve_url("https://s.altnet.rippletest.net:51234")
 
-    client = JsonRpcClient("https://s.altnet.rippletest.net:51234")
-    req = AccountInfo(
-        account=address,
-        ledger_index="validated",
-        strict=True
-    )
-    response = client.request(req)
-    if "account_data" in response.result:
-        return response.result["account_data"]
-    else:
+    def fetch():
+        client = get_client(url)
+        req = AccountInfo(
+            account=address,
+            ledger_index="validated",
+            strict=True
+        )
+        response = client.request(req)
+        return response.result.get("account_data")
+
+    account_data = account_cache.cached("account_info", address, "validated", fetch, url=url)
+    if account_data is None:
         print(f"❌ XRPL account {address} not found or not funded yet.")
-        return None
+    return account_data
 
 def send_xrp(seed, amount, destination):
     sending_wallet = xrpl.wallet.Wallet.from_seed(seed)
-    client = xrpl.clients.JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     payment = xrpl.models.transactions.Payment(
         account=sending_wallet.address,
         amount=xrpl.utils.xrp_to_drops(int(amount)),
         destination=destination,
     )
     try:	
-        response = xrpl.transaction.submit_and_wait(payment, client, sending_wallet)	
+        response = sequences.submit_and_wait(payment, client, sending_wallet)	
     except xrpl.transaction.XRPLReliableSubmissionException as e:	
         response = f"Submit failed: {e}"
 
@@ -39,13 +44,17 @@ def send_xrp(seed, amount, destination):
 def get_iou_balances(address):
     """
     Returns a list of all trust lines (IOU balances) for the given XRPL address.
+    Shares its cache entry with tokens.get_trustlines (both read devnet).
     """
-    client = JsonRpcClient(testnet_url)
+    url = resolve_url(testnet_url)
+    return account_cache.cached("account_lines", address, "validated",
+                                lambda: fetch_account_lines(address, url), url=url)
+
+def fetch_account_lines(address, url=testnet_url):
+    client = get_client(url)
     req = AccountLines(
         account=address,
-        ledger_index="validated"
+        ledger_index="validated",
+        limit=400
     )
-    response = client.request(req)
-    if "lines" in response.result:
-        return response.result["lines"]
-    return []
\ No newline at end of file
+    return list(paginate(client, req))
\ No newline at end of file
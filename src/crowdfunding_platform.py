@@ -1,43 +1,89 @@
+import asyncio
 import json
-import os
 from datetime import datetime
-import mods.escrow_utils
-from mods.nft_utils import prepare_nft_mint_tx
-from mods.wallet import get_account_info, get_iou_balances, send_xrp
-from mods.tokens import get_trustlines
+from functools import cached_property
+from mods.indexes import IndexedStorage
+from mods.campaign_listing import CampaignListing
+from mods.storage import open_storage
+from mods import funding
+from mods.lazy import lazy_import
+
+# XRPL-backed stacks load on first use, so starting up (or a command that
+# only reads storage) does not import xrpl
+async_xrpl = lazy_import('mods.async_xrpl')
+escrow_utils = lazy_import('mods.escrow_utils')
+wallet_utils = lazy_import('mods.wallet')
+tokens = lazy_import('mods.tokens')
+investment_jobs = lazy_import('mods.investment_jobs')
 
 class CrowdfundingPlatform:
-    def __init__(self):
-        self.storage_file = 'storage.json'
-        self.init_storage()
-        
+    def __init__(self, storage_url=None):
+        # storage and the subsystems below are opened on first use
+        self.storage_url = storage_url
+
     def init_storage(self):
-        if not os.path.exists(self.storage_file):
-            initial_data = {
-                'campaigns': [],
-                'investments': [],
-                'next_campaign_id': 1,
-                'next_investment_id': 1
-            }
-            with open(self.storage_file, 'w') as f:
-                json.dump(initial_data, f, indent=2)
+        storage = IndexedStorage(open_storage(self.storage_url))
+        if getattr(storage, 'migrated_from', None):
+            print(f"✅ Storage migrated from {storage.migrated_from}")
+        elif storage.created:
             print("✅ Storage initialized")
         else:
             print("✅ Storage loaded")
+        return storage
+
+    @cached_property
+    def storage(self):
+        return self.init_storage()
+
+    @cached_property
+    def campaign_listing(self):
+        return CampaignListing(self.storage)
+
+    @cached_property
+    def investment_worker(self):
+        return investment_jobs.InvestmentWorker(self.storage)
+
+    @cached_property
+    def ledger_ingestor(self):
+        from mods.ledger_ingest import LedgerIngestor
+        ingestor = LedgerIngestor(self.storage)
+        ingestor.listeners.append(self.credential_index.apply)
+        return ingestor
+
+    @cached_property
+    def credential_index(self):
+        from mods.credential_index import credential_index
+        return credential_index
+
+    @cached_property
+    def escrow_scheduler(self):
+        from mods.escrow_scheduler import EscrowScheduler
+        return EscrowScheduler(self.storage)
+
+    @cached_property
+    def approver(self):
+        from mods.approvals import CampaignApprover
+        return CampaignApprover(self.storage, self.credential_index)
+
+    @cached_property
+    def payouts(self):
+        from mods.payouts import PayoutEngine
+        return PayoutEngine(self.storage)
 
     def load_data(self):
-        with open(self.storage_file, 'r') as f:
-            return json.load(f)
+        return self.storage.load_data()
 
     def save_data(self, data):
-        with open(self.storage_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        self.storage.save_data(data)
 
-    def create_campaign(self, farmer_name, project_title, description, funding_goal, farmer_address):
+    def create_campaign(self, farmer_name, project_title, description, funding_goal, farmer_address, key=None):
+        """Store a pending campaign and return its id.
+
+        With ``key`` set, creating the same key again returns the existing
+        campaign's id instead of a second campaign.
+        """
         print(f"\n🚜 Creating campaign for {farmer_name}...")
-        data = self.load_data()
         campaign = {
-            'id': data['next_campaign_id'],
             'farmer_name': farmer_name,
             'project_title': project_title,
             'description': description,
@@ -47,89 +93,82 @@ class CrowdfundingPlatform:
             'status': 'pending',
             'created_at': datetime.now().isoformat()
         }
-        data['campaigns'].append(campaign)
-        data['next_campaign_id'] += 1
-        self.save_data(data)
+        if key is not None:
+            campaign['key'] = key
+        with self.storage.atomic():
+            # the lookup is a read, so it goes before the insert (see IndexedStorage.atomic)
+            existing = [c for c in self.storage.find('campaigns', farmer_address=farmer_address)
+                        if key is not None and c.get('key') == key]
+            if existing:
+                print(f"✅ Campaign already created with ID: {existing[0]['id']}")
+                return existing[0]['id']
+            campaign = self.storage.insert('campaigns', campaign)
         print(f"✅ Campaign created with ID: {campaign['id']}")
         print(f"   Farmer address: {farmer_address}")
         return campaign['id']
 
     def approve_campaign(self, campaign_id):
-        data = self.load_data()
-        campaign = next((c for c in data['campaigns'] if c['id'] == campaign_id), None)
-        if not campaign:
-            print("❌ Campaign not found")
+        """Approve a campaign if its farmer holds the required crop credential (see mods/approvals)."""
+        campaign, error = self.approver.approve(campaign_id)
+        if error:
+            print(f"❌ {error}")
             return
 
-        token_currency = campaign['project_title'][:3].upper()
-        campaign['token_currency'] = token_currency
-        campaign['status'] = 'approved'
-        self.save_data(data)
-
         print(f"\n🎯 Campaign '{campaign['project_title']}' approved (pending on-chain setup).")
-        print(f"   Token currency: {token_currency}")
+        print(f"   Token currency: {campaign['token_currency']}")
         print("   Farmer must now configure their account for token issuance via their wallet (e.g., enable Default Ripple).")
         print("   Provide these instructions or a QR code to sign with a wallet app.")
 
+    def approve_pending_campaigns(self):
+        """Check and approve every pending campaign in one pass; returns the summary."""
+        summary = self.approver.approve_pending()
+        print(f"\n🎯 Approved {summary['approved']} of {summary['pending']} pending campaigns "
+              f"({summary['farmers']} farmers, {summary['credential_reads']} credential reads, "
+              f"{summary['seconds']} s).")
+        if not summary['credential_check']:
+            print("   No credential oracles configured (AGRIVEST_CREDENTIAL_ISSUERS): credentials not checked.")
+        for reason, count in summary['reasons'].items():
+            print(f"   ❌ {count} not approved: {reason}")
+        return summary
+
+    def queue_investment(self, campaign_id, investor_seed, investment_amount):
+        """Record an investment job for the background worker and return it at once."""
+        job = self.investment_worker.enqueue(campaign_id, investor_seed, investment_amount)
+        if not job:
+            print("❌ Campaign not found or not approved")
+            return None
+        return investment_jobs.public_view(job)
+
+    def get_investment_job(self, job_id):
+        return self.investment_worker.status(job_id)
+
     def invest_in_campaign(self, campaign_id, investor_seed, investment_amount):
         """Invest XRP in a campaign and receive project tokens"""
-        data = self.load_data()
-        
-        campaign = None
-        for c in data['campaigns']:
-            if c['id'] == campaign_id and c['status'] == 'approved':
-                campaign = c
-                break
-        
-        if not campaign:
+        return asyncio.run(self.invest_in_campaign_async(campaign_id, investor_seed, investment_amount))
+
+    async def invest_in_campaign_async(self, campaign_id, investor_seed, investment_amount):
+        """Run an investment job to completion in the caller's event loop."""
+        job = self.investment_worker.enqueue(campaign_id, investor_seed, investment_amount, schedule=False)
+        if not job:
             print("❌ Campaign not found or not approved")
-            return
-            
-        farmer_seed = campaign['farmer_wallet_seed']
-        farmer_address = campaign['farmer_address']
-        token_currency = campaign['token_currency']
-        
-        investor_wallet = get_account_info(investor_seed)
-        
+            return None
+
         print(f"\n💰 Processing investment of {investment_amount} XRP...")
-        
-        # Step 1: Send XRP to farmer
-        print("   Sending XRP to farmer...")
-        xrp_result = send_xrp(investor_seed, investment_amount, farmer_address)
-        
-        if "Submit failed" in str(xrp_result):
-            print(f"❌ XRP transfer failed: {xrp_result}")
-            return
-            
-        # Step 2: Create trust line for investor to receive tokens
-        print("   Creating trust line for tokens...")
-        trust_result = tokens.create_trust_line(investor_seed, farmer_address, token_currency, investment_amount * 10)
-        
-        # Step 3: Send project tokens to investor
-        print("   Sending project tokens...")
-        token_amount = investment_amount  # 1:1 ratio for MVP
-        token_result = tokens.send_currency(farmer_seed, investor_wallet.address, token_currency, token_amount)
-        
-        # Record investment
-        investment = {
-            'id': data['next_investment_id'],
-            'campaign_id': campaign_id,
-            'investor_address': investor_wallet.address,
-            'amount': investment_amount,
-            'token_id': None,
-            'created_at': datetime.now().isoformat()
-        }
-        
-        data['investments'].append(investment)
-        data['next_investment_id'] += 1
-        self.save_data(data)
-        
+        job = await self.investment_worker.run_job(job['id'])
+        if not job or job['status'] != 'completed':
+            print(f"❌ Investment failed: {job and job['error']}")
+            return None
+
+        investment = self.storage.get('investments', job['investment_id'])
         print(f"✅ Investment successful!")
-        print(f"   Received {token_amount} {token_currency} tokens")
+        if investment['token_amount']:
+            print(f"   Received {investment['token_amount']} {investment['token_currency']} tokens")
+        else:
+            print(f"   Farmer must now issue {investment_amount} {investment['token_currency']} tokens from their wallet.")
+        return investment
 
     def provide_escrow_finish_instructions(self, investment_id, finisher_address):
-        data = self.load_data()
-        investment = next((i for i in data['investments'] if i['id'] == investment_id), None)
+        investment = self.storage.get('investments', investment_id)
         if not investment:
             print("❌ Investment not found")
             return
@@ -145,8 +184,7 @@ class CrowdfundingPlatform:
         print("Sign and submit this transaction with your XRPL wallet.")
 
     def provide_escrow_cancel_instructions(self, investment_id, canceller_address):
-        data = self.load_data()
-        investment = next((i for i in data['investments'] if i['id'] == investment_id), None)
+        investment = self.storage.get('investments', investment_id)
         if not investment:
             print("❌ Investment not found")
             return
@@ -162,14 +200,13 @@ class CrowdfundingPlatform:
         print("Sign and submit this transaction with your XRPL wallet.")
 
     def list_campaigns(self):
-        data = self.load_data()
-        campaigns = data['campaigns']
+        campaigns, _ = self.storage.scan('campaigns', 'created_at', reverse=True, limit=None)
         print("\n📋 All Campaigns:")
         print("-" * 80)
         if not campaigns:
             print("No campaigns found.")
             return
-        for campaign in sorted(campaigns, key=lambda x: x['created_at'], reverse=True):
+        for campaign in campaigns:
             campaign_id = campaign['id']
             farmer_name = campaign['farmer_name']
             title = campaign['project_title']
@@ -178,8 +215,11 @@ class CrowdfundingPlatform:
             token = campaign['token_currency']
             status = campaign['status']
             created = campaign['created_at']
+            progress = funding.progress(campaign)
             print(f"ID: {campaign_id} | {title} by {farmer_name}")
             print(f"   Goal: {goal} XRP | Status: {status} | Token: {token or 'N/A'}")
+            print(f"   Raised: {progress['total_raised']} XRP ({progress['percent_funded']}%) "
+                  f"from {progress['investor_count']} investors")
             print(f"   Description: {desc}")
             print(f"   Created: {created}")
             print("-" * 80)
@@ -189,8 +229,9 @@ class CrowdfundingPlatform:
         print(f"\n🏦 Creating microloan of {loan_amount} XRP...")
 
         # 1. Check if investor wallet exists and is funded
-        investor_wallet = wallet.get_account(investor_seed)
-        investor_info = get_account_info(investor_wallet.address)
+        from xrpl.wallet import Wallet
+        investor_wallet = Wallet.from_seed(investor_seed)
+        investor_info = wallet_utils.get_account_info(investor_wallet.address)
         if not investor_info:
             print(f"❌ Investor wallet {investor_wallet.address} not found or not funded.")
             return None
@@ -221,25 +262,21 @@ class CrowdfundingPlatform:
             print(f"❌ Escrow creation failed: {escrow_result}")
             return None
 
-        # 5. Store microloan details
-        data = self.load_data()
-        if 'microloans' not in data:
-            data['microloans'] = []
-            data['next_microloan_id'] = 1
-
+        # 5. Store microloan details (the escrow scheduler works from the on-ledger times)
+        escrow_tx = escrow_result.get('tx_json', escrow_result)
         microloan = {
-            'id': data['next_microloan_id'],
             'farmer_address': farmer_address,
             'investor_address': investor_wallet.address,
             'loan_amount': loan_amount,
             'repayment_days': repayment_days,
             'status': 'active',
-            'escrow_sequence': escrow_result.get('Sequence', 0),
+            'escrow_sequence': escrow_tx.get('Sequence', 0),
+            'finish_after': escrow_tx.get('FinishAfter'),
+            'cancel_after': escrow_tx.get('CancelAfter'),
             'created_at': datetime.now().isoformat()
         }
-        data['microloans'].append(microloan)
-        data['next_microloan_id'] += 1
-        self.save_data(data)
+        microloan = self.storage.insert('microloans', microloan)
+        self.escrow_scheduler.schedule(microloan)
         print(f"✅ Microloan created!")
         print(f"   Loan ID: {microloan['id']}")
         print(f"   Amount: {loan_amount} XRP")
@@ -249,8 +286,9 @@ class CrowdfundingPlatform:
 
     def finish_microloan(self, microloan_id, farmer_seed):
         """Finish microloan escrow (farmer claims funds)."""
-        data = self.load_data()
-        microloan = next((ml for ml in data.get('microloans', []) if ml['id'] == microloan_id and ml['status'] == 'active'), None)
+        microloan = self.storage.get('microloans', microloan_id)
+        if microloan and microloan['status'] != 'active':
+            microloan = None
         if not microloan:
             print("❌ Microloan not found or already completed.")
             return
@@ -265,15 +303,17 @@ class CrowdfundingPlatform:
             print(f"❌ Escrow finish failed: {finish_result}")
             return
 
-        microloan['status'] = 'completed'
-        microloan['completed_at'] = datetime.now().isoformat()
-        self.save_data(data)
+        self.storage.update('microloans', microloan_id, {
+            'status': 'completed',
+            'completed_at': datetime.now().isoformat(),
+        })
         print(f"✅ Microloan completed! Farmer received {microloan['loan_amount']} XRP")
 
     def cancel_microloan(self, microloan_id, investor_seed):
         """Cancel microloan escrow (investor reclaims funds)."""
-        data = self.load_data()
-        microloan = next((ml for ml in data.get('microloans', []) if ml['id'] == microloan_id and ml['status'] == 'active'), None)
+        microloan = self.storage.get('microloans', microloan_id)
+        if microloan and microloan['status'] != 'active':
+            microloan = None
         if not microloan:
             print("❌ Microloan not found or already completed.")
             return
@@ -288,27 +328,115 @@ class CrowdfundingPlatform:
             print(f"❌ Escrow cancel failed: {cancel_result}")
             return
 
-        microloan['status'] = 'cancelled'
-        microloan['cancelled_at'] = datetime.now().isoformat()
-        self.save_data(data)
+        self.storage.update('microloans', microloan_id, {
+            'status': 'cancelled',
+            'cancelled_at': datetime.now().isoformat(),
+        })
         print(f"✅ Microloan cancelled! Investor reclaimed {microloan['loan_amount']} XRP")
 
+    def process_due_microloans(self):
+        """Finish or cancel every microloan escrow whose deadline has passed, in one batch."""
+        if not self.escrow_scheduler.operator_seed:
+            print("❌ Set AGRIVEST_OPERATOR_SEED to let the platform settle escrows")
+            return None
+        self.escrow_scheduler.sync()
+        summary = self.escrow_scheduler.run_due()
+        if summary is None:
+            print("❌ Another worker is settling escrows right now; try again later")
+            return None
+        print(f"✅ Escrows settled: {summary['completed']} finished, {summary['cancelled']} cancelled"
+              f" ({summary['retried']} to retry)")
+        return summary
+
+    def plan_payout(self, campaign_id, amount, asset='XRP', key=None):
+        """Split a harvest payout over the campaign's investors; returns the stored payout."""
+        payout = self.payouts.plan(campaign_id, amount, asset, key)
+        if payout is None:
+            print("❌ Campaign not found or has no investments")
+            return None
+        print(f"✅ Payout #{payout['id']} planned: {payout['amount']} {payout['currency']}"
+              f" to {payout['recipients']} investors")
+        return payout
+
+    def run_payout(self, payout_id, farmer_seed):
+        """Pay every pending transfer of a payout (safe to call again to resume)."""
+        payout = self.payouts.run(payout_id, farmer_seed)
+        counts = payout['counts']
+        print(f"✅ Payout #{payout_id} {payout['status']}: {counts.get('validated', 0)} paid,"
+              f" {counts.get('failed', 0)} failed, {counts.get('pending', 0)} pending")
+        return payout
+
+    def get_payout(self, payout_id):
+        return self.payouts.status(payout_id)
+
     def check_balances(self, wallet_address):
         print(f"\n💼 Wallet: {wallet_address}")
-        account_info = get_account_info(wallet_address)
+        account_info = wallet_utils.get_account_info(wallet_address)
         if not account_info:
             print("   This account does not exist or is not yet funded on the XRPL ledger.")
             return
         xrp_balance = int(account_info['Balance']) / 1000000
         print(f"   XRP Balance: {xrp_balance} XRP")
-        token_balances = get_iou_balances(wallet_address)
+        token_balances = wallet_utils.get_iou_balances(wallet_address)
         print("   Token Balances:")
         for iou in token_balances:
             print(f"     {iou['currency']} (issuer: {iou['account']}): {iou['balance']}")
 
+    def campaign_investor_addresses(self, campaign_id):
+        return list(dict.fromkeys(i['investor_address'] for i in self.get_campaign_investments(campaign_id)))
+
+    def get_campaign_investments(self, campaign_id):
+        return self.storage.find('investments', campaign_id=campaign_id)
+
+    def list_campaigns_page(self, status=None, farmer=None, min_goal=None, max_goal=None,
+                            sort='created_at', order='desc', limit=50, cursor=None):
+        """One page of campaigns plus its ETag; raises InvalidQuery for bad parameters."""
+        return self.campaign_listing.page(status, farmer, min_goal, max_goal, sort, order, limit, cursor)
+
+    def get_campaign_stats(self, campaign_id):
+        """Funding progress of one campaign, or None if it does not exist."""
+        campaign = self.storage.get('campaigns', campaign_id)
+        if not campaign:
+            return None
+        return dict(funding.progress(campaign), campaign_id=campaign_id,
+                    funding_goal=campaign['funding_goal'], status=campaign['status'])
+
+    def verify_funding(self, fix=False):
+        """Compare every campaign's running totals with its investments."""
+        drift = funding.verify(self.storage, fix=fix)
+        if not drift:
+            print("✅ Funding totals match the investment records")
+        for entry in drift:
+            print(f"⚠️  Campaign {entry['campaign_id']}: stored {entry['stored']}, "
+                  f"expected {entry['expected']}{' (fixed)' if fix else ''}")
+        return drift
+
+    def get_farmer_campaigns(self, farmer_address):
+        return self.storage.find('campaigns', farmer_address=farmer_address)
+
+    def get_portfolio(self, investor_address):
+        """A wallet's investments plus the total it has put into each campaign."""
+        investments = self.storage.find('investments', investor_address=investor_address)
+        by_campaign = {}
+        for investment in investments:
+            by_campaign[investment['campaign_id']] = by_campaign.get(investment['campaign_id'], 0) + investment['amount']
+        return {
+            'investor_address': investor_address,
+            'total_invested': sum(by_campaign.values()),
+            'by_campaign': by_campaign,
+            'investments': investments,
+        }
+
+    async def get_balances_async(self, addresses, concurrency=64):
+        """XRP and token balances for many wallets at once (duplicates are fetched once)."""
+        return await async_xrpl.get_balances(addresses, concurrency)
+
+    def get_balances(self, addresses, concurrency=64):
+        return asyncio.run(self.get_balances_async(addresses, concurrency))
+
     def display_trustlines(self, wallet_address):
         print(f"\n🔗 Trustlines for {wallet_address}:")
-        trustlines = get_trustlines(wallet_address)
+        trustlines = tokens.get_trustlines(wallet_address)
         if not trustlines:
             print("   No trustlines found.")
             return
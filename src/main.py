@@ -1,9 +1,23 @@
+import argparse
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from cli import batch
 from cli.cli_handlers import cli_handle
 
 def main():
+    parser = argparse.ArgumentParser(description="AgriVest farmer crowdfunding platform",
+                                     epilog="Without a command the interactive menu starts.")
+    parser.add_argument("--profile-startup", nargs="?", const="cli", choices=("cli", "api"),
+                        help="report where start-up time goes (-X importtime per package) and exit")
+    batch.add_commands(parser.add_subparsers(dest="command", metavar="command"))
+    args = parser.parse_args()
+    if args.profile_startup:
+        from cli.startup_profile import print_report, profile_startup
+        print_report(profile_startup(args.profile_startup))
+        return
+    if args.command:
+        sys.exit(batch.main(args))
     cli_handle()
 
 if __name__ == "__main__":
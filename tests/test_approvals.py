@@ -0,0 +1,84 @@
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, credential_utils, sequences, ticket_batch
+from mods.approvals import CampaignApprover, currency_candidates
+from mods.credential_index import CredentialIndex
+from mods.indexes import IndexedStorage
+from mods.storage import SQLiteStorage
+
+
+def _campaign(storage, farmer, title):
+    return storage.insert('campaigns', {'farmer_name': 'F', 'project_title': title, 'description': '',
+                                        'funding_goal': 1000, 'farmer_address': farmer,
+                                        'token_currency': None, 'status': 'pending'})['id']
+
+
+def test_currency_codes_are_unique_per_farmer(tmp_path):
+    storage = IndexedStorage(SQLiteStorage(str(tmp_path / 'storage.db')))
+    approver = CampaignApprover(storage, CredentialIndex(), issuers=[])
+    ids = [_campaign(storage, 'rA', 'Rice 2024'), _campaign(storage, 'rB', 'Rice')]
+    assert approver.approve(ids[0])[0]['token_currency'] == 'RIC'
+    ids += [_campaign(storage, 'rA', 'Rice 2025'), _campaign(storage, 'rA', 'Ri'), _campaign(storage, 'rA', 'xrp!')]
+    summary = approver.approve_pending()
+    assert (summary['approved'], summary['credential_check']) == (4, False)
+    assert [storage.get('campaigns', i)['token_currency'] for i in ids] == ['RIC', 'RIC', 'RIE', 'RIX', 'XRA']
+    assert approver.approve(ids[0]) == (storage.get('campaigns', ids[0]), 'Campaign is approved, not pending')
+    assert list(currency_candidates('Rice'))[:3] == ['RIC', 'RIE', 'RIA']
+
+
+def test_batch_approval_checks_each_farmer_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(ticket_batch, 'POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(sequences, 'POLL_INTERVAL', 0.05)
+    with FakeRippled(close_interval=0.1) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        oracle, other = Wallet.create(), Wallet.create()
+        farmers = [Wallet.create() for _ in range(4)]
+        credential_utils.issue_credentials(oracle.seed, [
+            {'farmer_address': f.address, 'credential_type': 'CropHealthy'} for f in farmers[:3]])
+        credential_utils.issue_credentials(other.seed, [
+            {'farmer_address': farmers[3].address, 'credential_type': 'CropHealthy'}])
+        for farmer in farmers[:2] + farmers[3:]:
+            credential_utils.accept_credential(farmer.seed, (other if farmer is farmers[3] else oracle).address,
+                                               'CropHealthy')
+
+        storage = IndexedStorage(SQLiteStorage(str(tmp_path / 'storage.db')))
+        ids = [_campaign(storage, f.address, f'Maize {n}') for n in range(5) for f in farmers]
+        index = CredentialIndex()
+        approver = CampaignApprover(storage, index, issuers=[oracle.address], credential_type='CropHealthy')
+        summary = approver.approve_pending()
+        # farmers 0 and 1 pass; 2 has not accepted, 3's credential is from an unknown issuer
+        assert (summary['approved'], summary['rejected'], summary['credential_reads']) == (10, 10, 4)
+        approved = storage.find('campaigns', status='approved')
+        assert {c['farmer_address'] for c in approved} == {farmers[0].address, farmers[1].address}
+        assert sorted(c['token_currency'] for c in approved if c['farmer_address'] == farmers[0].address) == \
+            ['MA3', 'MA4', 'MAE', 'MAI', 'MAZ']
+        assert storage.get('campaigns', ids[2])['approval_error'].startswith('farmer has no valid CropHealthy')
+
+        credential_utils.accept_credential(farmers[2].seed, oracle.address, 'CropHealthy')
+        summary = approver.approve_pending()
+        assert (summary['approved'], summary['credential_reads']) == (0, 0)  # read recently: cached
+        approver.max_age = 0
+        summary = approver.approve_pending()
+        assert (summary['approved'], summary['rejected'], summary['credential_reads']) == (5, 5, 2)
+    client_pool.close_clients()
+
+
+def test_approval_reads_credentials_from_the_network_they_are_issued_on(tmp_path, monkeypatch):
+    monkeypatch.setattr(ticket_batch, 'POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(sequences, 'POLL_INTERVAL', 0.05)
+    monkeypatch.delenv('XRPL_RPC_URL', raising=False)
+    with FakeRippled(close_interval=0.1) as rippled:
+        # the platform's default network, with no XRPL_RPC_URL override
+        monkeypatch.setattr(client_pool, 'DEFAULT_URL', rippled.url)
+        oracle, farmer = Wallet.create(), Wallet.create()
+        assert credential_utils.issue_credentials(oracle.seed, [
+            {'farmer_address': farmer.address, 'credential_type': 'CropHealthy'}])['issued'] == 1
+        credential_utils.accept_credential(farmer.seed, oracle.address, 'CropHealthy')
+
+        storage = IndexedStorage(SQLiteStorage(str(tmp_path / 'storage.db')))
+        campaign_id = _campaign(storage, farmer.address, 'Maize')
+        approver = CampaignApprover(storage, CredentialIndex(), issuers=[oracle.address],
+                                    credential_type='CropHealthy')
+        assert approver.approve(campaign_id)[1] is None
+    client_pool.close_clients()
@@ -0,0 +1,31 @@
+import asyncio
+
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import async_xrpl, client_pool
+from mods.ledger_cache import account_cache
+
+
+def test_get_balances_dedupes_and_merges(monkeypatch):
+    account_cache.clear()
+    with FakeRippled(close_interval=0, auto_fund=False) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        holders = [Wallet.create().address for _ in range(20)]
+        for address in holders:
+            rippled.ledger.fund(address)
+        rippled.ledger.lines[(holders[0], holders[1], 'MAI')] = {'limit': '50', 'balance': '5'}
+        unfunded = Wallet.create().address
+
+        async def scenario():
+            balances = await async_xrpl.get_balances(holders + holders[:5] + [unfunded], concurrency=4)
+            await client_pool.close_async_clients()
+            return balances
+
+        balances = asyncio.run(scenario())
+        assert list(balances) == holders + [unfunded]
+        assert rippled.ledger.request_counts['account_info'] == 21
+        assert balances[holders[0]]['tokens'] == [{'currency': 'MAI', 'issuer': holders[1], 'balance': '5'}]
+        assert balances[holders[2]]['funded'] and balances[holders[2]]['xrp_balance'] > 0
+        assert balances[unfunded] == {'funded': False, 'xrp_balance': None, 'tokens': []}
+    account_cache.clear()
@@ -0,0 +1,79 @@
+import asyncio
+import io
+import json
+
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from cli import batch
+from mods import async_xrpl, client_pool
+from src.crowdfunding_platform import CrowdfundingPlatform
+
+
+def _batch(platform, command, rows, checkpoint=None, concurrency=8):
+    out = io.StringIO()
+
+    async def scenario():
+        try:
+            return await batch.run_batch(platform, command, rows, concurrency, checkpoint, out)
+        finally:
+            await client_pool.close_async_clients()
+    summary = asyncio.run(scenario())
+    return summary, sorted((json.loads(line) for line in out.getvalue().splitlines()), key=lambda r: r['row'])
+
+
+def test_onboard_approve_and_invest_in_parallel(tmp_path, monkeypatch):
+    with FakeRippled(close_interval=0.25) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        platform = CrowdfundingPlatform(f"sqlite:{tmp_path / 'storage.db'}")
+        farmer = Wallet.create()
+        rows = [{'farmer_name': f'F{n}', 'project_title': f'Crop {n}', 'description': '',
+                 'funding_goal': '1000', 'farmer_address': farmer.address} for n in range(5)]
+        rows.append({'farmer_name': 'No goal', 'project_title': 'X', 'description': '', 'farmer_address': 'r'})
+        summary, results = _batch(platform, 'create-campaign', rows)
+        assert (summary['ok'], summary['error']) == (5, 1)
+        assert results[-1] == {'row': 6, 'status': 'error', 'error': 'missing funding_goal'}
+
+        ids = [r['result']['campaign_id'] for r in results[:5]]
+        # rows created before a crash lost their checkpoint lines: running them again finds them
+        _, again = _batch(platform, 'create-campaign', rows[:5])
+        assert [r['result']['campaign_id'] for r in again] == ids
+        assert len(platform.storage.all('campaigns')) == 5
+        summary, _ = _batch(platform, 'approve-campaign', [{'campaign_id': i} for i in ids])
+        assert summary['ok'] == 5
+        investors = [Wallet.create().seed for _ in ids]
+        summary, results = _batch(platform, 'invest', [
+            {'campaign_id': i, 'investor_seed': seed, 'amount': 5} for i, seed in zip(ids, investors)])
+        assert summary['ok'] == 5, results
+        assert len(platform.storage.all('investments')) == 5
+    client_pool.close_clients()
+
+
+def test_resumed_mint_batch_does_not_mint_twice(tmp_path, monkeypatch):
+    async def die_before_submitting(signed, client):
+        raise ConnectionError('worker died')
+
+    with FakeRippled(close_interval=0.25) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        platform = CrowdfundingPlatform(f"sqlite:{tmp_path / 'storage.db'}")
+        minters = [Wallet.create() for _ in range(4)]
+        rows = [{'seed': minter.seed, 'uri': f'ipfs://crop/{n}'} for n, minter in enumerate(minters)]
+        path = str(tmp_path / 'mint.ckpt')
+
+        monkeypatch.setattr(async_xrpl, '_send', die_before_submitting)
+        summary, _ = _batch(platform, 'mint', rows, batch.Checkpoint(path))
+        assert summary['error'] == 4
+        monkeypatch.undo()
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+
+        checkpoint = batch.Checkpoint(path)
+        assert len(checkpoint.state) == 4 and not checkpoint.done
+        summary, results = _batch(platform, 'mint', rows, checkpoint)
+        assert summary['ok'] == 4 and all(r['result']['nft_id'] for r in results)
+        # the blobs signed by the first run were sent as they were, not signed again
+        assert rippled.ledger.request_counts['submit'] == 4
+        assert all(len(rippled.ledger.nfts[minter.address]) == 1 for minter in minters)
+
+        summary, _ = _batch(platform, 'mint', rows, batch.Checkpoint(path))
+        assert summary['skipped'] == 4 and rippled.ledger.request_counts['submit'] == 4
+    client_pool.close_clients()
@@ -0,0 +1,76 @@
+import pytest
+
+from mods.campaign_listing import CampaignListing, InvalidQuery, encode_cursor
+from mods.indexes import IndexedStorage
+from mods.storage import SQLiteStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = IndexedStorage(SQLiteStorage(str(tmp_path / 'storage.db')))
+    for n in range(30):
+        storage.insert('campaigns', {
+            'farmer_address': f'rFarmer{n % 3}', 'farmer_wallet_seed': 'sSecret',
+            'status': 'approved' if n % 2 else 'pending', 'funding_goal': (n * 7) % 100,
+            'created_at': f'2026-01-01T00:00:{n:02d}',
+        })
+    return storage
+
+
+def _walk(listing, **query):
+    ids, cursor = [], None
+    while True:
+        _, page = listing.page(cursor=cursor, limit=4, **query)
+        ids += [c['id'] for c in page['campaigns']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_cursor_pages_cover_every_match_in_order(storage):
+    listing = CampaignListing(storage)
+    assert _walk(listing) == list(range(30, 0, -1))
+    assert _walk(listing, order='asc', sort='id') == list(range(1, 31))
+
+    expected = sorted((c for c in storage.all('campaigns')
+                       if c['status'] == 'approved' and 20 <= c['funding_goal'] <= 60),
+                      key=lambda c: (c['funding_goal'], c['id']))
+    for sort in ('funding_goal', 'created_at'):
+        ids = _walk(listing, status='approved', min_goal=20, max_goal=60, sort=sort, order='asc')
+        assert sorted(ids) == sorted(c['id'] for c in expected)
+    assert _walk(listing, status='approved', min_goal=20, max_goal=60, sort='funding_goal',
+                 order='asc') == [c['id'] for c in expected]
+    assert set(_walk(listing, farmer='rFarmer1', status='pending')) == {
+        c['id'] for c in storage.find('campaigns', farmer_address='rFarmer1', status='pending')}
+
+    with pytest.raises(InvalidQuery):
+        listing.page(sort='farmer_name')
+    with pytest.raises(InvalidQuery):
+        listing.page(cursor='not-a-cursor')
+
+
+def test_pages_are_cached_until_a_campaign_changes(storage):
+    listing = CampaignListing(storage)
+    etag, page = listing.page(limit=5)
+    assert all('farmer_wallet_seed' not in c for c in page['campaigns'])
+    assert listing.page(limit=5)[0] == etag
+    assert listing.stats()['hits'] == 1
+
+    storage.update('campaigns', 30, {'status': 'funded'})
+    new_etag, page = listing.page(limit=5)
+    assert new_etag != etag
+    assert page['campaigns'][0]['status'] == 'funded'
+    assert listing.stats()['misses'] == 2
+
+
+def test_cursor_only_continues_its_own_sort(storage):
+    listing = CampaignListing(storage)
+    cursor = listing.page(sort='created_at', limit=4)[1]['next_cursor']
+    with pytest.raises(InvalidQuery, match='sort=created_at&order=desc'):
+        listing.page(sort='funding_goal', cursor=cursor)
+    with pytest.raises(InvalidQuery):
+        listing.page(sort='created_at', order='asc', cursor=cursor)
+    forged = encode_cursor({'funding_goal': '2026-01-01', 'id': 3}, 'funding_goal', 'desc')
+    with pytest.raises(InvalidQuery, match='Malformed'):
+        listing.page(sort='funding_goal', cursor=forged)
+    assert len(listing.page(sort='created_at', limit=4, cursor=cursor)[1]['campaigns']) == 4
@@ -0,0 +1,55 @@
+from xrpl.models.requests import AccountInfo
+from xrpl.models.transactions import Payment
+from xrpl.transaction import submit_and_wait
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool
+
+SEED = 'sEdTW3oR3cPqvixUj4vVcxWoagUdpC6'
+
+
+def test_get_client_is_shared_per_url(monkeypatch):
+    monkeypatch.delenv('XRPL_RPC_URL', raising=False)
+    a = client_pool.get_client('http://127.0.0.1:1/')
+    assert client_pool.get_client('http://127.0.0.1:1/') is a
+    assert client_pool.get_client('http://127.0.0.1:2/') is not a
+    monkeypatch.setenv('XRPL_RPC_URL', 'http://127.0.0.1:3/')
+    assert client_pool.get_client('http://127.0.0.1:1/').url == 'http://127.0.0.1:3/'
+    client_pool.close_clients()
+
+
+def test_pooled_client_reuses_one_connection():
+    with FakeRippled(close_interval=0) as rippled:
+        client = client_pool.PooledJsonRpcClient(rippled.url)
+        wallet = Wallet.from_seed(SEED)
+        for _ in range(5):
+            info = client.request(AccountInfo(account=wallet.address))
+            assert info.is_successful()
+        payment = Payment(account=wallet.address, amount='1000000',
+                          destination='rUHk9P7dGtL8G8KQ35B7AQswRyLiUnmxfu')
+        response = submit_and_wait(payment, client, wallet)
+        assert response.result['meta']['TransactionResult'] == 'tesSUCCESS'
+        assert rippled.connections == 1
+        client.close()
+
+
+def test_async_helpers_share_pool_and_run_concurrently(monkeypatch):
+    import asyncio
+    from mods import async_xrpl
+
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        senders = [Wallet.create() for _ in range(3)]
+
+        async def scenario():
+            # two from the first wallet: consecutive sequences from its allocator
+            results = await asyncio.gather(*(
+                async_xrpl.send_xrp(w.seed, 5, 'rUHk9P7dGtL8G8KQ35B7AQswRyLiUnmxfu') for w in senders + senders[:1]))
+            info = await async_xrpl.get_account_info(senders[0].address)
+            await client_pool.close_async_clients()
+            return results, info
+
+        results, info = asyncio.run(scenario())
+        assert all(r.result['meta']['TransactionResult'] == 'tesSUCCESS' for r in results)
+        assert int(info['Balance']) < 1_000_000_000
@@ -0,0 +1,94 @@
+import time
+
+from xrpl.models.transactions import CredentialDelete
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, credential_utils, sequences, ticket_batch
+from mods.credential_index import CredentialIndex, credential_type_hex
+
+
+def test_bulk_issue_and_answer_from_the_index(monkeypatch):
+    monkeypatch.setattr(ticket_batch, 'POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(sequences, 'POLL_INTERVAL', 0.05)
+    with FakeRippled(close_interval=0.25) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        oracle = Wallet.create()
+        farmers = [Wallet.create() for _ in range(30)]
+        batch = [{'farmer_address': f.address, 'credential_type': 'CropHealthy2025'} for f in farmers]
+        started = time.monotonic()
+        summary = credential_utils.issue_credentials(oracle.seed, batch + batch[:3])
+        assert summary == {'issued': 30, 'failed': {}, 'unused_tickets': []}
+        assert (time.monotonic() - started) / 0.25 < 20  # one per ledger would need 30+
+        assert credential_utils.issue_credentials(oracle.seed, batch[:2])['issued'] == 2  # tecDUPLICATE
+
+        for farmer in farmers[:10]:
+            credential_utils.accept_credential(farmer.seed, oracle.address, 'CropHealthy2025')
+        assert len(credential_utils.lookup_credentials(oracle.address, by='issuer')) == 30
+        assert len(credential_utils.lookup_credentials(farmers[0].address)) == 1
+
+        index = CredentialIndex()
+        assert index.ensure(f.address for f in farmers) == 30
+        assert index.ensure(f.address for f in farmers) == 0
+        requests = sum(rippled.ledger.request_counts.values())
+        held = [index.holds(f.address, oracle.address, 'CropHealthy2025') for f in farmers]
+        assert held == [True] * 10 + [False] * 20  # not accepted yet
+        assert not index.holds(farmers[0].address, oracle.address, 'Organic')
+        assert not index.holds(farmers[0].address, farmers[1].address, 'CropHealthy2025')
+        assert sum(rippled.ledger.request_counts.values()) == requests
+    client_pool.close_clients()
+
+
+def test_streamed_changes_win_over_older_snapshots():
+    now = [1000]
+    index = CredentialIndex(clock=lambda: now[0])
+    kind = credential_type_hex('CropHealthy2025')
+    ok = {'TransactionResult': 'tesSUCCESS'}
+    create = {'TransactionType': 'CredentialCreate', 'Account': 'rOracle', 'Subject': 'rFarmer',
+              'CredentialType': kind, 'Expiration': 2000}
+    index.apply(create, ok, 10)
+    assert not index.holds('rFarmer', 'rOracle', 'CropHealthy2025')
+    index.apply({'TransactionType': 'CredentialAccept', 'Account': 'rFarmer', 'Issuer': 'rOracle',
+                 'CredentialType': kind}, ok, 11)
+    assert index.holds('rFarmer', 'rOracle', 'CropHealthy2025')
+    assert index.credentials('rFarmer') == [('rOracle', kind)]
+
+    # a failed delete changes nothing; a snapshot from before the delete does not bring it back
+    delete = {'TransactionType': 'CredentialDelete', 'Account': 'rOracle', 'Subject': 'rFarmer',
+              'CredentialType': kind}
+    index.apply(delete, {'TransactionResult': 'tecNO_PERMISSION'}, 12)
+    assert index.holds('rFarmer', 'rOracle', 'CropHealthy2025')
+    index.apply(delete, ok, 13)
+    snapshot = [{'LedgerEntryType': 'Credential', 'Issuer': 'rOracle', 'Subject': 'rFarmer',
+                 'CredentialType': kind, 'Flags': 0x00010000}]
+    index._store_snapshot('rFarmer', snapshot, 12)
+    assert not index.holds('rFarmer', 'rOracle', 'CropHealthy2025')
+    index._store_snapshot('rFarmer', snapshot, 14)
+    assert index.holds('rFarmer', 'rOracle', 'CropHealthy2025')
+
+    index.apply(create, ok, 15)  # re-issued with an expiration: unaccepted again
+    assert not index.holds('rFarmer', 'rOracle', 'CropHealthy2025')
+    index.apply({'TransactionType': 'CredentialAccept', 'Account': 'rFarmer', 'Issuer': 'rOracle',
+                 'CredentialType': kind}, ok, 16)
+    now[0] = 2000
+    assert not index.holds('rFarmer', 'rOracle', 'CropHealthy2025')  # expired
+
+
+def test_check_reads_the_subject_again_once_stale(monkeypatch):
+    monkeypatch.setattr(sequences, 'POLL_INTERVAL', 0.05)
+    with FakeRippled(close_interval=0.1) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        oracle, farmer = Wallet.create(), Wallet.create()
+        credential_utils.issue_crop_credential(oracle.seed, farmer.address, 'CropHealthy')
+        credential_utils.accept_credential(farmer.seed, oracle.address, 'CropHealthy')
+        index = CredentialIndex()
+        assert index.check(farmer.address, oracle.address, 'CropHealthy', max_age=300)
+
+        revoke = CredentialDelete(account=oracle.address, subject=farmer.address,
+                                  credential_type=credential_type_hex('CropHealthy'))
+        result = sequences.submit_and_wait(revoke, client_pool.get_client(), Wallet.from_seed(oracle.seed))
+        assert result.result['meta']['TransactionResult'] == 'tesSUCCESS'
+        assert index.check(farmer.address, oracle.address, 'CropHealthy', max_age=300)  # read recently
+        assert not index.check(farmer.address, oracle.address, 'CropHealthy', max_age=0)
+        assert index.loads == 2
+    client_pool.close_clients()
@@ -0,0 +1,29 @@
+from xrpl.core.keypairs import derive_classic_address
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, escrow_utils
+
+ALICE, BOB, CAROL = (derive_classic_address('ED' + f'{n:064X}') for n in range(3))
+
+
+def test_scan_pages_every_account_and_keeps_raw_columns(monkeypatch):
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        for n in range(450):   # more than one 400-entry page
+            rippled.ledger.add_escrow(ALICE, BOB, 1_000_000 + n, n, finish_after=700_000_000 + n)
+        rippled.ledger.add_escrow(CAROL, ALICE, 2_500_000, 1, cancel_after=800_000_000)
+
+        columns = escrow_utils.scan_escrows([ALICE, BOB, CAROL, ALICE])
+        assert len(columns['escrow_id']) == 451        # shared escrows counted once
+        assert columns['amount'][:2] == [1_000_000, 1_000_001]
+        assert columns['finish_after'][0] == 700_000_000 + escrow_utils.RIPPLE_EPOCH
+        assert columns['cancel_after'][-1] == 800_000_000 + escrow_utils.RIPPLE_EPOCH
+        assert columns['finish_after'][-1] is None
+
+        escrows = escrow_utils.get_escrows(ALICE)
+        assert len(escrows['sent']) == 450
+        assert escrows['received'] == [{
+            'escrow_id': columns['escrow_id'][-1], 'sender': CAROL, 'receiver': ALICE, 'amount': '2.500000',
+            'prev_txn_id': columns['prev_txn_id'][-1], 'expiry_date': '2025-05-08 06:13:20+00:00',
+        }]
+    client_pool.close_clients()
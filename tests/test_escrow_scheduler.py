@@ -0,0 +1,107 @@
+import time
+
+import pytest
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, escrow_utils, ticket_batch
+from mods.escrow_scheduler import EscrowScheduler
+from mods.indexes import IndexedStorage
+from mods.storage import SQLiteStorage
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    offset = [0]
+    clock = lambda: time.time() + offset[0]
+    monkeypatch.setattr(ticket_batch, 'POLL_INTERVAL', 0.01)
+    with FakeRippled(close_interval=0, clock=clock) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        storage = IndexedStorage(SQLiteStorage(str(tmp_path / 'storage.db')))
+        scheduler = EscrowScheduler(storage, operator_seed=Wallet.create().seed, clock=clock)
+        yield rippled, storage, scheduler, offset
+        client_pool.close_clients()
+
+
+def _loan(storage, farmer, finish, cancel):
+    investor = Wallet.create()
+    tx = escrow_utils.create_time_escrow(investor.seed, '5000000', farmer, finish, cancel)['tx_json']
+    return storage.insert('microloans', {
+        'farmer_address': farmer, 'investor_address': investor.address, 'loan_amount': 5,
+        'status': 'active', 'escrow_sequence': tx['Sequence'],
+        'finish_after': tx['FinishAfter'], 'cancel_after': tx['CancelAfter'],
+    })
+
+
+def test_due_escrows_settle_in_one_ticketed_batch(env):
+    rippled, storage, scheduler, offset = env
+    farmer = Wallet.create().address
+    rippled.ledger.fund(farmer, 0)
+    maturing = [_loan(storage, farmer, 60, 120) for _ in range(5)]
+    later = _loan(storage, farmer, 600, 1200)
+    scheduler.sync()
+    assert scheduler.run_due() == {}
+
+    offset[0] = 75
+    summary = scheduler.run_due()
+    assert summary['completed'] == 5 and summary['batches'] == 1
+    assert rippled.ledger.request_counts['submit'] == 6 + 1 + 5   # escrows, tickets, finishes
+    assert rippled.ledger.accounts[farmer]['Balance'] == 5 * 5_000_000
+    assert {storage.get('microloans', loan['id'])['status'] for loan in maturing} == {'completed'}
+    assert storage.get('microloans', later['id'])['status'] == 'active'
+
+    offset[0] = 1300   # past CancelAfter: only a cancel can apply
+    assert scheduler.run_due() == {'cancelled': 1, 'batches': 1}
+    assert storage.get('microloans', later['id'])['status'] == 'cancelled'
+    assert scheduler.next_due() is None
+
+
+def test_escrow_not_yet_due_on_ledger_is_retried(env):
+    rippled, storage, scheduler, offset = env
+    loan = _loan(storage, Wallet.create().address, 60, 120)
+    scheduler.sync()
+    # our clock says due, the ledger's does not: tecNO_PERMISSION, try again later
+    summary = scheduler.run_due(now=scheduler.ripple_now() + 100)
+    assert summary['retried'] == 1
+    assert storage.get('microloans', loan['id'])['status'] == 'active'
+    offset[0] = 200
+    assert scheduler.run_due()['cancelled'] == 1
+
+
+def test_gone_and_abandoned_escrows_are_not_submitted_again(env):
+    rippled, storage, scheduler, offset = env
+    scheduler.max_attempts = 1
+    now = scheduler.ripple_now()
+    gone = storage.insert('microloans', {
+        'farmer_address': Wallet.create().address, 'investor_address': Wallet.create().address,
+        'loan_amount': 5, 'status': 'active', 'escrow_sequence': 999,
+        'finish_after': now - 100, 'cancel_after': now + 1000})
+    stuck = _loan(storage, Wallet.create().address, 60, 120)
+    scheduler.sync()
+    # the gone escrow answers tecNO_TARGET; the stuck finish is not due on the ledger clock
+    summary = scheduler.run_due(now=now + 100)
+    assert (summary['gone'], scheduler.stats['abandoned']) == (1, 1)
+    submits = rippled.ledger.request_counts['submit']
+    for later in (105, 110, 115):
+        scheduler.sync()
+        assert scheduler.run_due(now=now + later) == {}
+    assert rippled.ledger.request_counts['submit'] == submits
+    assert {storage.get('microloans', loan['id'])['status'] for loan in (gone, stuck)} == {'active'}
+
+
+def test_one_worker_at_a_time_runs_due_escrows(env):
+    rippled, storage, scheduler, offset = env
+    other = EscrowScheduler(storage, operator_seed=scheduler.operator_seed, clock=scheduler.clock)
+    loan = _loan(storage, Wallet.create().address, 60, 120)
+    scheduler.sync()
+    other.sync()
+    assert scheduler.run_due() == {}   # nothing due yet, but the lease is ours now
+
+    offset[0] = 75
+    assert other.run_due() is None
+    assert scheduler.run_due() == {'completed': 1, 'batches': 1}
+
+    lease = storage.all('leases')[0]
+    storage.update('leases', lease['id'], {'expires': time.time() - 1})   # the first worker died
+    assert other.run_due() == {}   # its copy of the loan is settled already
+    assert storage.get('microloans', loan['id'])['status'] == 'completed'
@@ -0,0 +1,24 @@
+import asyncio
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.models.requests import AccountInfo, GenericRequest, StreamParameter, Subscribe
+
+from benchmarks.fake_rippled import FakeRippled
+
+
+def test_websocket_serves_requests_and_the_ledger_stream():
+    async def session(url):
+        async with AsyncWebsocketClient(url) as client:
+            info = await client.request(AccountInfo(account='rUHk9P7dGtL8G8KQ35B7AQswRyLiUnmxfu'))
+            unknown = await client.request(GenericRequest(method='no_such_method'))
+            subscribed = await client.request(Subscribe(streams=[StreamParameter.LEDGER]))
+            async for message in client:
+                if message.get('type') == 'ledgerClosed':
+                    return info, unknown, subscribed, message
+
+    with FakeRippled(close_interval=0.1, websocket=True) as rippled:
+        info, unknown, subscribed, closed = asyncio.run(asyncio.wait_for(session(rippled.ws_url), 10))
+    assert info.is_successful() and info.result['account_data']['Balance'] == '1000000000'
+    assert not unknown.is_successful() and unknown.result['error'] == 'unknownCmd'
+    assert closed['ledger_index'] > subscribed.result['ledger_index']
+    assert rippled.ledger.request_counts['account_info'] == 1
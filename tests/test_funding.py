@@ -0,0 +1,62 @@
+import pytest
+
+from mods import funding
+from mods.indexes import IndexedStorage
+from mods.storage import JsonStorage, SQLiteStorage
+
+
+@pytest.fixture(params=['sqlite', 'json'])
+def storage(request, tmp_path):
+    if request.param == 'sqlite':
+        backend = SQLiteStorage(str(tmp_path / 'storage.db'))
+    else:
+        backend = JsonStorage(str(tmp_path / 'storage.json'))
+    storage = IndexedStorage(backend)
+    storage.insert('campaigns', {'status': 'approved', 'funding_goal': 200})
+    storage.insert('campaigns', {'status': 'approved', 'funding_goal': 0})
+    return storage
+
+
+def _invest(storage, campaign_id, investor, amount, tokens=0):
+    return funding.record_investment(storage, {'campaign_id': campaign_id, 'investor_address': investor,
+                                               'amount': amount, 'token_amount': tokens})
+
+
+def test_totals_follow_each_investment(storage):
+    _invest(storage, 1, 'rAlice', 50, tokens=50)
+    _invest(storage, 1, 'rAlice', 25)
+    _invest(storage, 1, 'rBob', 25, tokens=25)
+    _invest(storage, 2, 'rBob', 10)
+
+    assert funding.progress(storage.get('campaigns', 1)) == {
+        'total_raised': 100, 'investment_count': 3, 'investor_count': 2, 'tokens_issued': 75,
+        'percent_funded': 50.0,
+    }
+    assert funding.progress(storage.get('campaigns', 2))['percent_funded'] is None
+    assert storage.count('investments', campaign_id=1) == 3
+    assert funding.verify(storage) == []
+
+
+def test_atomic_rolls_back_every_write(storage):
+    with pytest.raises(RuntimeError):
+        with storage.atomic() as tx:
+            tx.insert('investments', {'campaign_id': 1, 'investor_address': 'rAlice', 'amount': 5})
+            tx.update('campaigns', 1, {'funding': {'total_raised': 5}})
+            raise RuntimeError('crash mid-write')
+    assert storage.all('investments') == []
+    assert 'funding' not in storage.get('campaigns', 1)
+
+
+def test_verify_reports_and_fixes_drift(storage):
+    _invest(storage, 1, 'rAlice', 40)
+    storage.update('campaigns', 1, {'funding': dict(funding.empty_funding(), total_raised=999)})
+    storage.insert('investments', {'campaign_id': 2, 'investor_address': 'rBob', 'amount': 7})
+
+    drift = funding.verify(storage)
+    assert [(d['campaign_id'], d['stored']['total_raised'], d['expected']['total_raised'])
+            for d in drift] == [(1, 999, 40), (2, 0, 7)]
+    assert funding.progress(storage.get('campaigns', 1))['total_raised'] == 999
+
+    assert len(funding.verify(storage, fix=True)) == 2
+    assert funding.verify(storage) == []
+    assert funding.progress(storage.get('campaigns', 2))['investor_count'] == 1
@@ -0,0 +1,64 @@
+import pytest
+
+from mods.indexes import IndexedStorage
+from mods.storage import JsonStorage, SQLiteStorage
+
+
+@pytest.fixture(params=['sqlite', 'json'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        return lambda: SQLiteStorage(str(tmp_path / 'storage.db'))
+    return lambda: JsonStorage(str(tmp_path / 'storage.json'))
+
+
+def _invest(storage, campaign_id, investor, amount=10):
+    return storage.insert('investments', {'campaign_id': campaign_id, 'investor_address': investor,
+                                          'amount': amount})
+
+
+def test_find_follows_inserts_and_updates(backend):
+    storage = IndexedStorage(backend())
+    campaign = storage.insert('campaigns', {'farmer_address': 'rFarmer', 'status': 'pending'})
+    assert storage.find('campaigns', status='pending') == [campaign]
+
+    storage.update('campaigns', campaign['id'], {'status': 'approved'})
+    assert storage.find('campaigns', status='pending') == []
+    assert [c['id'] for c in storage.find('campaigns', status='approved', farmer_address='rFarmer')] == [1]
+
+    first = _invest(storage, 1, 'rAlice')
+    _invest(storage, 2, 'rAlice')
+    _invest(storage, 1, 'rBob')
+    assert [i['id'] for i in storage.find('investments', campaign_id=1)] == [first['id'], 3]
+    assert [i['campaign_id'] for i in storage.find('investments', investor_address='rAlice')] == [1, 2]
+    assert storage.count('investments', campaign_id=1) == 2
+    assert storage.get('investments', 2)['campaign_id'] == 2
+    with pytest.raises(KeyError):
+        storage.find('investments', amount=10)
+
+
+def test_sees_other_workers_writes_and_full_replacements(backend):
+    storage = IndexedStorage(backend())
+    _invest(storage, 1, 'rAlice')
+    assert storage.count('investments', campaign_id=1) == 1
+
+    other_worker = backend()
+    _invest(other_worker, 1, 'rBob')
+    assert [i['investor_address'] for i in storage.find('investments', campaign_id=1)] == ['rAlice', 'rBob']
+
+    data = other_worker.load_data()
+    data['investments'] = data['investments'][1:]
+    other_worker.save_data(data)
+    assert [i['investor_address'] for i in storage.find('investments', campaign_id=1)] == ['rBob']
+
+
+def test_sqlite_refresh_reads_only_changed_rows(tmp_path, monkeypatch):
+    storage = IndexedStorage(SQLiteStorage(str(tmp_path / 'storage.db')))
+    for n in range(50):
+        _invest(storage, n % 5, f'r{n}')
+    assert storage.count('investments', campaign_id=0) == 10
+
+    monkeypatch.setattr(storage.storage, 'all', lambda collection: pytest.fail('full reload'))
+    storage.update('investments', 8, {'campaign_id': 0})  # was in campaign 2
+    _invest(storage, 0, 'rNew')
+    assert storage.count('investments', campaign_id=0) == 12
+    assert storage.count('investments', campaign_id=2) == 9
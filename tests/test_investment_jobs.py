@@ -0,0 +1,167 @@
+import asyncio
+import time
+
+import pytest
+from xrpl.asyncio.transaction import autofill_and_sign
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool
+from mods.investment_jobs import InvestmentWorker
+from mods.storage import SQLiteStorage
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        storage = SQLiteStorage(str(tmp_path / 'storage.db'))
+        farmer = Wallet.create()
+        campaign = storage.insert('campaigns', {
+            'farmer_name': 'Ana', 'project_title': 'Maize', 'description': '',
+            'funding_goal': 100, 'farmer_address': farmer.address,
+            'farmer_wallet_seed': farmer.seed, 'token_currency': 'MAI',
+            'status': 'approved', 'created_at': '2025-01-01T00:00:00',
+        })
+        yield rippled, storage, campaign
+        storage.close()
+
+
+def _run(coro):
+    async def scenario():
+        try:
+            return await coro
+        finally:
+            await client_pool.close_async_clients()
+    return asyncio.run(scenario())
+
+
+def test_background_worker_completes_queued_job(env):
+    rippled, storage, campaign = env
+    worker = InvestmentWorker(storage)
+
+    async def scenario():
+        await worker.start()
+        job = worker.enqueue(campaign['id'], Wallet.create().seed, 5)
+        assert job['status'] == 'queued'
+        await worker.join()
+        await worker.stop()
+        return worker.status(job['id'])
+
+    status = _run(scenario())
+    assert status['status'] == 'completed'
+    assert [s['status'] for s in status['steps'].values()] == ['validated'] * 3
+    assert 'investor_seed' not in status
+    investment = storage.get('investments', status['investment_id'])
+    assert investment['job_id'] == status['job_id'] and investment['token_amount'] == 5
+    assert storage.get('investment_jobs', status['job_id']).get('investor_seed') is None
+
+
+def test_unknown_or_unapproved_campaign_is_rejected(env):
+    _, storage, _ = env
+    assert InvestmentWorker(storage).enqueue(999, Wallet.create().seed, 5) is None
+
+
+def test_resume_resubmits_signed_payment_once(env):
+    rippled, storage, campaign = env
+    investor = Wallet.create()
+    crashed = InvestmentWorker(storage)
+    job = crashed.enqueue(campaign['id'], investor.seed, 5, schedule=False)
+    job = crashed._save(crashed._claim(job['id']), {'investor_address': investor.address})
+
+    async def crash_after_signing():
+        # the first worker persisted the signed payment, then died before submitting it
+        tx, wallet = crashed._build('payment', job, campaign)
+        signed = await autofill_and_sign(tx, client_pool.get_async_client(), wallet)
+        crashed._save_step(job, 'payment', status='submitted', hash=signed.get_hash(),
+                           tx_blob=signed.blob(), last_ledger_sequence=signed.last_ledger_sequence)
+        return signed.get_hash()
+
+    payment_hash = _run(crash_after_signing())
+    storage.update('investment_jobs', job['id'], {'lease_expires': time.time() - 1})
+
+    # a fresh worker confirms the signed payment but needs the seed for the trustline
+    resumed = InvestmentWorker(storage)
+    job = _run(resumed.run_job(job['id']))
+    assert job['status'] == 'awaiting_seed' and job['steps']['payment']['status'] == 'validated'
+    with pytest.raises(ValueError):
+        resumed.provide_seed(job['id'], Wallet.create().seed)
+    resumed.provide_seed(job['id'], investor.seed)
+    job = _run(resumed.run_job(job['id']))
+    assert job['status'] == 'completed'
+    assert job['steps']['payment']['hash'] == payment_hash
+    assert resumed._seeds == {}
+    assert all(investor.seed not in str(row) for row in storage.all('investment_jobs'))
+    payments = [tx for tx in rippled.ledger.transactions.values()
+                if tx['tx']['TransactionType'] == 'Payment' and tx['tx']['Account'] == investor.address]
+    assert len(payments) == 1
+    assert len([i for i in storage.all('investments') if i['job_id'] == job['id']]) == 1
+
+
+def test_repeat_investment_skips_trustline_with_room(env):
+    rippled, storage, campaign = env
+    investor = Wallet.create()
+    worker = InvestmentWorker(storage)
+
+    async def invest_three_times():
+        steps = []
+        for amount in (5, 20, 40):
+            job = worker.enqueue(campaign['id'], investor.seed, amount, schedule=False)
+            steps.append((await worker.run_job(job['id']))['steps']['trustline']['status'])
+        return steps
+
+    # 5 sets a limit of 50; 20 more still fits (25 <= 50), 40 more does not (65 > 50)
+    assert _run(invest_three_times()) == ['validated', 'skipped', 'validated']
+    assert worker.stats == {'trustlines_submitted': 2, 'trustlines_skipped': 1}
+    line = rippled.ledger.lines[(investor.address, campaign['farmer_address'], 'MAI')]
+    assert float(line['limit']) == 400 and float(line['balance']) == 65
+
+
+def test_trustline_limit_rounds_up(env):
+    _, storage, campaign = env
+    worker = InvestmentWorker(storage)
+    job = worker.enqueue(campaign['id'], Wallet.create().seed, 5, schedule=False)
+    # a balance of 60.5 plus 5 more does not fit under a limit of 65
+    tx, _ = worker._build('trustline', job, campaign, limit=65.5)
+    assert tx.limit_amount.value == '66'
+
+
+def test_failed_tokens_step_still_records_the_paid_investment(env, monkeypatch):
+    rippled, storage, campaign = env
+    investor = Wallet.create()
+    worker = InvestmentWorker(storage)
+
+    async def line_has_room(job, campaign):
+        return None
+    monkeypatch.setattr(worker, '_trustline_limit', line_has_room)
+    # the line the preflight trusted is too small for the tokens
+    rippled.ledger.lines[(investor.address, campaign['farmer_address'], 'MAI')] = {'limit': '1', 'balance': '0'}
+
+    job = worker.enqueue(campaign['id'], investor.seed, 5, schedule=False)
+    job = _run(worker.run_job(job['id']))
+    assert job['status'] == 'completed' and job.get('investor_seed') is None
+    assert job['steps']['payment']['status'] == 'validated'
+    assert job['steps']['tokens']['status'] == 'failed'
+    investment = storage.get('investments', job['investment_id'])
+    assert investment['amount'] == 5 and investment['token_amount'] == 0
+    assert investment['token_error'] == 'tokens step: Transaction failed: tecPATH_PARTIAL'
+    assert job['error'] == investment['token_error']
+    assert storage.get('campaigns', campaign['id'])['funding']['total_raised'] == 5
+
+
+def test_concurrent_jobs_of_one_investor_do_not_share_the_trustline_room(env):
+    rippled, storage, campaign = env
+    investor = Wallet.create()
+    worker = InvestmentWorker(storage)
+    # a line left over from an earlier investment: room for one of the two jobs, not both
+    rippled.ledger.lines[(investor.address, campaign['farmer_address'], 'MAI')] = {'limit': '50', 'balance': '0'}
+
+    async def invest_twice():
+        jobs = [worker.enqueue(campaign['id'], investor.seed, 30, schedule=False) for _ in range(2)]
+        return await asyncio.gather(*(worker.run_job(job['id']) for job in jobs))
+
+    jobs = _run(invest_twice())
+    assert [storage.get('investments', j['investment_id'])['token_amount'] for j in jobs] == [30, 30]
+    assert worker.stats == {'trustlines_submitted': 1, 'trustlines_skipped': 1}
+    assert float(rippled.ledger.lines[(investor.address, campaign['farmer_address'], 'MAI')]['balance']) == 60
+    assert worker._investor_locks == {}
@@ -0,0 +1,82 @@
+import asyncio
+
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import async_xrpl, client_pool, tokens, wallet
+from mods.ledger_cache import MISS, LedgerCache, account_cache
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_lru_and_pinned_ledgers():
+    clock = Clock()
+    cache = LedgerCache(maxsize=2, ttl=3.0, clock=clock)
+    cache.put('account_info', 'rA', 'validated', {'Balance': '1'}, cost=0.5)
+    cache.put('account_info', 'rA', 80, {'Balance': '0'})
+    assert cache.get('account_info', 'rA') == {'Balance': '1'}
+    clock.now = 4.0
+    assert cache.get('account_info', 'rA') is MISS
+    assert cache.get('account_info', 'rA', 80) == {'Balance': '0'}  # a numbered ledger never changes
+
+    cache.put('account_lines', 'rB', 'validated', [])
+    cache.put('account_lines', 'rC', 'validated', [])
+    assert cache.get('account_info', 'rA', 80) is MISS  # least recently used went first
+    cache.invalidate('rB')
+    assert cache.get('account_lines', 'rB') is MISS and cache.get('account_lines', 'rC') == []
+    assert cache.stats() == {'hits': 3, 'misses': 3, 'hit_rate': 0.5, 'evictions': 1,
+                             'invalidations': 1, 'size': 1, 'seconds_saved': 0.5}
+
+
+def test_reads_are_shared_and_submits_invalidate(monkeypatch):
+    account_cache.clear()
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        sender, receiver = Wallet.create(), Wallet.create()
+        counts = rippled.ledger.request_counts
+
+        before = wallet.get_account_info(receiver.address)
+        assert wallet.get_account_info(receiver.address) == before
+        assert counts['account_info'] == 1
+        assert wallet.get_iou_balances(receiver.address) == tokens.get_trustlines(receiver.address) == []
+        assert counts['account_lines'] == 1
+
+        wallet.send_xrp(sender.seed, 5, receiver.address)
+        after = wallet.get_account_info(receiver.address)
+        assert int(after['Balance']) == int(before['Balance']) + 5_000_000
+        assert account_cache.stats()['invalidations'] >= 2
+    client_pool.close_clients()
+    account_cache.clear()
+
+
+def test_entries_are_per_endpoint(monkeypatch):
+    cache = LedgerCache()
+    cache.put('account_lines', 'rA', 'validated', ['devnet'], url='https://devnet:51234/')
+    assert cache.get('account_lines', 'rA', url='https://devnet:51234') == ['devnet']
+    assert cache.get('account_lines', 'rA', url='https://altnet:51234') is MISS
+
+    account_cache.clear()
+    monkeypatch.delenv('XRPL_RPC_URL', raising=False)
+    with FakeRippled(close_interval=0) as devnet, FakeRippled(close_interval=0) as altnet:
+        monkeypatch.setattr(tokens, 'TESTNET_URL', devnet.url)
+        monkeypatch.setattr(async_xrpl, 'testnet_url', altnet.url)
+        investor = Wallet.create()
+        for rippled in (devnet, altnet):
+            rippled.ledger.fund(investor.address)
+        devnet.ledger.lines[(investor.address, 'rFarmer', 'MAI')] = {'limit': '50', 'balance': '5'}
+
+        assert [line['currency'] for line in tokens.get_trustlines(investor.address)] == ['MAI']
+
+        async def altnet_lines():
+            try:
+                return await async_xrpl.get_trustlines(investor.address)
+            finally:
+                await client_pool.close_async_clients()
+        assert asyncio.run(altnet_lines()) == []
+    client_pool.close_clients()
+    account_cache.clear()
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_ledger_stream import FakeLedgerStream
+from mods.funding import progress
+from mods.indexes import IndexedStorage
+from mods.ledger_ingest import LedgerIngestor
+from mods.storage import SQLiteStorage
+
+FARMER, INVESTOR = Wallet.create().address, Wallet.create().address
+
+
+def _tx(n, **tx):
+    return {'tx_json': tx, 'meta': {'TransactionResult': 'tesSUCCESS'}, 'hash': f'{n:064X}'}
+
+
+LEDGERS = [
+    {'ledger_index': 101, 'transactions': [
+        _tx(1, TransactionType='EscrowFinish', Account=FARMER, Owner=INVESTOR, OfferSequence=7)]},
+    {'ledger_index': 102, 'transactions': [
+        _tx(2, TransactionType='Payment', Account=FARMER, Destination=INVESTOR,
+            Amount={'currency': 'MAI', 'issuer': FARMER, 'value': '10'})]},
+    {'ledger_index': 103, 'transactions': []},
+]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = IndexedStorage(SQLiteStorage(str(tmp_path / 'storage.db')))
+    storage.insert('campaigns', {'farmer_address': FARMER, 'status': 'approved', 'funding_goal': 100,
+                                 'funding': {'total_raised': 10, 'investment_count': 1,
+                                             'investor_count': 1, 'tokens_issued': 0}})
+    storage.insert('investments', {'campaign_id': 1, 'investor_address': INVESTOR, 'amount': 10,
+                                   'token_amount': 0, 'token_currency': 'MAI'})
+    storage.insert('microloans', {'farmer_address': FARMER, 'investor_address': INVESTOR,
+                                  'escrow_sequence': 7, 'status': 'active'})
+    return storage
+
+
+async def _until(condition, timeout=5.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_stream_updates_records_and_resumes_after_disconnect(storage):
+    async def scenario():
+        async with FakeLedgerStream(LEDGERS) as stream:
+            ingestor = LedgerIngestor(storage, url=stream.url, reconnect_delay=0.05)
+            await ingestor.start()
+            await stream.wait_for_clients(accounts=2)
+            await stream.advance()
+            await _until(lambda: storage.get('microloans', 1)['status'] == 'completed')
+
+            await stream.drop_clients()
+            await stream.advance(2)          # published while we are away
+            await _until(lambda: storage.get('investments', 1)['token_amount'] == 10)
+            await stream.wait_for_clients(accounts=2)
+            await ingestor.stop()
+            return ingestor, stream
+
+    ingestor, stream = asyncio.run(scenario())
+    assert ingestor.stats['connects'] == 2
+    assert stream.request_counts['account_tx'] == 2       # one back-fill per account
+    assert ingestor.checkpoint() == 100
+    assert storage.get('microloans', 1)['settled_tx'] == LEDGERS[0]['transactions'][0]['hash']
+    assert progress(storage.get('campaigns', 1))['tokens_issued'] == 10
+    assert storage.count('ledger_events') == 2
+
+
+def test_replayed_transactions_apply_once(storage):
+    ingestor = LedgerIngestor(storage)
+    heard = []
+    ingestor.listeners.append(lambda tx, meta, ledger_index: heard.append(ledger_index))
+    entry = LEDGERS[1]['transactions'][0]
+    args = (entry['tx_json'], entry['meta'], entry['hash'], 102)
+    assert ingestor.ingest(*args) is True
+    assert ingestor.ingest(*args) is False
+    assert heard == [102]
+    assert progress(storage.get('campaigns', 1))['tokens_issued'] == 10
+    assert storage.find('ledger_events', hash=entry['hash'])[0]['applied'] == [['investments', 1], ['campaigns', 1]]
+
+
+def test_failing_listener_leaves_the_transaction_to_be_delivered_again(storage):
+    ingestor = LedgerIngestor(storage)
+    heard = []
+
+    def flaky(tx, meta, ledger_index):
+        if not heard:
+            heard.append('failed')
+            raise RuntimeError('listener down')
+        heard.append(ledger_index)
+    ingestor.listeners.append(flaky)
+    entry = LEDGERS[1]['transactions'][0]
+    args = (entry['tx_json'], entry['meta'], entry['hash'], 102)
+    with pytest.raises(RuntimeError):
+        ingestor.ingest(*args)
+    assert storage.count('ledger_events') == 0
+    assert progress(storage.get('campaigns', 1))['tokens_issued'] == 0
+    assert ingestor.ingest(*args) is True
+    assert heard == ['failed', 102]
+    assert progress(storage.get('campaigns', 1))['tokens_issued'] == 10
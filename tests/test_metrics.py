@@ -0,0 +1,40 @@
+from xrpl.models.transactions import Payment
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, metrics, sequences
+from mods.storage import SQLiteStorage
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram('t_seconds', 'test', ('op',), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 5):
+        histogram.observe(seconds, 'x')
+    lines = histogram.render()
+    assert 't_seconds_bucket{op="x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{op="x",le="1.0"} 3' in lines
+    assert 't_seconds_bucket{op="x",le="+Inf"} 4' in lines
+    assert 't_seconds_count{op="x"} 4' in lines
+    assert histogram.snapshot()[('x',)][2:] == (1.0, float('inf'))   # p50, p95
+
+
+def test_submission_and_storage_are_timed(tmp_path, monkeypatch):
+    monkeypatch.setattr(sequences, 'POLL_INTERVAL', 0.05)
+    submits = metrics.RPC_SECONDS.snapshot().get(('submit',), (0,))[0]
+    validated = metrics.TX_RESULTS.value('sequenced', 'tesSUCCESS')
+    with FakeRippled(close_interval=0.1) as rippled:
+        client = client_pool.get_client(rippled.url)
+        sender = Wallet.create()
+        rippled.ledger.fund(sender.address)
+        payment = Payment(account=sender.address, destination=Wallet.create().address, amount='1000')
+        sequences.submit_and_wait(payment, client, sender)
+    client_pool.close_clients()
+    SQLiteStorage(str(tmp_path / 'storage.db')).insert('campaigns', {'status': 'pending'})
+
+    assert metrics.RPC_SECONDS.snapshot()[('submit',)][0] == submits + 1
+    assert metrics.TX_RESULTS.value('sequenced', 'tesSUCCESS') == validated + 1
+    assert metrics.ENGINE_RESULTS.value('tesSUCCESS') >= 1
+    text = metrics.render()
+    assert 'xrpl_submit_to_validated_seconds_count{path="sequenced"}' in text
+    assert 'storage_seconds_bucket{backend="sqlite",op="insert",le="+Inf"}' in text
+    assert 'ledger_cache_lookups{outcome="hit"}' in text
@@ -0,0 +1,54 @@
+import time
+
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, nft_batch, ticket_batch
+
+
+def test_batch_mint_confirms_in_a_few_ledgers(monkeypatch):
+    monkeypatch.setattr(ticket_batch, 'POLL_INTERVAL', 0.05)
+    with FakeRippled(close_interval=0.25) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        minter = Wallet.create()
+        started = time.monotonic()
+        reply = nft_batch.batch_mint(minter.seed, 'ipfs://receipt', 8, 0, 0, 40)
+        ledgers = (time.monotonic() - started) / 0.25
+        assert reply == '40 NFTs generated.'
+        assert len(rippled.ledger.nfts[minter.address]) == 40
+        assert ledgers < 20  # one mint per ledger would need 40+
+    client_pool.close_clients()
+
+
+def test_batch_mint_retries_dropped_mints_on_the_same_ticket(monkeypatch):
+    submit_all = ticket_batch.submit_all
+    dropped = []
+
+    def flaky_submit(client, signed, window):
+        # the first round loses two mints before they reach the ledger
+        if dropped:
+            return submit_all(client, signed, window)
+        dropped.extend(sorted(signed)[:2])
+        kept = {t: tx for t, tx in signed.items() if t not in dropped}
+        return {**submit_all(client, kept, window), **{t: 'telCAN_NOT_QUEUE' for t in dropped}}
+
+    monkeypatch.setattr(ticket_batch, 'submit_all', flaky_submit)
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        minter = Wallet.create()
+        assert nft_batch.batch_mint(minter.seed, 'ipfs://receipt', 8, 0, 0, 5) == '5 NFTs generated.'
+        assert len(rippled.ledger.nfts[minter.address]) == 5
+    client_pool.close_clients()
+
+
+def test_batch_mint_reports_unused_tickets(monkeypatch):
+    monkeypatch.setattr(ticket_batch, 'submit_all', lambda client, signed, window: {
+        t: 'telCAN_NOT_QUEUE' for t in signed})
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        minter = Wallet.create()
+        lines = nft_batch.batch_mint(minter.seed, 'ipfs://receipt', 8, 0, 0, 2, retries=1).splitlines()
+        tickets = [int(line.split()[3].rstrip(':')) for line in lines[:2]]
+        assert lines[:2] == [f'Submit failed: ticket {t}: telCAN_NOT_QUEUE' for t in tickets]
+        assert lines[2:] == ['0 NFTs generated.', f'Unused tickets: {tickets[0]}, {tickets[1]}']
+    client_pool.close_clients()
@@ -0,0 +1,57 @@
+import asyncio
+import itertools
+
+from xrpl.models.requests import AccountLines, AccountNFTs
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, nft_batch, wallet
+from mods.pagination import apaginate, paginate
+
+
+def _give_nfts(ledger, address, count):
+    ledger.fund(address)
+    ledger.nfts[address] = [{'NFTokenID': f'{n:064X}', 'nft_serial': n} for n in range(count)]
+
+
+def test_get_batch_streams_every_page_lazily(monkeypatch):
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        holder = Wallet.create().address
+        _give_nfts(rippled.ledger, holder, 1000)
+
+        nfts = nft_batch.get_batch(None, holder, prefetch=0)
+        assert [n['nft_serial'] for n in itertools.islice(nfts, 3)] == [0, 1, 2]
+        assert rippled.ledger.request_counts['account_nfts'] == 1
+        assert sum(1 for _ in nfts) == 997
+        assert rippled.ledger.request_counts['account_nfts'] == 3
+
+        prefetched = [n['nft_serial'] for n in nft_batch.get_batch(None, holder, prefetch=2)]
+        assert prefetched == list(range(1000))
+    client_pool.close_clients()
+
+
+def test_helpers_follow_markers_and_missing_accounts_are_empty(monkeypatch):
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        holder = Wallet.create().address
+        rippled.ledger.fund(holder)
+        for n in range(450):
+            rippled.ledger.lines[(holder, f'r{n}', 'ABC')] = {'limit': '10', 'balance': '1'}
+        assert len(wallet.get_iou_balances(holder)) == 450
+        assert wallet.get_iou_balances(Wallet.create().address) == []
+
+        client = client_pool.get_client(rippled.url)
+        small_pages = AccountLines(account=holder, ledger_index='validated', limit=100)
+        assert len(list(paginate(client, small_pages))) == 450
+        assert rippled.ledger.request_counts['account_lines'] == 3 + 5
+
+        _give_nfts(rippled.ledger, holder, 250)
+
+        async def scan():
+            nfts = [n async for n in apaginate(client_pool.get_async_client(), AccountNFTs(account=holder, limit=100))]
+            await client_pool.close_async_clients()
+            return nfts
+
+        assert len(asyncio.run(scan())) == 250
+    client_pool.close_clients()
@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from xrpl.core.keypairs import derive_classic_address
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, ticket_batch
+from mods.indexes import IndexedStorage
+from mods.payouts import PayoutEngine, pro_rata
+from mods.storage import SQLiteStorage, empty_data
+
+INVESTORS = [derive_classic_address('ED' + f'{n:064X}') for n in range(1, 301)]
+
+
+def _campaign(tmp_path, farmer):
+    storage = IndexedStorage(SQLiteStorage(str(tmp_path / 'storage.db')))
+    data = empty_data()
+    data['campaigns'] = [{'id': 1, 'farmer_address': farmer.address, 'status': 'funded',
+                          'token_currency': 'CRP', 'funding_goal': 10_000}]
+    # the first investor invested twice; amounts 1..300 XRP
+    data['investments'] = [{'id': n + 1, 'campaign_id': 1, 'investor_address': address, 'amount': n + 1}
+                           for n, address in enumerate(INVESTORS)]
+    data['investments'].append({'id': 301, 'campaign_id': 1, 'investor_address': INVESTORS[0], 'amount': 2})
+    data['next_campaign_id'], data['next_investment_id'] = 2, 302
+    storage.save_data(data)
+    return storage
+
+
+def test_pro_rata_adds_up_exactly():
+    shares = pro_rata(100, {'a': 1, 'b': 1, 'c': 1})
+    assert sorted(shares.values()) == [33, 33, 34]
+    assert pro_rata(1_000_000, {'a': 3, 'b': 1}) == {'a': 750_000, 'b': 250_000}
+
+
+def test_payout_pays_everyone_once_and_a_rerun_pays_nobody(tmp_path):
+    with FakeRippled(close_interval=0.5) as rippled:
+        farmer = Wallet.create()
+        rippled.ledger.fund(farmer.address, 100_000_000_000)
+        engine = PayoutEngine(_campaign(tmp_path, farmer), url=rippled.url, poll_interval=0.05)
+
+        payout = engine.plan(1, 4515.2)
+        assert engine.plan(1, 4515.2, key='harvest-1')['id'] != payout['id']
+        assert engine.plan(1, 9999, key='harvest-1')['amount'] == '4515.2'   # same key: same payout
+        payout = engine.run(payout['id'], farmer.seed, wave=128)
+        assert payout['status'] == 'completed' and payout['counts'] == {'validated': 300}
+        assert payout['paid'] == '4515.2'
+        received = {a: rippled.ledger.accounts[a]['Balance'] - rippled.ledger.starting_balance
+                    for a in INVESTORS}
+        assert received[INVESTORS[0]] == 300_000 and received[INVESTORS[9]] == 1_000_000   # 0.1 XRP per XRP
+
+        submitted = rippled.ledger.request_counts['submit']
+        assert engine.run(payout['id'], farmer.seed)['status'] == 'completed'
+        assert rippled.ledger.request_counts['submit'] == submitted
+    client_pool.close_clients()
+
+
+def test_concurrent_plans_with_one_key_store_one_payout(tmp_path):
+    engine = PayoutEngine(_campaign(tmp_path, Wallet.create()))
+    with ThreadPoolExecutor(8) as pool:
+        payouts = list(pool.map(lambda _: engine.plan(1, 100, key='harvest-1'), range(8)))
+    assert len({payout['id'] for payout in payouts}) == 1
+    assert len(engine.storage.all('payouts')) == 1
+    assert len(engine.storage.all('payout_transfers')) == 300
+
+
+def test_resumed_payout_never_pays_twice(tmp_path, monkeypatch):
+    run_with_tickets = ticket_batch.run_with_tickets
+
+    def crash_mid_submit(client, wallet, txs, *args, **kwargs):
+        def submit_half(client, signed, window):
+            half = dict(list(signed.items())[:len(signed) // 2])
+            ticket_batch.submit_all(client, half, window)
+            raise ConnectionError('worker died')
+        return run_with_tickets(client, wallet, txs, *args, submit=submit_half, **kwargs)
+
+    with FakeRippled(close_interval=0.5) as rippled:
+        farmer = Wallet.create()
+        rippled.ledger.fund(farmer.address, 100_000_000_000)
+        engine = PayoutEngine(_campaign(tmp_path, farmer), url=rippled.url, poll_interval=0.05)
+        payout = engine.plan(1, 300)
+
+        monkeypatch.setattr(ticket_batch, 'run_with_tickets', crash_mid_submit)
+        try:
+            engine.run(payout['id'], farmer.seed, wave=150)
+        except ConnectionError:
+            pass
+        assert engine.status(payout['id'])['counts'] == {'submitted': 150, 'pending': 150}
+        monkeypatch.setattr(ticket_batch, 'run_with_tickets', run_with_tickets)
+
+        assert engine.run(payout['id'], farmer.seed)['counts'] == {'validated': 300}
+        paid = sum(rippled.ledger.accounts[a]['Balance'] - rippled.ledger.starting_balance for a in INVESTORS)
+        assert paid == 300 * 1_000_000
+        # resuming reused the first wave's tickets: one TicketCreate per wave
+        kinds = [t['tx']['TransactionType'] for t in rippled.ledger.transactions.values()]
+        assert kinds.count('TicketCreate') == 2 and kinds.count('Payment') == 300
+    client_pool.close_clients()
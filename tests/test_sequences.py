@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from xrpl.models.transactions import Payment
+from xrpl.wallet import Wallet
+
+import mod1
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, sequences
+
+
+def test_one_wallet_submits_many_payments_at_once(monkeypatch):
+    monkeypatch.setattr(sequences, 'POLL_INTERVAL', 0.05)
+    with FakeRippled(close_interval=0.25) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        issuer = Wallet.create()
+        start = rippled.ledger.fund(issuer.address)['Sequence']
+        sequencer = sequences.get_sequencer(client_pool.get_client(), issuer.address)
+        tickets = sequencer.add_tickets(issuer, 5)
+        destinations = [Wallet.create().address for _ in range(30)]
+
+        with ThreadPoolExecutor(max_workers=30) as pool:
+            replies = list(pool.map(lambda d: mod1.send_xrp(issuer.seed, 1, d), destinations))
+        assert all(r.result['meta']['TransactionResult'] == 'tesSUCCESS' for r in replies)
+        ledgers = {r.result['ledger_index'] for r in replies}
+        assert len(ledgers) < 15          # many payments per ledger, not one each
+        used = rippled.ledger.accounts[issuer.address]['Sequence'] - start - 1 - len(tickets)
+        assert used + sequencer.stats['tickets'] == 30
+    client_pool.close_clients()
+
+
+def test_resyncs_when_the_sequence_was_used_elsewhere(monkeypatch):
+    monkeypatch.setattr(sequences, 'POLL_INTERVAL', 0.05)
+    with FakeRippled(close_interval=0.1) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        client = client_pool.get_client()
+        farmer = Wallet.create()
+        rippled.ledger.fund(farmer.address)
+        payment = Payment(account=farmer.address, destination=Wallet.create().address, amount='1000')
+        sequences.submit_and_wait(payment, client, farmer)
+
+        rippled.ledger.accounts[farmer.address]['Sequence'] += 2   # a wallet app signed two more
+        response = sequences.submit_and_wait(payment, client, farmer)
+        assert response.result['meta']['TransactionResult'] == 'tesSUCCESS'
+        sequencer = sequences.get_sequencer(client, farmer.address)
+        assert sequencer.stats['resyncs'] == 2 and sequencer.stats['retries'] == 1
+    client_pool.close_clients()
+
+
+def test_async_token_issuance_shares_the_allocator(monkeypatch):
+    import asyncio
+    from mods import async_xrpl, ticket_batch
+
+    monkeypatch.setattr(sequences, 'POLL_INTERVAL', 0.05)
+    with FakeRippled(close_interval=0.25) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        farmer = Wallet.create()
+        start = rippled.ledger.fund(farmer.address)['Sequence']
+        investors = [Wallet.create().address for _ in range(20)]
+        for investor in investors:
+            rippled.ledger.lines[(investor, farmer.address, 'MAI')] = {'limit': '100', 'balance': '0'}
+        # a TicketCreate from the same wallet must not take a number behind the allocator's back
+        tickets = ticket_batch.create_tickets(client_pool.get_client(), farmer, 3)
+
+        async def issue():
+            try:
+                return await asyncio.gather(*(
+                    async_xrpl.send_currency(farmer.seed, investor, 'MAI', 5) for investor in investors))
+            finally:
+                await client_pool.close_async_clients()
+
+        replies = asyncio.run(issue())
+        assert all(r['meta']['TransactionResult'] == 'tesSUCCESS' for r in replies)
+        assert len({r['ledger_index'] for r in replies}) < 10   # not one payment per ledger
+        assert rippled.ledger.accounts[farmer.address]['Sequence'] == start + 1 + len(tickets) + 20
+        assert sequences.get_sequencer(client_pool.get_client(), farmer.address).stats['resyncs'] == 1
+    client_pool.close_clients()
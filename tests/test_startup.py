@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+from cli.startup_profile import parse_importtime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _loaded_after(code):
+    child = subprocess.run([sys.executable, '-c', code + '; import sys; print(sorted(sys.modules))'],
+                           cwd=ROOT, capture_output=True, text=True, check=True)
+    return eval(child.stdout.strip().splitlines()[-1])
+
+
+def test_entry_points_start_without_the_xrpl_stack(tmp_path):
+    modules = _loaded_after(f"from cli.cli_handlers import CrowdfundingPlatform; "
+                            f"CrowdfundingPlatform('sqlite:{tmp_path / 'storage.db'}').list_campaigns()")
+    assert 'xrpl' not in modules and 'cryptoconditions' not in modules
+    assert 'xrpl' not in _loaded_after("import api_server")
+
+
+def test_parse_importtime():
+    rows = parse_importtime("import time: self [us] | cumulative | imported package\n"
+                            "import time:       120 |        120 |     mods.storage\n"
+                            "import time:        80 |        200 |   mods\n")
+    assert rows == [('mods.storage', 120, 120), ('mods', 80, 200)]
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from mods.storage import JsonStorage, SQLiteStorage, open_storage
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, tmp_path):
+    if request.param == 'json':
+        return JsonStorage(str(tmp_path / 'storage.json'))
+    return SQLiteStorage(str(tmp_path / 'storage.db'))
+
+
+def test_insert_assigns_sequential_ids(storage):
+    first = storage.insert('campaigns', {'project_title': 'Cow Farm'})
+    second = storage.insert('campaigns', {'project_title': 'Tulip Farm'})
+    assert (first['id'], second['id']) == (1, 2)
+    assert storage.load_data()['next_campaign_id'] == 3
+
+
+def test_update_and_get(storage):
+    campaign = storage.insert('campaigns', {'status': 'pending'})
+    storage.update('campaigns', campaign['id'], {'status': 'approved'})
+    assert storage.get('campaigns', campaign['id'])['status'] == 'approved'
+    assert storage.update('campaigns', 999, {'status': 'approved'}) is None
+    assert storage.get('campaigns', 999) is None
+
+
+def test_collections_keep_separate_counters(storage):
+    storage.insert('campaigns', {})
+    investment = storage.insert('investments', {'campaign_id': 1})
+    microloan = storage.insert('microloans', {'status': 'active'})
+    assert investment['id'] == 1
+    assert microloan['id'] == 1
+    assert [i['campaign_id'] for i in storage.all('investments')] == [1]
+
+
+def test_sqlite_migrates_legacy_json_once(tmp_path):
+    legacy = {
+        'campaigns': [{'id': 1, 'project_title': 'Cow Farm'}, {'id': 3, 'project_title': 'Tulip Farm'}],
+        'investments': [],
+        'next_campaign_id': 4,
+        'next_investment_id': 1,
+    }
+    (tmp_path / 'storage.json').write_text(json.dumps(legacy))
+
+    storage = SQLiteStorage(str(tmp_path / 'storage.db'))
+    assert storage.migrated_from is not None
+    assert [c['id'] for c in storage.all('campaigns')] == [1, 3]
+    assert storage.insert('campaigns', {'project_title': 'Rice Paddy'})['id'] == 4
+    assert storage.insert('microloans', {})['id'] == 1
+    storage.close()
+
+    legacy['campaigns'].append({'id': 4, 'project_title': 'Changed after migration'})
+    (tmp_path / 'storage.json').write_text(json.dumps(legacy))
+    reopened = SQLiteStorage(str(tmp_path / 'storage.db'))
+    assert reopened.migrated_from is None
+    assert reopened.get('campaigns', 4)['project_title'] == 'Rice Paddy'
+
+
+def test_open_storage_rejects_unknown_scheme():
+    with pytest.raises(ValueError):
+        open_storage('postgres:whatever')
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_parallel_writers_lose_nothing(backend, tmp_path):
+    from benchmarks.storage_stress import run
+    result = run(backend, writers=4, per_writer=10, directory=str(tmp_path))
+    assert result['records'] == 40
+
+
+def test_json_crash_mid_write_keeps_previous_file(tmp_path, monkeypatch):
+    storage = JsonStorage(str(tmp_path / 'storage.json'))
+    storage.insert('campaigns', {'project_title': 'Cow Farm'})
+
+    def broken_dump(data, f, **kwargs):
+        f.write('{"campaigns": [')
+        raise OSError('disk full')
+
+    monkeypatch.setattr('mods.storage.json.dump', broken_dump)
+    with pytest.raises(OSError):
+        storage.insert('campaigns', {'project_title': 'Tulip Farm'})
+    monkeypatch.undo()
+
+    assert [c['project_title'] for c in storage.all('campaigns')] == ['Cow Farm']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['storage.json', 'storage.json.lock']
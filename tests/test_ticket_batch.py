@@ -0,0 +1,33 @@
+from xrpl.models.transactions import NFTokenMint
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, ticket_batch
+
+
+def test_error_replies_without_engine_result_do_not_abort_the_batch(monkeypatch):
+    rounds = []
+
+    def submit(client, signed, window):
+        if rounds:
+            results = ticket_batch.submit_all(client, signed, window)
+        else:
+            # the first round: one submit is lost with an RPC error, one is applied but
+            # its reply is an error too
+            lost, answered, *rest = sorted(signed)
+            results = ticket_batch.submit_all(client, {t: signed[t] for t in [answered] + rest}, window)
+            results.update({lost: None, answered: None})
+        rounds.append(sorted(signed))
+        return results
+
+    with FakeRippled(close_interval=0.05) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        client, minter = client_pool.get_client(), Wallet.create()
+        tickets = ticket_batch.create_tickets(client, minter, 3)
+        mints = {t: NFTokenMint(account=minter.address, nftoken_taxon=0) for t in tickets}
+        results, errors, _ = ticket_batch.run_with_tickets(client, minter, mints, submit=submit,
+                                                           poll_interval=0.01)
+        assert results == dict.fromkeys(tickets, 'tesSUCCESS') and errors == {}
+        assert rounds == [tickets, tickets[:1]]   # only the lost one was signed again
+        assert len(rippled.ledger.nfts[minter.address]) == 3
+    client_pool.close_clients()
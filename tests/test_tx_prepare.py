@@ -0,0 +1,63 @@
+from xrpl.models.requests import SubmitOnly
+from xrpl.models.transactions import NFTokenMint
+from xrpl.transaction import autofill, sign
+from xrpl.wallet import Wallet
+
+from benchmarks.fake_rippled import FakeRippled
+from mods import client_pool, nft_utils
+from mods.tx_prepare import TxPreparer
+
+
+def test_batch_costs_a_few_rpcs_and_matches_autofill(monkeypatch):
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        farmer = Wallet.create()
+        rippled.ledger.fund(farmer.address)
+        expected = autofill(NFTokenMint(account=farmer.address, nftoken_taxon=0),
+                            client_pool.get_client()).to_xrpl()
+
+        rippled.ledger.request_counts.clear()
+        txs = nft_utils.prepare_nft_mint_txs(farmer.address, [f'ipfs://receipt/{n}' for n in range(500)])
+        assert sum(rippled.ledger.request_counts.values()) <= 5
+        assert [tx['Sequence'] for tx in txs] == list(range(expected['Sequence'], expected['Sequence'] + 500))
+        assert {tx['Fee'] for tx in txs} == {expected['Fee']}
+        assert {tx['LastLedgerSequence'] for tx in txs} == {expected['LastLedgerSequence']}
+        # none of them was submitted: the next call starts from the account again
+        assert nft_utils.prepare_nft_burn_tx(farmer.address, '00' * 32)['Sequence'] == expected['Sequence']
+    client_pool.close_clients()
+
+
+def test_sequences_resync_once_prepared_transactions_expire(monkeypatch):
+    now = [0.0]
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        farmer = Wallet.create()
+        start = rippled.ledger.fund(farmer.address)['Sequence']
+        preparer = TxPreparer(ledger_offset=2, clock=lambda: now[0])
+        mint = NFTokenMint(account=farmer.address, nftoken_taxon=0)
+
+        assert [tx['Sequence'] for tx in preparer.prepare_many([mint] * 3)] == [start, start + 1, start + 2]
+        for _ in range(3):   # none of them was submitted and their LastLedgerSequence passes
+            rippled.ledger.close_ledger()
+        now[0] += 60
+        assert preparer.prepare(mint)['Sequence'] == start
+        assert preparer.stats['sequence_lookups'] == 2
+    client_pool.close_clients()
+
+
+def test_abandoned_prepare_does_not_shift_the_next_one(monkeypatch):
+    with FakeRippled(close_interval=0) as rippled:
+        monkeypatch.setenv('XRPL_RPC_URL', rippled.url)
+        farmer = Wallet.create()
+        start = rippled.ledger.fund(farmer.address)['Sequence']
+        preparer = TxPreparer()
+        mint = NFTokenMint(account=farmer.address, nftoken_taxon=0)
+
+        assert preparer.prepare(mint)['Sequence'] == start   # never signed
+        tx = preparer.prepare(mint)   # same ledger, well within the first one's LastLedgerSequence
+        assert tx['Sequence'] == start
+        submitted = client_pool.get_client().request(SubmitOnly(
+            tx_blob=sign(NFTokenMint.from_xrpl(tx), farmer).blob()))
+        assert submitted.result['engine_result'] == 'tesSUCCESS'
+        assert preparer.prepare(mint)['Sequence'] == start + 1
+    client_pool.close_clients()